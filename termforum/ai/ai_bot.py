@@ -131,7 +131,7 @@ class AIBot:
         if context_posts:
             context += "Recent discussion:\n"
             for post in context_posts[-5:]:  # Last 5 posts
-                context += f"- {post.content[:100]}...\n"
+                context += f"- {post.text[:100]}...\n"
             context += "\n"
 
         context += f"User question: {question}"
@@ -161,10 +161,10 @@ class AIBot:
 
         # Build discussion text
         discussion = f"Thread: {thread.title}\n\n"
-        discussion += f"First post: {thread.content}\n\n"
+        discussion += f"First post: {thread.text}\n\n"
         discussion += "Discussion:\n"
         for post in context_posts:
-            discussion += f"- {post.content}\n"
+            discussion += f"- {post.text}\n"
 
         # Generate summary
         response = self.client.generate(
@@ -231,7 +231,7 @@ class AIBot:
         Returns:
             Created reply post or None
         """
-        command = AICommandParser.parse(post.content)
+        command = AICommandParser.parse(post.text)
         if not command:
             return None
 
@@ -1,11 +1,13 @@
 """Main Textual application for TermForum"""
 
+from textual import work
 from textual.app import App, ComposeResult
 from textual.binding import Binding
 from textual.widgets import Header, Footer
-from .storage import Database
+from .storage import Database, AsyncDatabase, ForumWatcher
 from .models import User
 from .ui.screens import HomeScreen
+from .ui.messages import ChangesAvailable
 from .i18n import get_translator
 from .config import get_config
 
@@ -32,6 +34,8 @@ class TermForumApp(App):
         super().__init__()
         self.database = database
         self.current_user = current_user
+        # Screens load data through this so SQLite never blocks the event loop
+        self.async_database = AsyncDatabase(database)
 
         # Initialize i18n and config
         self.translator = get_translator()
@@ -67,6 +71,24 @@ class TermForumApp(App):
         """Called when app is mounted"""
         # Show home screen
         self.push_screen(HomeScreen(self.database, self.current_user))
+        # An in-memory database has no file for a second connection to watch
+        if not self.database.pool.shared:
+            self._watch_changes()
+
+    @work(exclusive=True, group="changes")
+    async def _watch_changes(self) -> None:
+        """Forward committed changes to whichever screen is active"""
+        # Also watches each shard of a sharded forum
+        watcher = ForumWatcher(self.database.db_path)
+        try:
+            async for changes in watcher.stream():
+                self.screen.post_message(ChangesAvailable(changes))
+        finally:
+            watcher.close()
+
+    async def on_unmount(self) -> None:
+        """Called when app is unmounted"""
+        await self.async_database.close()
 
     def action_quit(self) -> None:
         """Quit the application"""
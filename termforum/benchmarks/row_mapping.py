@@ -0,0 +1,152 @@
+"""Row mapping microbenchmark: name lookups vs positional RowMapper
+
+Fetches thread and post result sets once, then times only the
+conversion into models: the old per-field row["name"] builders with a
+datetime.fromisoformat call per timestamp, against the positional
+mappers used by Database.
+
+Usage:
+    python -m termforum.benchmarks.row_mapping [--threads 20000] [--posts 100000]
+"""
+
+import argparse
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from ..models import Post, Thread
+from ..storage import Database
+from ..storage.database import POST_MAPPER, THREAD_MAPPER
+from ..storage.mapper import _parse_timestamp
+
+
+def thread_by_name(row: sqlite3.Row) -> Thread:
+    """Previous Thread builder: one name lookup per field"""
+    return Thread(
+        id=row["id"],
+        title=row["title"],
+        slug=row["slug"],
+        category_id=row["category_id"],
+        user_id=row["user_id"],
+        content=row["content"],
+        created_at=datetime.fromisoformat(row["created_at"]),
+        updated_at=datetime.fromisoformat(row["updated_at"]),
+        view_count=row["view_count"],
+        posts_count=row["posts_count"],
+        upvotes=row["upvotes"],
+        downvotes=row["downvotes"],
+        is_pinned=bool(row["is_pinned"]),
+        is_locked=bool(row["is_locked"]),
+        is_deleted=bool(row["is_deleted"]),
+        last_post_user_id=row["last_post_user_id"],
+        last_post_at=datetime.fromisoformat(row["last_post_at"]),
+        category_name=row["category_name"],
+        category_icon=row["category_icon"],
+        user_name=row["user_name"],
+        user_avatar=row["user_avatar"],
+    )
+
+
+def post_by_name(row: sqlite3.Row) -> Post:
+    """Previous Post builder: one name lookup per field"""
+    return Post(
+        id=row["id"],
+        thread_id=row["thread_id"],
+        user_id=row["user_id"],
+        content=row["content"],
+        parent_post_id=row["parent_post_id"],
+        created_at=datetime.fromisoformat(row["created_at"]),
+        updated_at=datetime.fromisoformat(row["updated_at"]),
+        upvotes=row["upvotes"],
+        downvotes=row["downvotes"],
+        is_deleted=bool(row["is_deleted"]),
+        is_edited=bool(row["is_edited"]),
+        edit_reason=row["edit_reason"],
+        depth=row["depth"] or 0,
+        user_name=row["user_name"],
+        user_avatar=row["user_avatar"],
+        user_reputation=row["user_reputation"],
+    )
+
+
+def fetch(db: Database, sql: str) -> Tuple[tuple, List[sqlite3.Row]]:
+    """Run a query and return (description, rows)"""
+    with db._read() as conn:
+        cursor = conn.execute(sql)
+        return cursor.description, cursor.fetchall()
+
+
+def rate(convert: Callable[[], List], rows: int, repeat: int = 3) -> float:
+    """Best rows/sec over a few runs"""
+    best = float("inf")
+    for _ in range(repeat):
+        _parse_timestamp.cache_clear()
+        start = time.perf_counter()
+        convert()
+        best = min(best, time.perf_counter() - start)
+    return rows / best if best else 0.0
+
+
+def run(threads: int = 20_000, posts: int = 100_000) -> Dict[str, Tuple[float, float]]:
+    """Run the benchmark against a temporary database
+
+    Returns:
+        {model: (rows/sec before, rows/sec after)}
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(str(Path(tmp) / "bench.db"))
+        user = db.create_user("benchuser")
+        category = db.list_categories()[0]
+        thread_ids = db.bulk_create_threads(
+            {"title": f"Benchmark thread {i}", "content": "Opening post",
+             "user_id": user.id, "category_id": category.id}
+            for i in range(threads)
+        )
+        db.bulk_create_posts(
+            {"thread_id": thread_ids[i % len(thread_ids)], "user_id": user.id, "content": "A reply"}
+            for i in range(posts)
+        )
+
+        thread_description, thread_rows = fetch(db, """
+            SELECT t.*, c.name as category_name, c.icon as category_icon,
+                   u.username as user_name, u.avatar as user_avatar
+            FROM threads t
+            JOIN categories c ON t.category_id = c.id
+            JOIN users u ON t.user_id = u.id
+        """)
+        post_description, post_rows = fetch(db, """
+            SELECT p.*, u.username as user_name, u.avatar as user_avatar, u.reputation as user_reputation
+            FROM posts p
+            JOIN users u ON p.user_id = u.id
+        """)
+        db.close()
+
+    return {
+        "Thread": (
+            rate(lambda: [thread_by_name(row) for row in thread_rows], len(thread_rows)),
+            rate(lambda: THREAD_MAPPER.map(thread_description, thread_rows), len(thread_rows)),
+        ),
+        "Post": (
+            rate(lambda: [post_by_name(row) for row in post_rows], len(post_rows)),
+            rate(lambda: POST_MAPPER.map(post_description, post_rows), len(post_rows)),
+        ),
+    }
+
+
+def main() -> None:
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=20_000, help="Thread rows to map")
+    parser.add_argument("--posts", type=int, default=100_000, help="Post rows to map")
+    args = parser.parse_args()
+
+    print(f"{'model':<8} {'by name rows/s':>15} {'positional rows/s':>18} {'speedup':>8}")
+    for name, (before, after) in run(args.threads, args.posts).items():
+        print(f"{name:<8} {before:>15,.0f} {after:>18,.0f} {after / before:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Row model benchmark: dataclass Post vs tuple-backed PostRow
+
+Loads one thread with 100k posts both ways and reports build throughput
+and the memory retained by the loaded objects.
+
+Usage:
+    python -m termforum.benchmarks.row_models [--posts 100000]
+"""
+
+import argparse
+import gc
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from ..storage import Database
+
+
+def build_thread(db: Database, posts: int) -> int:
+    """Create one thread with the given number of replies"""
+    user = db.create_user("benchuser")
+    category = db.list_categories()[0]
+    thread = db.create_thread("Benchmark thread", "Opening post", user.id, category.id)
+    body = "Some reply text with a `code` span and a few words of padding. " * 3
+    db.bulk_create_posts(
+        ({"thread_id": thread.id, "user_id": user.id, "content": body} for _ in range(posts)),
+        batch_size=10000,
+    )
+    return thread.id
+
+
+def measure(load: Callable[[], List]) -> Dict[str, float]:
+    """Time one load and measure the memory its result retains"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = load()
+    elapsed = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Touch the fields the thread view renders
+    for item in result:
+        item.user_name, item.score, item.display_content, item.depth
+
+    return {
+        "rows": len(result),
+        "seconds": elapsed,
+        "rows_per_sec": len(result) / elapsed if elapsed else 0.0,
+        "retained_mb": retained / 1_000_000,
+        "peak_mb": peak / 1_000_000,
+    }
+
+
+def run(posts: int = 100_000) -> Dict[str, Dict[str, float]]:
+    """Run the benchmark against a temporary database"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(str(Path(tmp) / "bench.db"))
+        thread_id = build_thread(db, posts)
+
+        results = {
+            "Post (dataclass)": measure(
+                lambda: db.list_post_tree(thread_id, limit=posts)[0]
+            ),
+            "PostRow (tuple)": measure(
+                lambda: db.list_post_tree_rows(thread_id, limit=posts)[0]
+            ),
+        }
+        db.close()
+    return results
+
+
+def main() -> None:
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=100_000, help="Replies in the benchmark thread")
+    args = parser.parse_args()
+
+    print(f"Loading a {args.posts:,}-post thread\n")
+    print(f"{'model':<18} {'seconds':>8} {'rows/s':>10} {'retained MB':>12} {'peak MB':>9}")
+    for name, r in run(args.posts).items():
+        print(f"{name:<18} {r['seconds']:>8.3f} {r['rows_per_sec']:>10,.0f} "
+              f"{r['retained_mb']:>12.1f} {r['peak_mb']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
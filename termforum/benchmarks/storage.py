@@ -0,0 +1,340 @@
+"""Storage layer benchmark with regression baselines
+
+Runs the hot Database calls against seeded databases of 10k, 1M and 10M
+posts and reports p50/p95/p99 latency and throughput per call. Seeded
+databases are cached in a data directory, so each scale is generated
+once (10M takes minutes) and reused by later runs.
+
+Results can be saved as a JSON baseline. Later runs are compared
+against it and fail when a call's latency at the chosen percentile is
+more than `tolerance` above the baseline. Baselines are machine-specific
+and belong next to the databases they were measured on, not in the repo.
+
+Posts written by the create_post benchmark are deleted afterwards, so
+repeated runs see the same database.
+
+Usage:
+    termforum bench storage [--scale 10k --scale 1m] [--save-baseline]
+    python -m termforum.benchmarks.storage [--scale 10k]
+"""
+
+import argparse
+import json
+import math
+import platform
+import random
+import sqlite3
+import sys
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ..seed import ForumSeeder
+from ..storage import Database
+
+
+# Posts per scale; threads and users scale with them
+SCALES: Dict[str, int] = {
+    "10k": 10_000,
+    "1m": 1_000_000,
+    "10m": 10_000_000,
+}
+
+OPERATIONS = (
+    "list_threads",
+    "list_posts",
+    "get_thread",
+    "create_post",
+    "get_forum_stats",
+    "get_user_by_username",
+)
+
+PERCENTILES = ("p50", "p95", "p99")
+
+DEFAULT_DATA_DIR = Path.home() / ".termforum" / "bench"
+BASELINE_VERSION = 1
+
+# Slowdowns smaller than this are timer and scheduler noise, whatever the ratio
+NOISE_FLOOR_MS = 0.05
+
+
+@dataclass
+class OperationResult:
+    """Latency distribution and throughput of one benchmarked call"""
+
+    iterations: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    mean_ms: float
+    ops_per_sec: float
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of sorted samples"""
+    return samples[max(0, math.ceil(fraction * len(samples)) - 1)]
+
+
+def summarize(samples_ns: List[int]) -> OperationResult:
+    """Result from per-call timings in nanoseconds"""
+    samples = sorted(ns / 1e6 for ns in samples_ns)
+    total_ms = sum(samples)
+    return OperationResult(
+        iterations=len(samples),
+        p50_ms=round(percentile(samples, 0.50), 4),
+        p95_ms=round(percentile(samples, 0.95), 4),
+        p99_ms=round(percentile(samples, 0.99), 4),
+        mean_ms=round(total_ms / len(samples), 4),
+        ops_per_sec=round(len(samples) / (total_ms / 1000), 1) if total_ms else 0.0,
+    )
+
+
+# ════════════════════════════════════════════
+# SEEDED DATABASES
+# ════════════════════════════════════════════
+
+def scale_sizes(posts: int) -> Tuple[int, int]:
+    """(users, threads) generated alongside a number of posts"""
+    return max(100, posts // 100), max(10, posts // 20)
+
+
+def seeded_database(data_dir: Path, scale: str, seed: int = 0,
+                    progress: Callable[[str, int], None] = None) -> Path:
+    """Path of the seeded database for a scale, generating it on first use"""
+    posts = SCALES[scale]
+    path = data_dir / f"storage-{scale}-seed{seed}.db"
+    if path.exists():
+        return path
+
+    data_dir.mkdir(parents=True, exist_ok=True)
+    # Seed under a temporary name so an interrupted run is not mistaken for a finished one
+    partial = path.with_name(path.name + ".partial")
+    for leftover in data_dir.glob(partial.name + "*"):
+        leftover.unlink()
+
+    users, threads = scale_sizes(posts)
+    db = Database(str(partial), view_flush_interval=None)
+    ForumSeeder(db, seed=seed).run(users, threads, posts, categories=8, progress=progress)
+    db.close()
+    partial.rename(path)
+    return path
+
+
+# ════════════════════════════════════════════
+# OPERATIONS
+# ════════════════════════════════════════════
+
+class StorageBenchmark:
+    """Times the benchmarked Database calls with deterministic arguments"""
+
+    def __init__(self, db: Database, seed: int = 0):
+        self.db = db
+        self.rng = random.Random(seed)
+
+        with db._read() as conn:
+            self.max_thread_id = conn.execute("SELECT MAX(id) FROM threads").fetchone()[0]
+            self.category_ids = [row[0] for row in conn.execute("SELECT id FROM categories")]
+            self.max_user_id = conn.execute("SELECT MAX(id) FROM users").fetchone()[0]
+            names = conn.execute(
+                "SELECT username FROM users ORDER BY id LIMIT 1000 OFFSET ?",
+                (max(0, self.max_user_id // 2 - 500),),
+            ).fetchall()
+        self.usernames = [row[0] for row in names]
+        self.created: List[Tuple[int, int]] = []
+
+    def thread_id(self) -> int:
+        return self.rng.randint(1, self.max_thread_id)
+
+    def calls(self) -> Dict[str, Callable[[], object]]:
+        """One zero-argument callable per operation, drawing fresh arguments each call"""
+        db, rng = self.db, self.rng
+
+        def create_post() -> None:
+            thread_id = self.thread_id()
+            post = db.create_post(thread_id, rng.randint(1, self.max_user_id),
+                                  "Benchmark reply with a few words of text.")
+            self.created.append((post.id, thread_id))
+
+        return {
+            "list_threads": lambda: db.list_threads(category_id=rng.choice([None, *self.category_ids])),
+            "list_posts": lambda: db.list_posts(self.thread_id()),
+            "get_thread": lambda: db.get_thread(self.thread_id(), increment_views=False),
+            "create_post": create_post,
+            "get_forum_stats": db.get_forum_stats,
+            "get_user_by_username": lambda: db.get_user_by_username(rng.choice(self.usernames)),
+        }
+
+    def run(self, iterations: int = 1000, warmup: int = 50,
+            operations: Tuple[str, ...] = OPERATIONS) -> Dict[str, OperationResult]:
+        """Time each operation, then remove the posts create_post added"""
+        calls = self.calls()
+        clock = time.perf_counter_ns
+        results = {}
+        try:
+            for name in operations:
+                call = calls[name]
+                for _ in range(warmup):
+                    call()
+                samples = []
+                for _ in range(iterations):
+                    start = clock()
+                    call()
+                    samples.append(clock() - start)
+                results[name] = summarize(samples)
+        finally:
+            self.cleanup()
+        return results
+
+    def cleanup(self) -> None:
+        """Delete benchmark posts and roll their threads' last-post info back
+
+        Delete triggers restore the counters, stats and search index. The
+        last-post info is recomputed from the remaining replies, which is
+        what seeding left there.
+        """
+        if not self.created:
+            return
+        thread_ids = sorted({thread_id for _, thread_id in self.created})
+        with self.db._write() as conn:
+            conn.executemany("DELETE FROM posts WHERE id = ?", [(post_id,) for post_id, _ in self.created])
+            conn.executemany("""
+                UPDATE threads
+                SET last_post_at = COALESCE(last.created_at, threads.created_at),
+                    last_post_user_id = COALESCE(last.user_id, threads.user_id),
+                    updated_at = COALESCE(last.created_at, threads.created_at)
+                FROM (SELECT :id AS thread_id) AS target
+                LEFT JOIN (
+                    SELECT created_at, user_id FROM posts
+                    WHERE thread_id = :id AND is_deleted = 0
+                    ORDER BY created_epoch DESC, id DESC LIMIT 1
+                ) AS last
+                WHERE threads.id = target.thread_id
+            """, [{"id": thread_id} for thread_id in thread_ids])
+        self.created.clear()
+
+
+def run_scale(data_dir: Path, scale: str, iterations: int = 1000, seed: int = 0,
+              progress: Callable[[str, int], None] = None) -> Dict[str, OperationResult]:
+    """Benchmark one scale on its seeded database"""
+    path = seeded_database(data_dir, scale, seed, progress)
+    # No write-behind flusher: background writes would add noise
+    db = Database(str(path), view_flush_interval=None)
+    try:
+        return StorageBenchmark(db, seed).run(iterations)
+    finally:
+        db.close()
+
+
+# ════════════════════════════════════════════
+# BASELINES
+# ════════════════════════════════════════════
+
+def environment() -> Dict[str, str]:
+    """Where a baseline was measured"""
+    return {
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+
+
+def load_baseline(path: Path) -> Optional[Dict]:
+    """Stored baseline, or None when there is none yet"""
+    if not path.exists():
+        return None
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if data.get("version") != BASELINE_VERSION:
+        raise ValueError(f"Unsupported baseline version in {path}: {data.get('version')}")
+    return data
+
+
+def save_baseline(path: Path, results: Dict[str, Dict[str, OperationResult]]) -> None:
+    """Store results as the baseline, keeping other scales already in the file"""
+    data = load_baseline(path) or {"version": BASELINE_VERSION, "scales": {}}
+    data["saved_at"] = datetime.now().isoformat(timespec="seconds")
+    data["environment"] = environment()
+    for scale, operations in results.items():
+        data["scales"][scale] = {name: asdict(result) for name, result in operations.items()}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+
+def compare(results: Dict[str, Dict[str, OperationResult]], baseline: Dict,
+            tolerance: float = 0.25, metric: str = "p95",
+            noise_floor_ms: float = NOISE_FLOOR_MS) -> List[str]:
+    """Regressions against a baseline
+
+    Args:
+        results: {scale: {operation: result}} of this run
+        baseline: load_baseline() data
+        tolerance: Allowed slowdown, as a fraction of the baseline latency
+        metric: Percentile compared (p50, p95 or p99)
+        noise_floor_ms: Absolute slowdown below which nothing counts as a regression
+
+    Returns:
+        One message per regressed operation (empty when none regressed)
+    """
+    field = f"{metric}_ms"
+    regressions = []
+    for scale, operations in results.items():
+        expected = baseline["scales"].get(scale, {})
+        for name, result in operations.items():
+            if name not in expected:
+                continue
+            before = expected[name][field]
+            after = getattr(result, field)
+            if after > before * (1 + tolerance) and after - before > noise_floor_ms:
+                regressions.append(
+                    f"{scale} {name}: {metric} {after:.3f}ms vs baseline {before:.3f}ms "
+                    f"(+{(after / before - 1) * 100:.0f}%, tolerance {tolerance * 100:.0f}%)"
+                )
+    return regressions
+
+
+def format_results(scale: str, operations: Dict[str, OperationResult]) -> List[str]:
+    """Table lines for one scale"""
+    lines = [
+        f"{scale} ({SCALES[scale]:,} posts)",
+        f"  {'operation':<22} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ops/s':>10}",
+    ]
+    for name, r in operations.items():
+        lines.append(f"  {name:<22} {r.p50_ms:>9.3f} {r.p95_ms:>9.3f} {r.p99_ms:>9.3f} {r.ops_per_sec:>10,.0f}")
+    return lines
+
+
+def main() -> None:
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", action="append", choices=list(SCALES), help="Scales to run (default 10k)")
+    parser.add_argument("--iterations", type=int, default=1000, help="Timed calls per operation")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for data and call arguments")
+    parser.add_argument("--data-dir", default=str(DEFAULT_DATA_DIR), help="Seeded databases and baseline")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before failing")
+    parser.add_argument("--metric", choices=PERCENTILES, default="p95", help="Percentile to compare")
+    args = parser.parse_args()
+
+    data_dir = Path(args.data_dir)
+    results = {}
+    for scale in args.scale or ["10k"]:
+        results[scale] = run_scale(data_dir, scale, args.iterations, args.seed)
+        print("\n".join(format_results(scale, results[scale])))
+
+    baseline_path = data_dir / "storage_baseline.json"
+    if args.save_baseline:
+        save_baseline(baseline_path, results)
+        print(f"Baseline saved to {baseline_path}")
+        return
+
+    baseline = load_baseline(baseline_path)
+    regressions = compare(results, baseline, args.tolerance, args.metric) if baseline else []
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -26,6 +26,14 @@ class ConfigManager:
         "markdown_preview": True,
         "ai_enabled": True,
         "ai_model": "qwen2.5-coder:7b",
+        "db_pool_size": 4,
+        "db_pragmas": {},  # e.g. {"synchronous": "FULL", "cache_size": -64000}
+        "db_query_stats": False,  # Record per-query timings for `termforum db-stats`
+        "db_slow_query_ms": 100,
+        "db_maintenance_interval": 300,  # Seconds between background maintenance passes (None disables)
+        "db_maintenance_step_ms": 5,
+        "db_retention_days": None,  # Purge soft-deleted threads and posts after this many days (None keeps them)
+        "db_compress_threshold": 1024,  # Store longer bodies compressed (None disables)
     }
 
     def __init__(self, config_path: Optional[Path] = None):
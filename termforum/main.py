@@ -1,10 +1,17 @@
 """Main entry point for TermForum"""
 
 import click
+import json
+import shutil
+import time
+from datetime import datetime, timedelta
 from pathlib import Path
 from .app import TermForumApp
-from .storage import Database
+from .storage import Database, ConnectionPool, QueryStats, migrate as apply_migrations, plan_migrations
+from .storage.archive import archive_path_for
+from .storage.sharding import shard_directory
 from .utils import glow_available
+from .config import get_config
 
 
 @click.group()
@@ -17,7 +24,8 @@ def cli():
 @cli.command()
 @click.option("--db", default=None, help="Path to database file")
 @click.option("--username", "-u", default=None, help="Login username")
-def run(db, username):
+@click.option("--query-stats", is_flag=True, help="Record query timings for 'termforum db-stats'")
+def run(db, username, query_stats):
     """Run TermForum application"""
 
     # Check if Glow is available
@@ -30,34 +38,66 @@ def run(db, username):
     if db is None:
         db = str(Path.home() / ".termforum" / "forum.db")
 
-    database = Database(db)
+    config = get_config()
+    stats = None
+    if query_stats or config.get("db_query_stats"):
+        stats = QueryStats(
+            slow_ms=config.get("db_slow_query_ms", 100),
+            slow_log=str(Path(db).parent / "slow_queries.log"),
+        )
+
+    database = Database(
+        db,
+        pool_size=config.get("db_pool_size", 4),
+        pragmas=config.get("db_pragmas"),
+        query_stats=stats,
+        maintenance_interval=config.get("db_maintenance_interval", 300),
+        maintenance_step_ms=config.get("db_maintenance_step_ms", 5),
+        retention_days=config.get("db_retention_days"),
+        archive_path=_existing_archive(db),
+        compress_threshold=config.get("db_compress_threshold", 1024),
+    )
 
-    # Handle login/registration
-    if username:
-        user = database.get_user_by_username(username)
-        if not user:
-            click.echo(f"Creating new user: {username}")
-            user = database.create_user(username)
-    else:
-        # Interactive login
-        username = click.prompt("Enter your username", type=str)
-        user = database.get_user_by_username(username)
-
-        if not user:
-            if click.confirm(f"User '{username}' not found. Create new account?"):
+    with database:
+        # Handle login/registration
+        if username:
+            user = database.get_user_by_username(username)
+            if not user:
+                click.echo(f"Creating new user: {username}")
                 user = database.create_user(username)
-            else:
-                click.echo("Login cancelled.")
-                return
+        else:
+            # Interactive login
+            username = click.prompt("Enter your username", type=str)
+            user = database.get_user_by_username(username)
+
+            if not user:
+                if click.confirm(f"User '{username}' not found. Create new account?"):
+                    user = database.create_user(username)
+                else:
+                    click.echo("Login cancelled.")
+                    return
+
+        # Run the app
+        app = TermForumApp(database=database, current_user=user)
+        app.run()
+
+    if stats is not None:
+        stats.dump(str(Path(db).parent / "query_stats.json"))
+
 
-    # Run the app
-    app = TermForumApp(database=database, current_user=user)
-    app.run()
+def _remove_forum_files(db: str):
+    """Delete a database with its archive, shards and WAL sidecar files"""
+    for path in (db, archive_path_for(db)):
+        for name in (path, f"{path}-wal", f"{path}-shm"):
+            Path(name).unlink(missing_ok=True)
+    shutil.rmtree(shard_directory(db), ignore_errors=True)
 
 
 @cli.command()
 @click.option("--db", default=None, help="Path to database file")
-def init(db):
+@click.option("--sharding", default=None,
+              help="Keep threads and posts in shard files: 'category' or 'hash:N'")
+def init(db, sharding):
     """Initialize a new forum database"""
     if db is None:
         db = str(Path.home() / ".termforum" / "forum.db")
@@ -68,20 +108,26 @@ def init(db):
         if not click.confirm(f"Database already exists at {db}. Recreate?"):
             click.echo("Initialization cancelled.")
             return
-        db_path.unlink()
+        _remove_forum_files(db)
 
     click.echo(f"Creating new database at: {db}")
-    database = Database(db)
+    try:
+        database = Database(db, sharding=sharding)
+    except ValueError as e:
+        raise click.ClickException(str(e))
 
-    # Create admin user
-    admin_username = click.prompt("Admin username", default="admin")
-    admin_user = database.create_user(admin_username, is_admin=True)
+    with database:
+        # Create admin user
+        admin_username = click.prompt("Admin username", default="admin")
+        admin_user = database.create_user(admin_username, is_admin=True)
 
-    click.echo(f"✓ Database initialized successfully!")
-    click.echo(f"✓ Admin user created: {admin_username}")
-    click.echo(f"✓ Default categories created")
+        click.echo(f"✓ Database initialized successfully!")
+        click.echo(f"✓ Admin user created: {admin_username}")
+        click.echo(f"✓ Default categories created")
+        if sharding:
+            click.echo(f"✓ Threads and posts sharded by {sharding} under {shard_directory(db)}")
 
-    stats = database.get_forum_stats()
+        stats = database.get_forum_stats()
     click.echo(f"\nForum stats:")
     click.echo(f"  Users: {stats['users']}")
     click.echo(f"  Categories: {stats['categories']}")
@@ -102,8 +148,8 @@ def stats(db):
         click.echo("Run 'termforum init' to create a new database.")
         return
 
-    database = Database(db)
-    stats = database.get_forum_stats()
+    with Database(db) as database:
+        stats = database.get_forum_stats()
 
     click.echo("📊 Forum Statistics")
     click.echo("=" * 40)
@@ -114,6 +160,538 @@ def stats(db):
     click.echo(f"📝 Total:      {stats['total_content']}")
 
 
+@cli.command("reconcile-stats")
+@click.option("--db", default=None, help="Path to database file")
+def reconcile_stats(db):
+    """Recompute forum statistics from scratch"""
+    if db is None:
+        db = str(Path.home() / ".termforum" / "forum.db")
+
+    db_path = Path(db)
+    if not db_path.exists():
+        click.echo(f"Database not found at: {db}")
+        click.echo("Run 'termforum init' to create a new database.")
+        return
+
+    with Database(db, archive_path=_existing_archive(db)) as database:
+        before, after = database.reconcile_forum_stats()
+
+    click.echo("📊 Forum statistics reconciled")
+    for key in ("users", "categories", "threads", "posts"):
+        drift = after[key] - before[key]
+        note = f" (drift {drift:+d})" if drift else ""
+        click.echo(f"  {key.capitalize():<11} {after[key]}{note}")
+
+
+@cli.command("reconcile-counters")
+@click.option("--db", default=None, help="Path to database file")
+def reconcile_counters(db):
+    """Repair drift in user, category and thread counters"""
+    if db is None:
+        db = str(Path.home() / ".termforum" / "forum.db")
+
+    db_path = Path(db)
+    if not db_path.exists():
+        click.echo(f"Database not found at: {db}")
+        click.echo("Run 'termforum init' to create a new database.")
+        return
+
+    with Database(db, archive_path=_existing_archive(db)) as database:
+        repaired = database.reconcile_counters()
+
+    click.echo("🔧 Counters reconciled")
+    for name, rows in repaired.items():
+        click.echo(f"  {name:<26} {rows} row(s) repaired")
+
+
+@cli.command()
+@click.option("--db", default=None, help="Path to database file")
+def reindex(db):
+    """Rebuild the full-text search index"""
+    if db is None:
+        db = str(Path.home() / ".termforum" / "forum.db")
+
+    db_path = Path(db)
+    if not db_path.exists():
+        click.echo(f"Database not found at: {db}")
+        click.echo("Run 'termforum init' to create a new database.")
+        return
+
+    click.echo("🔎 Rebuilding search index...")
+    with Database(db) as database:
+        database.rebuild_search_index()
+    click.echo("✓ Search index rebuilt")
+
+
+def _existing_archive(db: str):
+    """The database's archive file if 'termforum archive' has created one"""
+    archive = archive_path_for(db)
+    return archive if Path(archive).exists() else None
+
+
+@cli.command()
+@click.option("--db", default=None, help="Path to database file")
+@click.option("--older-than-days", default=365.0, help="Archive threads with no posts for this many days")
+@click.option("--chunk-threads", default=100, help="Threads moved per chunk")
+@click.option("--chunk-posts", default=5000, help="Soft cap on the posts moved per chunk")
+@click.option("--max-threads", default=None, type=int, help="Stop after this many threads")
+@click.option("--pause", default=0.01, help="Seconds between chunks, letting other writers in")
+def archive(db, older_than_days, chunk_threads, chunk_posts, max_threads, pause):
+    """Move inactive threads and their posts into the archive database"""
+    if db is None:
+        db = str(Path.home() / ".termforum" / "forum.db")
+
+    db_path = Path(db)
+    if not db_path.exists():
+        click.echo(f"Database not found at: {db}")
+        click.echo("Run 'termforum init' to create a new database.")
+        return
+
+    archive_path = archive_path_for(db)
+    try:
+        database = Database(db, archive_path=archive_path)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    started = time.perf_counter()
+
+    def progress(threads, posts):
+        rate = (threads + posts) / max(time.perf_counter() - started, 1e-9)
+        click.echo(f"\r  {threads:>10,} threads  {posts:>12,} posts  ({rate:,.0f} rows/s)", nl=False)
+
+    click.echo(f"🧊 Archiving threads inactive since {cutoff:%Y-%m-%d} → {archive_path}")
+    with database:
+        result = database.archive(cutoff, chunk_threads=chunk_threads, chunk_posts=chunk_posts,
+                                  max_threads=max_threads, pause=pause, progress=progress)
+        counts = database.archive_stats()
+
+    click.echo("\r" + " " * 60 + "\r", nl=False)
+    click.echo(f"✓ Archived {result.threads:,} threads and {result.posts:,} posts "
+               f"in {result.chunks} chunk(s), {result.seconds:.1f}s")
+    click.echo(f"  Hot:     {counts['main_threads']:>10,} threads {counts['main_posts']:>12,} posts")
+    click.echo(f"  Archive: {counts['archive_threads']:>10,} threads {counts['archive_posts']:>12,} posts")
+    if result.threads:
+        click.echo("  Run 'termforum maintain' to return the freed pages to the filesystem.")
+
+
+@cli.command()
+@click.option("--db", default=None, help="Path to database file")
+@click.option("--threshold", default=None, type=int,
+              help="Compress bodies longer than this many characters (default from config)")
+@click.option("--batch-size", default=500, help="Rows examined per transaction")
+@click.option("--pause", default=0.01, help="Seconds between batches, letting other writers in")
+def compact(db, threshold, batch_size, pause):
+    """Compress existing thread and post bodies and report the space saved"""
+    if db is None:
+        db = str(Path.home() / ".termforum" / "forum.db")
+
+    db_path = Path(db)
+    if not db_path.exists():
+        click.echo(f"Database not found at: {db}")
+        click.echo("Run 'termforum init' to create a new database.")
+        return
+
+    if threshold is None:
+        threshold = get_config().get("db_compress_threshold", 1024)
+    started = time.perf_counter()
+
+    def progress(totals):
+        rate = totals.rows / max(time.perf_counter() - started, 1e-9)
+        click.echo(f"\r  {totals.rows:>12,} bodies  {totals.saved / 1_000_000:>10,.1f} MB saved  "
+                   f"({rate:,.0f} rows/s)", nl=False)
+
+    click.echo(f"🗜  Compacting bodies longer than {threshold:,} characters" if threshold is not None
+               else "🗜  Decompressing every body")
+    with Database(db, archive_path=_existing_archive(db), compress_threshold=threshold) as database:
+        result = database.compact(batch_size=batch_size, pause=pause, progress=progress)
+
+    click.echo("\r" + " " * 70 + "\r", nl=False)
+    click.echo(f"✓ Rewrote {result.rows:,} bodies in {result.seconds:.1f}s")
+    click.echo(f"  Before: {result.bytes_before / 1_000_000:>10,.1f} MB")
+    click.echo(f"  After:  {result.bytes_after / 1_000_000:>10,.1f} MB")
+    click.echo(f"  Saved:  {result.saved / 1_000_000:>10,.1f} MB")
+    if result.saved > 0:
+        click.echo("  Run 'termforum maintain' to return the freed pages to the filesystem.")
+
+
+@cli.command()
+@click.option("--db", default=None, help="Path to database file")
+@click.option("--retention-days", default=None, type=float,
+              help="Purge soft-deleted rows older than this many days (default from config; no purge if unset)")
+@click.option("--step-ms", default=None, type=float, help="Time budget of each step (default from config)")
+@click.option("--pause", default=0.01, help="Seconds between passes, letting other writers in")
+@click.option("--max-passes", default=10_000, help="Stop after this many passes even if work remains")
+@click.option("--enable-auto-vacuum", is_flag=True,
+              help="Switch to incremental auto-vacuum first (one full VACUUM; blocks writers)")
+def maintain(db, retention_days, step_ms, pause, max_passes, enable_auto_vacuum):
+    """Analyze, vacuum and purge old soft-deleted rows until nothing is left to do"""
+    if db is None:
+        db = str(Path.home() / ".termforum" / "forum.db")
+
+    db_path = Path(db)
+    if not db_path.exists():
+        click.echo(f"Database not found at: {db}")
+        click.echo("Run 'termforum init' to create a new database.")
+        return
+
+    config = get_config()
+    if retention_days is None:
+        retention_days = config.get("db_retention_days")
+    database = Database(
+        db,
+        retention_days=retention_days,
+        maintenance_step_ms=step_ms if step_ms is not None else config.get("db_maintenance_step_ms", 5),
+    )
+
+    with database:
+        if enable_auto_vacuum:
+            click.echo("🧹 Rewriting the database for incremental auto-vacuum...")
+            if database.enable_incremental_vacuum():
+                click.echo("✓ Incremental auto-vacuum enabled")
+            else:
+                click.echo("✓ Incremental auto-vacuum was already enabled")
+
+        passes = analyzed = vacuumed = threads = posts = changes = interrupted = 0
+        started = time.perf_counter()
+        while True:
+            report = database.maintain()
+            passes += 1
+            analyzed += len(report.analyzed)
+            vacuumed += report.vacuumed_pages
+            threads += report.purged_threads
+            posts += report.purged_posts
+            changes += report.pruned_changes
+            interrupted += len(report.interrupted)
+            if report.idle or passes >= max_passes:
+                break
+            time.sleep(pause)
+
+    click.echo(f"🔧 Maintenance finished in {passes} pass(es), {time.perf_counter() - started:.2f}s")
+    click.echo(f"  Indexes analyzed   {analyzed}")
+    click.echo(f"  Pages vacuumed     {vacuumed}")
+    click.echo(f"  Threads purged     {threads}")
+    click.echo(f"  Posts purged       {posts}")
+    if retention_days is None:
+        click.echo("  (purging is off: set db_retention_days in the config or pass --retention-days)")
+    click.echo(f"  Changes pruned     {changes}")
+    click.echo(f"  Steps over budget  {interrupted} (resumed on the next pass)")
+
+
+@cli.command()
+@click.option("--db", default=None, help="Path to database file")
+@click.option("--dry-run", is_flag=True, help="Show the plan without changing anything")
+def migrate(db, dry_run):
+    """Apply pending schema migrations"""
+    if db is None:
+        db = str(Path.home() / ".termforum" / "forum.db")
+
+    db_path = Path(db)
+    if not db_path.exists():
+        click.echo(f"Database not found at: {db}")
+        click.echo("Run 'termforum init' to create a new database.")
+        return
+
+    version, plan = plan_migrations(db)
+    if not plan:
+        click.echo(f"✓ Schema is up to date (version {version})")
+        return
+
+    click.echo(f"🗄️  Schema version {version} → {plan[-1][0].version}")
+    for migration, rows in plan:
+        click.echo(f"  v{migration.version:<3} {migration.name:<44} ~{rows:,} rows")
+
+    if dry_run:
+        click.echo("\nDry run: nothing was changed.")
+        return
+
+    click.echo()
+    pool = ConnectionPool(db)
+    try:
+        apply_migrations(pool, progress=lambda result: click.echo(
+            f"✓ v{result.version:<3} {result.name:<44} {result.seconds:.2f}s"
+        ))
+    finally:
+        pool.close()
+
+
+@cli.command()
+@click.option("--db", default=None, help="Path to database file (created if missing)")
+@click.option("--users", default=1_000, help="Users to create")
+@click.option("--threads", default=10_000, help="Threads to create")
+@click.option("--posts", default=100_000, help="Replies to create")
+@click.option("--categories", default=0, help="Minimum number of categories")
+@click.option("--seed", default=0, help="Random seed (same seed and sizes = same forum)")
+@click.option("--zipf", default=0.8, help="Zipf exponent for authorship and replies per thread")
+@click.option("--max-depth", default=50, help="Deepest reply nesting")
+@click.option("--batch-size", default=20_000, help="Rows per insert transaction")
+def seed(db, users, threads, posts, categories, seed, zipf, max_depth, batch_size):
+    """Generate a synthetic forum for benchmarking"""
+    from .seed import ForumSeeder
+
+    if db is None:
+        db = str(Path.home() / ".termforum" / "forum.db")
+    if users < 1:
+        raise click.BadParameter("at least one user is needed", param_hint="--users")
+
+    database = Database(db, archive_path=_existing_archive(db))
+    seeder = ForumSeeder(database, seed=seed, zipf=zipf, max_depth=max_depth, batch_size=batch_size)
+    started = time.perf_counter()
+
+    def progress(table, rows):
+        rate = rows / max(time.perf_counter() - started, 1e-9)
+        click.echo(f"\r  {table:<8} {rows:>12,} rows  ({rate:,.0f} rows/s)", nl=False)
+
+    click.echo(f"🌱 Seeding {db} (seed {seed})")
+    with database:
+        try:
+            result = seeder.run(users, threads, posts, categories=categories, progress=progress)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        stats = database.get_forum_stats()
+
+    click.echo("\r" + " " * 60 + "\r", nl=False)
+    click.echo(f"✓ Created {result.users:,} users, {result.threads:,} threads and "
+               f"{result.posts:,} posts in {result.seconds:.1f}s "
+               f"({(result.users + result.threads + result.posts) / result.seconds:,.0f} rows/s)")
+    click.echo(f"  Deepest reply: {result.max_depth}  Categories: {result.categories}")
+    click.echo(f"  Forum now has {stats['users']:,} users, {stats['threads']:,} threads, "
+               f"{stats['posts']:,} posts")
+
+
+@cli.command()
+@click.option("--db", default=None, help="Path to database file")
+@click.option("--to", "directory", default=None, help="Snapshot directory (default ~/.termforum/backups)")
+@click.option("--keep", default=7, help="Number of snapshots to retain")
+@click.option("--step-pages", default=1024, help="Pages copied per step")
+@click.option("--step-sleep", default=0.01, help="Seconds to pause between steps")
+@click.option("--verify", is_flag=True, help="Run integrity_check on the snapshot in a background process")
+def backup(db, directory, keep, step_pages, step_sleep, verify):
+    """Snapshot the database, with its archive or shards, while it is in use"""
+    from .storage.backup import read_verify_report, snapshot, verify_in_background
+
+    if db is None:
+        db = str(Path.home() / ".termforum" / "forum.db")
+    if directory is None:
+        directory = str(Path.home() / ".termforum" / "backups")
+
+    db_path = Path(db)
+    if not db_path.exists():
+        click.echo(f"Database not found at: {db}")
+        click.echo("Run 'termforum init' to create a new database.")
+        return
+    if keep < 1:
+        raise click.BadParameter("must keep at least one snapshot", param_hint="--keep")
+
+    def progress(copied, total):
+        click.echo(f"\r  {copied:>10,} / {total:,} pages", nl=False)
+
+    click.echo(f"💾 Backing up {db} → {directory}")
+    result = snapshot(db, directory, keep=keep, step_pages=step_pages, step_sleep=step_sleep,
+                      progress=progress)
+    click.echo("\r" + " " * 40 + "\r", nl=False)
+    click.echo(f"✓ {result.path.name}: {result.bytes / 1_000_000:,.1f} MB, {result.pages:,} pages "
+               f"in {result.steps} steps, {result.seconds:.1f}s")
+    for companion in result.companions:
+        click.echo(f"  + {companion.relative_to(result.path.parent)}")
+
+    if verify:
+        click.echo("🔍 Verifying snapshot in a background process...")
+        process = verify_in_background(str(result.path))
+        process.join()
+        report = read_verify_report(str(result.path))
+        if report is None or not report["ok"]:
+            for message in (report or {}).get("messages", ["verification did not finish"])[:10]:
+                click.echo(f"  ✗ {message}")
+            raise SystemExit(1)
+        click.echo(f"✓ integrity_check ok ({report['seconds']:.1f}s)")
+
+
+def _transfer_progress(err: bool):
+    """Progress callback printing rows and rate per table"""
+    started = time.perf_counter()
+
+    def progress(table, rows):
+        rate = rows / max(time.perf_counter() - started, 1e-9)
+        click.echo(f"\r  {table:<10} {rows:>12,} rows  ({rate:,.0f} rows/s)", nl=False, err=err)
+
+    return progress
+
+
+@cli.command()
+@click.argument("target")
+@click.option("--db", default=None, help="Path to database file")
+@click.option("--compress", type=click.Choice(["gzip", "zstd", "none"]), default=None,
+              help="Compression (default: from the file name, e.g. .jsonl.gz or .jsonl.zst)")
+@click.option("--batch-size", default=5000, help="Rows per read")
+def export(target, db, compress, batch_size):
+    """Write the forum to a JSONL dump (TARGET may be - for stdout)"""
+    from .storage.transfer import export_forum
+
+    if db is None:
+        db = str(Path.home() / ".termforum" / "forum.db")
+
+    db_path = Path(db)
+    if not db_path.exists():
+        click.echo(f"Database not found at: {db}")
+        click.echo("Run 'termforum init' to create a new database.")
+        return
+
+    # With the dump on stdout, messages go to stderr
+    err = target == "-"
+    click.echo(f"📤 Exporting {db} → {target}", err=err)
+    try:
+        result = export_forum(db, target, compression=None if compress == "none" else compress,
+                              batch_size=batch_size, archive_path=_existing_archive(db),
+                              progress=_transfer_progress(err))
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    click.echo("\r" + " " * 60 + "\r", nl=False, err=err)
+    size = f", {result.bytes / 1_000_000:,.1f} MB" if result.bytes else ""
+    click.echo(f"✓ Exported {result.rows.get('users', 0):,} users, {result.rows.get('categories', 0):,} "
+               f"categories, {result.rows.get('threads', 0):,} threads and {result.rows.get('posts', 0):,} "
+               f"posts in {result.seconds:.1f}s ({result.total / max(result.seconds, 1e-9):,.0f} rows/s)"
+               f"{size}", err=err)
+
+
+@cli.command("import")
+@click.argument("source")
+@click.option("--db", default=None, help="Path to database file (created if missing, must be empty)")
+@click.option("--compress", type=click.Choice(["gzip", "zstd", "none"]), default=None,
+              help="Compression (default: detected from the content)")
+@click.option("--batch-size", default=5000, help="Rows per insert transaction")
+def import_dump(source, db, compress, batch_size):
+    """Load a JSONL dump into an empty database (SOURCE may be - for stdin)"""
+    from .storage.transfer import import_forum
+
+    if db is None:
+        db = str(Path.home() / ".termforum" / "forum.db")
+    if source != "-" and not Path(source).exists():
+        raise click.BadParameter(f"no such file: {source}", param_hint="SOURCE")
+
+    Path(db).parent.mkdir(parents=True, exist_ok=True)
+    database = Database(db)
+    click.echo(f"📥 Importing {source} → {db}")
+    try:
+        result = import_forum(database, source, compression=None if compress == "none" else compress,
+                              batch_size=batch_size, progress=_transfer_progress(False))
+        stats = database.get_forum_stats()
+    except ValueError as e:
+        click.echo()
+        raise click.ClickException(str(e))
+    finally:
+        database.close()
+
+    click.echo("\r" + " " * 60 + "\r", nl=False)
+    click.echo(f"✓ Imported {result.total:,} rows in {result.seconds:.1f}s "
+               f"({result.total / max(result.seconds, 1e-9):,.0f} rows/s)")
+    click.echo(f"  Forum now has {stats['users']:,} users, {stats['threads']:,} threads, "
+               f"{stats['posts']:,} posts")
+
+
+@cli.command("db-stats")
+@click.option("--db", default=None, help="Path to database file")
+@click.option("--top", default=15, help="Number of queries to show")
+@click.option("--json", "as_json", is_flag=True, help="Print the raw JSON dump")
+def db_stats(db, top, as_json):
+    """Show query timings recorded by 'termforum run --query-stats'"""
+    if db is None:
+        db = str(Path.home() / ".termforum" / "forum.db")
+
+    stats_path = Path(db).parent / "query_stats.json"
+    if not stats_path.exists():
+        click.echo(f"No query stats found at: {stats_path}")
+        click.echo("Run 'termforum run --query-stats' (or set \"db_query_stats\": true in config.json).")
+        return
+
+    data = json.loads(stats_path.read_text(encoding="utf-8"))
+    if as_json:
+        click.echo(json.dumps(data, indent=2, ensure_ascii=False))
+        return
+
+    queries = data["queries"]
+    click.echo(f"⏱️  Query statistics (session started {data['started_at']}, slow > {data['slow_ms']}ms)")
+    click.echo("=" * 92)
+    click.echo(f"{'query':<32} {'calls':>7} {'total ms':>10} {'mean':>8} {'p95':>7} {'p99':>7} {'max':>8} {'slow':>5}")
+    for query in queries[:top]:
+        click.echo(
+            f"{query['name'][:32]:<32} {query['calls']:>7} {query['total_ms']:>10.1f} "
+            f"{query['mean_ms']:>8.2f} {query['p95_ms'] or 0:>7g} {query['p99_ms'] or 0:>7g} "
+            f"{query['max_ms']:>8.1f} {query['slow_calls']:>5}"
+        )
+    if len(queries) > top:
+        click.echo(f"... {len(queries) - top} more (use --top or --json)")
+
+    planned = [query for query in queries if query["plan"]]
+    if planned:
+        click.echo("\n🐢 Query plans captured on first slow call")
+        for query in planned:
+            click.echo(f"  {query['name']}: {query['sql'][:80]}")
+            for step in query["plan"]:
+                click.echo(f"    └ {step}")
+
+    slow_log = Path(db).parent / "slow_queries.log"
+    if slow_log.exists():
+        click.echo(f"\nSlow-query log: {slow_log}")
+
+
+@cli.group()
+def bench():
+    """Run performance benchmarks"""
+    pass
+
+
+@bench.command("storage")
+@click.option("--scale", "scales", multiple=True, default=("10k",),
+              type=click.Choice(["10k", "1m", "10m"]), help="Database scale(s) to run (repeatable)")
+@click.option("--iterations", default=1000, help="Timed calls per operation")
+@click.option("--seed", default=0, help="Seed for the generated data and call arguments")
+@click.option("--data-dir", default=None, help="Seeded databases and baseline (default ~/.termforum/bench)")
+@click.option("--save-baseline", is_flag=True, help="Store this run as the baseline")
+@click.option("--tolerance", default=0.25, help="Allowed slowdown vs the baseline (0.25 = 25%)")
+@click.option("--metric", default="p95", type=click.Choice(["p50", "p95", "p99"]), help="Percentile compared")
+@click.option("--json", "as_json", is_flag=True, help="Print results as JSON")
+def bench_storage(scales, iterations, seed, data_dir, save_baseline, tolerance, metric, as_json):
+    """Benchmark storage calls and compare against the baseline"""
+    from dataclasses import asdict
+    from .benchmarks.storage import (DEFAULT_DATA_DIR, compare, format_results, load_baseline,
+                                     run_scale, save_baseline as store_baseline)
+
+    data_dir = Path(data_dir) if data_dir else DEFAULT_DATA_DIR
+
+    def progress(table, rows):
+        click.echo(f"\r  seeding {table:<8} {rows:>12,} rows", nl=False, err=True)
+
+    results = {}
+    for scale in scales:
+        results[scale] = run_scale(data_dir, scale, iterations, seed, progress)
+        click.echo("\r" + " " * 50 + "\r", nl=False, err=True)
+        if not as_json:
+            click.echo("\n".join(format_results(scale, results[scale])))
+
+    if as_json:
+        click.echo(json.dumps({scale: {name: asdict(result) for name, result in operations.items()}
+                               for scale, operations in results.items()}, indent=2))
+
+    baseline_path = data_dir / "storage_baseline.json"
+    if save_baseline:
+        store_baseline(baseline_path, results)
+        click.echo(f"✓ Baseline saved to {baseline_path}", err=as_json)
+        return
+
+    baseline = load_baseline(baseline_path)
+    if baseline is None:
+        click.echo(f"No baseline at {baseline_path}; run with --save-baseline to create one.", err=as_json)
+        return
+
+    regressions = compare(results, baseline, tolerance, metric)
+    if regressions:
+        for message in regressions:
+            click.echo(f"✗ {message}", err=True)
+        raise SystemExit(1)
+    click.echo(f"✓ No {metric} regressions beyond {tolerance:.0%} of the baseline", err=as_json)
+
+
 def main():
     """Main entry point"""
     cli()
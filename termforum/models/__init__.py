@@ -3,6 +3,10 @@
 from .user import User
 from .category import Category
 from .thread import Thread
+from .thread_summary import ThreadSummary
 from .post import Post
+from .search_result import SearchResult
+from .change import Change
+from .rows import RowModel, PostRow
 
-__all__ = ["User", "Category", "Thread", "Post"]
+__all__ = ["User", "Category", "Thread", "ThreadSummary", "Post", "SearchResult", "Change", "RowModel", "PostRow"]
@@ -0,0 +1,52 @@
+"""Stored form of thread and post bodies
+
+Bodies longer than a threshold are stored compressed, as a BLOB made of
+one codec marker byte followed by the compressed UTF-8 text. Shorter
+bodies stay TEXT, and so do bodies that would not shrink. Models keep
+the stored value in `content` and decode it only when the text is
+needed (`text`, `display_content`). SQL reads them through the `body()`
+function that storage.register_functions() defines.
+"""
+
+import zlib
+from typing import Union
+
+
+# Codec marker: first byte of a compressed body
+ZLIB = 0x01
+
+# Bodies at most this many characters long are never compressed
+DEFAULT_COMPRESS_THRESHOLD = 1024
+
+Body = Union[str, bytes]
+
+
+def encode_body(text: str, threshold: int = DEFAULT_COMPRESS_THRESHOLD) -> Body:
+    """Stored form of a body: compressed above threshold characters when that saves space
+
+    The compressed size must also stay below the character count, so the
+    stored value never exceeds the column's length CHECK.
+    """
+    if threshold is None or len(text) <= threshold:
+        return text
+    compressed = bytes((ZLIB,)) + zlib.compress(text.encode("utf-8"), 6)
+    return compressed if len(compressed) < len(text) else text
+
+
+def decode_body(value: Body) -> str:
+    """Text of a stored body
+
+    Raises:
+        ValueError: If a compressed body has an unknown codec marker
+    """
+    if not isinstance(value, (bytes, bytearray, memoryview)):
+        return value
+    data = bytes(value)
+    if data[:1] == bytes((ZLIB,)):
+        return zlib.decompress(data[1:]).decode("utf-8")
+    raise ValueError(f"Unknown body codec marker: {data[:1]!r}")
+
+
+def stored_size(value: Body) -> int:
+    """Bytes a stored body takes up (UTF-8 for text)"""
+    return len(value.encode("utf-8")) if isinstance(value, str) else len(value)
@@ -5,6 +5,8 @@ from datetime import datetime
 from typing import Optional
 from slugify import slugify
 
+from .timestamp import LazyTimestamp, stored_timestamp
+
 
 @dataclass
 class Category:
@@ -19,13 +21,13 @@ class Category:
     position: int = 0
     threads_count: int = 0
     posts_count: int = 0
-    created_at: datetime = None
+    created_at: datetime = LazyTimestamp()
 
     def __post_init__(self):
-        """Generate slug and set timestamp"""
+        """Generate slug and set timestamp (a loaded one stays undecoded)"""
         if not self.slug:
             self.slug = slugify(self.name)
-        if self.created_at is None:
+        if stored_timestamp(self, "created_at") is None:
             self.created_at = datetime.now()
 
     @property
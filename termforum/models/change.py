@@ -0,0 +1,52 @@
+"""Change log entry model"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+
+@dataclass
+class Change:
+    """One row of the change log: something happened to a user, category, thread or post"""
+
+    seq: int
+    entity: str  # "user", "category", "thread", "post", or "forum" for reload
+    entity_id: int
+    op: str  # "insert", "update", "delete" or "reload"
+    parent_id: Optional[int] = None  # category of a thread, thread of a post
+    created_at: datetime = None
+
+    @property
+    def is_reload(self) -> bool:
+        """Check if readers should drop their state and re-query everything
+
+        Emitted after a bulk load, and when a reader fell so far behind that
+        the changes it missed were already pruned.
+        """
+        return self.op == "reload"
+
+    @property
+    def thread_id(self) -> Optional[int]:
+        """Thread this change touches, if any"""
+        if self.entity == "thread":
+            return self.entity_id
+        if self.entity == "post":
+            return self.parent_id
+        return None
+
+    def to_dict(self) -> dict:
+        """Convert to dictionary"""
+        return {
+            "seq": self.seq,
+            "entity": self.entity,
+            "entity_id": self.entity_id,
+            "op": self.op,
+            "parent_id": self.parent_id,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
+
+    def __str__(self) -> str:
+        return f"Change(#{self.seq} {self.op} {self.entity}:{self.entity_id})"
+
+    def __repr__(self) -> str:
+        return self.__str__()
@@ -4,6 +4,8 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional
 
+from .body import Body, decode_body
+
 
 @dataclass
 class Post:
@@ -12,7 +14,7 @@ class Post:
     id: int
     thread_id: int
     user_id: int
-    content: str
+    content: Body  # Stored form; see text
     parent_post_id: Optional[int] = None
     created_at: datetime = None
     updated_at: datetime = None
@@ -21,6 +23,7 @@ class Post:
     is_deleted: bool = False
     is_edited: bool = False
     edit_reason: Optional[str] = None
+    depth: int = 0  # Nesting level in the reply tree
 
     # Additional fields (populated by joins)
     user_name: Optional[str] = None
@@ -44,12 +47,17 @@ class Post:
         """Check if this is a reply to another post"""
         return self.parent_post_id is not None
 
+    @property
+    def text(self) -> str:
+        """Body text (decompressed on access)"""
+        return decode_body(self.content)
+
     @property
     def display_content(self) -> str:
         """Content with deleted indicator"""
         if self.is_deleted:
             return "*[This post has been deleted]*"
-        return self.content
+        return self.text
 
     def to_dict(self) -> dict:
         """Convert to dictionary"""
@@ -57,7 +65,7 @@ class Post:
             "id": self.id,
             "thread_id": self.thread_id,
             "user_id": self.user_id,
-            "content": self.content,
+            "content": self.text,
             "parent_post_id": self.parent_post_id,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
@@ -78,7 +86,8 @@ class Post:
         return cls(**data)
 
     def __str__(self) -> str:
-        preview = self.content[:50] + "..." if len(self.content) > 50 else self.content
+        text = self.text
+        preview = text[:50] + "..." if len(text) > 50 else text
         return f"Post(id={self.id}, score={self.score}, content='{preview}')"
 
     def __repr__(self) -> str:
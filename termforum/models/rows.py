@@ -0,0 +1,115 @@
+"""Read-only, tuple-backed row models
+
+The dataclass models carry a per-instance __dict__ and run
+__post_init__ (slugify(), timestamp defaults), even when the values came
+straight from the database. Row models are plain tuple subclasses with
+no __dict__: construction is a single tuple copy. In both, timestamps
+loaded as integer epoch seconds become datetimes only when the attribute
+is read (see timestamp.py).
+
+Use them for large read-only loads (e.g. rendering a huge thread); use
+the dataclass models when objects need to be built or modified. Only
+posts have a row model: users and categories are few and cached, and
+thread lists already use the content-free ThreadSummary.
+"""
+
+from datetime import datetime, timedelta
+from operator import itemgetter
+from sys import intern
+from typing import Any, Dict, FrozenSet, Iterable, List, Sequence, Tuple
+
+from .body import decode_body
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _timestamp(index: int) -> property:
+    """Property converting an epoch-seconds column to a naive UTC datetime on access"""
+    def getter(self: tuple) -> datetime:
+        value = self[index]
+        return _EPOCH + timedelta(seconds=value) if value is not None else None
+    return property(getter)
+
+
+def _flag(index: int) -> property:
+    """Property exposing an integer column as bool"""
+    return property(lambda self: bool(self[index]))
+
+
+class RowModel(tuple):
+    """Base class: FIELDS names the tuple positions, in SELECT order"""
+
+    __slots__ = ()
+
+    FIELDS: Tuple[str, ...] = ()
+    TIMESTAMPS: FrozenSet[str] = frozenset()
+    FLAGS: FrozenSet[str] = frozenset()
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        for index, name in enumerate(cls.FIELDS):
+            if name in cls.TIMESTAMPS:
+                setattr(cls, name, _timestamp(index))
+            elif name in cls.FLAGS:
+                setattr(cls, name, _flag(index))
+            else:
+                setattr(cls, name, property(itemgetter(index)))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary (timestamps stay epoch seconds)"""
+        return dict(zip(self.FIELDS, self))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(id={self[0]})"
+
+
+class PostRow(RowModel):
+    """Read-only post row; same attributes as Post"""
+
+    __slots__ = ()
+
+    FIELDS = (
+        "id", "thread_id", "user_id", "content", "parent_post_id",
+        "created_at", "updated_at", "upvotes", "downvotes",
+        "is_deleted", "is_edited", "edit_reason", "depth",
+        "user_name", "user_avatar", "user_reputation",
+    )
+    TIMESTAMPS = frozenset({"created_at", "updated_at"})
+    FLAGS = frozenset({"is_deleted", "is_edited"})
+
+    @classmethod
+    def from_tuples(cls, rows: Iterable[Sequence[Any]]) -> List["PostRow"]:
+        """Build rows from plain tuples in FIELDS order
+
+        Extra trailing columns are dropped. Author name and avatar repeat on
+        every post, so they are interned to keep one copy per author (a
+        NULL avatar stays None).
+        """
+        new = tuple.__new__
+        return [
+            new(cls, (*row[:13], intern(row[13]), row[14] and intern(row[14]), row[15]))
+            for row in rows
+        ]
+
+    @property
+    def score(self) -> int:
+        """Net vote score"""
+        return self.upvotes - self.downvotes
+
+    @property
+    def is_reply(self) -> bool:
+        """Check if this is a reply to another post"""
+        return self.parent_post_id is not None
+
+    @property
+    def text(self) -> str:
+        """Body text (decompressed on access)"""
+        return decode_body(self.content)
+
+    @property
+    def display_content(self) -> str:
+        """Content with deleted indicator"""
+        if self.is_deleted:
+            return "*[This post has been deleted]*"
+        return self.text
@@ -0,0 +1,43 @@
+"""Search result model"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+
+@dataclass
+class SearchResult:
+    """A single full-text search hit (thread or post)"""
+
+    kind: str  # "thread" or "post"
+    id: int
+    thread_id: int
+    thread_title: str
+    snippet: str
+    rank: float
+    user_name: Optional[str] = None
+    created_at: datetime = None
+
+    @property
+    def is_thread(self) -> bool:
+        """Check if the hit is a thread's opening post"""
+        return self.kind == "thread"
+
+    def to_dict(self) -> dict:
+        """Convert to dictionary"""
+        return {
+            "kind": self.kind,
+            "id": self.id,
+            "thread_id": self.thread_id,
+            "thread_title": self.thread_title,
+            "snippet": self.snippet,
+            "rank": self.rank,
+            "user_name": self.user_name,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
+
+    def __str__(self) -> str:
+        return f"SearchResult({self.kind}:{self.id}, rank={self.rank:.3f})"
+
+    def __repr__(self) -> str:
+        return self.__str__()
@@ -5,6 +5,9 @@ from datetime import datetime
 from typing import Optional
 from slugify import slugify
 
+from .body import Body, decode_body
+from .timestamp import LazyTimestamp, stored_timestamp
+
 
 @dataclass
 class Thread:
@@ -15,9 +18,9 @@ class Thread:
     slug: str = ""
     category_id: int = 0
     user_id: int = 0
-    content: str = ""
-    created_at: datetime = None
-    updated_at: datetime = None
+    content: Body = ""  # Stored form; see text
+    created_at: datetime = LazyTimestamp()
+    updated_at: datetime = LazyTimestamp()
     view_count: int = 0
     posts_count: int = 1
     upvotes: int = 0
@@ -26,7 +29,7 @@ class Thread:
     is_locked: bool = False
     is_deleted: bool = False
     last_post_user_id: Optional[int] = None
-    last_post_at: datetime = None
+    last_post_at: datetime = LazyTimestamp()
 
     # Additional fields (populated by joins)
     category_name: Optional[str] = None
@@ -35,15 +38,15 @@ class Thread:
     user_avatar: Optional[str] = None
 
     def __post_init__(self):
-        """Generate slug and set timestamps"""
+        """Generate slug and set timestamps (loaded ones stay undecoded)"""
         if not self.slug:
             self.slug = slugify(self.title)
-        if self.created_at is None:
+        if stored_timestamp(self, "created_at") is None:
             self.created_at = datetime.now()
-        if self.updated_at is None:
+        if stored_timestamp(self, "updated_at") is None:
             self.updated_at = datetime.now()
-        if self.last_post_at is None:
-            self.last_post_at = self.created_at
+        if stored_timestamp(self, "last_post_at") is None:
+            self.last_post_at = stored_timestamp(self, "created_at")
 
     @property
     def score(self) -> int:
@@ -60,6 +63,18 @@ class Thread:
         """Check if thread is active (not locked/deleted)"""
         return not (self.is_locked or self.is_deleted)
 
+    @property
+    def text(self) -> str:
+        """Body text (decompressed on access)"""
+        return decode_body(self.content)
+
+    @property
+    def display_content(self) -> str:
+        """Body text with deleted indicator"""
+        if self.is_deleted:
+            return "*[This thread has been deleted]*"
+        return self.text
+
     @property
     def display_title(self) -> str:
         """Title with status indicators"""
@@ -78,7 +93,7 @@ class Thread:
             "slug": self.slug,
             "category_id": self.category_id,
             "user_id": self.user_id,
-            "content": self.content,
+            "content": self.text,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
             "view_count": self.view_count,
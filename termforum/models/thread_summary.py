@@ -0,0 +1,60 @@
+"""Thread summary model"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from .timestamp import LazyTimestamp
+
+
+@dataclass
+class ThreadSummary:
+    """Lightweight thread projection for list views (no body content)"""
+
+    id: int
+    title: str
+    slug: str = ""
+    category_id: int = 0
+    user_id: int = 0
+    created_at: datetime = LazyTimestamp()
+    updated_at: datetime = LazyTimestamp()
+    view_count: int = 0
+    posts_count: int = 1
+    upvotes: int = 0
+    downvotes: int = 0
+    is_pinned: bool = False
+    is_locked: bool = False
+    last_post_user_id: Optional[int] = None
+    last_post_at: datetime = LazyTimestamp()
+
+    # Additional fields (populated by joins)
+    category_name: Optional[str] = None
+    category_icon: Optional[str] = None
+    user_name: Optional[str] = None
+    user_avatar: Optional[str] = None
+
+    @property
+    def score(self) -> int:
+        """Net vote score"""
+        return self.upvotes - self.downvotes
+
+    @property
+    def reply_count(self) -> int:
+        """Number of replies (excluding first post)"""
+        return max(0, self.posts_count - 1)
+
+    @property
+    def display_title(self) -> str:
+        """Title with status indicators"""
+        prefix = ""
+        if self.is_pinned:
+            prefix += "📌 "
+        if self.is_locked:
+            prefix += "🔒 "
+        return f"{prefix}{self.title}"
+
+    def __str__(self) -> str:
+        return f"ThreadSummary({self.title}, posts={self.posts_count}, score={self.score})"
+
+    def __repr__(self) -> str:
+        return self.__str__()
@@ -0,0 +1,56 @@
+"""Timestamp fields decoded on first read
+
+Models loaded from the database receive their timestamps in stored
+form: integer epoch seconds from the `*_epoch` columns, or the
+CURRENT_TIMESTAMP text of tables without them. A LazyTimestamp field
+keeps that value and builds the datetime the first time the attribute
+is read, like the row models' timestamp properties (see rows.py). A
+list view reads one timestamp per row at most, and most loaded rows
+never have theirs read at all.
+
+LazyTimestamp is a dataclass field default: the field defaults to None
+and accepts a datetime, epoch seconds or timestamp text.
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Optional, Union
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+Stored = Union[datetime, int, float, str, None]
+
+
+def decode_timestamp(value: Stored) -> Optional[datetime]:
+    """Datetime for a stored timestamp (epoch seconds are naive UTC, like CURRENT_TIMESTAMP)"""
+    if value is None or isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return _EPOCH + timedelta(seconds=value)
+
+
+class LazyTimestamp:
+    """Dataclass field descriptor keeping a timestamp in stored form until it is read"""
+
+    __slots__ = ("name",)
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+
+    def __get__(self, obj: Any, owner: type = None) -> Optional[datetime]:
+        if obj is None:
+            return None  # The dataclass default
+        value = obj.__dict__[self.name]
+        if value is None or isinstance(value, datetime):
+            return value
+        value = obj.__dict__[self.name] = decode_timestamp(value)
+        return value
+
+    def __set__(self, obj: Any, value: Stored) -> None:
+        obj.__dict__[self.name] = value
+
+
+def stored_timestamp(obj: Any, name: str) -> Stored:
+    """Value of a LazyTimestamp field as stored, without decoding it"""
+    return obj.__dict__[name]
@@ -4,6 +4,8 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional
 
+from .timestamp import LazyTimestamp, stored_timestamp
+
 
 @dataclass
 class User:
@@ -15,25 +17,25 @@ class User:
     password_hash: Optional[str] = None  # PolyCrypt hash
     bio: Optional[str] = None
     avatar: str = "👤"
-    created_at: datetime = None
-    updated_at: datetime = None
+    created_at: datetime = LazyTimestamp()
+    updated_at: datetime = LazyTimestamp()
     posts_count: int = 0
     threads_count: int = 0
     reputation: int = 0
     is_admin: bool = False
     is_banned: bool = False
-    last_seen: datetime = None
+    last_seen: datetime = LazyTimestamp()
     # Security fields
     failed_login_attempts: int = 0
-    account_locked_until: Optional[datetime] = None
+    account_locked_until: Optional[datetime] = LazyTimestamp()
 
     def __post_init__(self):
-        """Set default timestamps"""
-        if self.created_at is None:
+        """Set default timestamps (loaded ones stay undecoded)"""
+        if stored_timestamp(self, "created_at") is None:
             self.created_at = datetime.now()
-        if self.updated_at is None:
+        if stored_timestamp(self, "updated_at") is None:
             self.updated_at = datetime.now()
-        if self.last_seen is None:
+        if stored_timestamp(self, "last_seen") is None:
             self.last_seen = datetime.now()
 
     @property
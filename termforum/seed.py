@@ -0,0 +1,319 @@
+"""Synthetic forum generator for benchmarking
+
+Builds a realistic-looking forum at any scale, reproducibly: the same
+seed and sizes always produce the same users, threads and posts.
+
+- Authorship, category choice and replies per thread follow Zipf laws,
+  so a few users, categories and threads take most of the activity.
+- Replies form trees. A reply usually continues the previous reply,
+  which makes long chains, and sometimes answers an older post or starts
+  a new branch. Depth is capped at max_depth.
+- Threads are spread over a fixed time window ending at SEED_END, and
+  each thread's replies follow it in time.
+
+Rows are written with the Database bulk API inside bulk_load(), so
+derived data is rebuilt once at the end instead of per row.
+"""
+
+import random
+import time
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from itertools import accumulate
+from typing import Callable, Dict, Iterator, List, Optional
+
+from .storage import Database
+
+
+# Newest generated timestamp; fixed so output does not depend on when it runs
+SEED_END = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+# Distinct sentences and paragraphs post bodies are assembled from
+SENTENCE_POOL = 5000
+PARAGRAPH_POOL = 20000
+
+# Seconds over which a thread's replies are spread
+ACTIVE_SPAN = 21 * 86400
+
+WORDS = (
+    "the a to and of in is it that for on with as this be are not you have can but "
+    "or if was we by at from my so what all one an they there about just like when "
+    "code python terminal forum thread post reply database query index sqlite cache "
+    "shell vim emacs git branch merge commit release bug fix patch test build deploy "
+    "server client request response latency memory cpu disk network socket config "
+    "theme plugin widget screen keyboard shortcut markdown render table column row "
+    "linux macos windows docker kernel package version update install error warning "
+    "works fails faster slower simple better worse idea question answer thanks help "
+    "maybe probably definitely agree disagree think know try tried using used need"
+).split()
+
+NAME_WORDS = (
+    "byte pixel kernel shell vector lambda tensor socket cipher daemon packet "
+    "cursor buffer thread signal syntax binary static async quantum neon rusty"
+).split()
+
+AVATARS = ("👤", "👨‍💻", "👩‍💻", "🧑‍🔬", "🦊", "🐧", "🐍", "🦀", "🤖", "👾")
+
+TITLE_OPENERS = (
+    "How do I", "Why does", "Is it possible to", "Show and tell:", "Help with",
+    "Thoughts on", "Best way to", "Question about", "Announcing", "Benchmark:",
+)
+
+
+@dataclass
+class SeedResult:
+    """Rows created by one seed run"""
+
+    users: int
+    categories: int
+    threads: int
+    posts: int
+    max_depth: int
+    seconds: float
+
+
+def zipf_weights(count: int, exponent: float) -> List[float]:
+    """Cumulative Zipf weights for ranks 1..count (for random.choices)"""
+    return list(accumulate(1.0 / rank ** exponent for rank in range(1, count + 1)))
+
+
+def zipf_counts(total: int, count: int, exponent: float) -> List[int]:
+    """Split total over count ranks in Zipf proportions, exactly summing to total
+
+    Largest-remainder rounding keeps the split deterministic.
+    """
+    if count == 0:
+        return []
+    weights = [1.0 / rank ** exponent for rank in range(1, count + 1)]
+    scale = total / sum(weights)
+    shares = [weight * scale for weight in weights]
+    counts = [int(share) for share in shares]
+    short = total - sum(counts)
+    by_remainder = sorted(range(count), key=lambda i: counts[i] - shares[i])
+    for index in by_remainder[:short]:
+        counts[index] += 1
+    return counts
+
+
+def timestamp(epoch: int) -> str:
+    """CURRENT_TIMESTAMP-style text for epoch seconds"""
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(epoch))
+
+
+class ForumSeeder:
+    """Generates and inserts a synthetic forum"""
+
+    def __init__(self, db: Database, seed: int = 0, zipf: float = 0.8, max_depth: int = 50,
+                 days: int = 365, batch_size: int = 20_000):
+        """Initialize the seeder
+
+        Args:
+            db: Target database
+            seed: Random seed; equal seeds and sizes give identical forums
+            zipf: Zipf exponent for authorship, categories and replies per thread
+            max_depth: Deepest reply nesting
+            days: Length of the time window the threads are spread over
+            batch_size: Rows per insert transaction
+        """
+        self.db = db
+        self.rng = random.Random(seed)
+        self.zipf = zipf
+        self.max_depth = max_depth
+        self.end = int(SEED_END.timestamp())
+        self.start = self.end - days * 86400
+        self.batch_size = batch_size
+        self.deepest = 0
+        # Bodies are assembled from fixed pools; building every sentence would dominate the run
+        self.sentences = [self.sentence() for _ in range(SENTENCE_POOL)]
+        self.paragraphs = [self.paragraph() for _ in range(PARAGRAPH_POOL)]
+
+    # ════════════════════════════════════════════
+    # TEXT
+    # ════════════════════════════════════════════
+
+    def sentence(self, low: int = 4, high: int = 18) -> str:
+        words = self.rng.choices(WORDS, k=self.rng.randint(low, high))
+        return " ".join(words).capitalize() + self.rng.choice("...?!")
+
+    def paragraph(self) -> str:
+        return " ".join(self.rng.choices(self.sentences, k=self.rng.randint(1, 4)))
+
+    def body(self) -> str:
+        """One to four paragraphs, occasionally with a code block or quote"""
+        rng = self.rng
+        paragraphs = rng.choices(self.paragraphs, k=min(4, int(rng.expovariate(1.0)) + 1))
+        roll = rng.random()
+        if roll < 0.05:
+            paragraphs.append("```\n" + " ".join(rng.choices(WORDS, k=8)) + "\n```")
+        elif roll < 0.10:
+            paragraphs.insert(0, "> " + rng.choice(self.sentences))
+        return "\n\n".join(paragraphs)
+
+    def title(self, number: int) -> str:
+        words = " ".join(self.rng.choices(WORDS, k=self.rng.randint(2, 7)))
+        return f"{self.rng.choice(TITLE_OPENERS)} {words} #{number}"
+
+    # ════════════════════════════════════════════
+    # ROWS
+    # ════════════════════════════════════════════
+
+    def users(self, count: int, first_number: int) -> Iterator[Dict]:
+        rng = self.rng
+        for number in range(first_number, first_number + count):
+            created = rng.randint(self.start - 86400 * 30, self.end)
+            yield {
+                "username": f"{rng.choice(NAME_WORDS)}{number}",
+                "avatar": rng.choice(AVATARS),
+                "created_at": timestamp(created),
+            }
+
+    def ensure_categories(self, count: int) -> List[int]:
+        """Ids of at least count categories, creating numbered ones as needed"""
+        categories = self.db.list_categories()
+        for number in range(len(categories) + 1, count + 1):
+            self.db.create_category(f"Topic {number}", slug=f"topic-{number}",
+                                    description="Generated category", position=number)
+        return [category.id for category in self.db.list_categories()]
+
+    def threads(self, count: int, user_ids: List[int], category_ids: List[int],
+                first_number: int, created: List[int]) -> Iterator[Dict]:
+        """Threads in creation order; their epochs are appended to created"""
+        rng = self.rng
+        user_weights = zipf_weights(len(user_ids), self.zipf)
+        category_weights = zipf_weights(len(category_ids), self.zipf)
+        # Ranks are shuffled so the busiest user is not always the first one
+        users = rng.sample(user_ids, len(user_ids))
+        categories = rng.sample(category_ids, len(category_ids))
+
+        epochs = sorted(rng.randint(self.start, self.end) for _ in range(count))
+        for offset, epoch in enumerate(epochs):
+            number = first_number + offset
+            created.append(epoch)
+            yield {
+                "title": self.title(number),
+                "slug": f"seed-{number}",
+                "content": self.body(),
+                "user_id": users[bisect_left(user_weights, rng.random() * user_weights[-1])],
+                "category_id": categories[bisect_left(category_weights, rng.random() * category_weights[-1])],
+                "created_at": timestamp(epoch),
+            }
+
+    def replies(self, thread_id: int, count: int, created: int, first_id: int,
+                pick_user: Callable[[], int]) -> Iterator[Dict]:
+        """Replies of one thread, whose ids will be first_id, first_id + 1, ..."""
+        rng = self.rng
+        depths: List[int] = []
+        # Discussions mostly play out within a few weeks
+        gap = max(1, min(self.end - created, ACTIVE_SPAN) // (count + 1))
+        epoch = created
+
+        for index in range(count):
+            roll = rng.random()
+            if index == 0 or roll < 0.25:
+                parent = None
+            elif roll < 0.75:
+                parent = index - 1
+            else:
+                parent = rng.randrange(index)
+            # Too deep: answer the parent's sibling level instead
+            while parent is not None and depths[parent] >= self.max_depth:
+                parent = parent - 1 if parent else None
+            depth = 0 if parent is None else depths[parent] + 1
+            depths.append(depth)
+
+            epoch = min(self.end, epoch + int(rng.expovariate(1.0 / gap)) + 1)
+            yield {
+                "thread_id": thread_id,
+                "user_id": pick_user(),
+                "content": self.body(),
+                "parent_post_id": None if parent is None else first_id + parent,
+                "created_at": timestamp(epoch),
+            }
+
+        if depths:
+            self.deepest = max(self.deepest, max(depths))
+
+    def posts(self, total: int, thread_ids: List[int], created: List[int],
+              user_ids: List[int], first_id: int) -> Iterator[Dict]:
+        rng = self.rng
+        user_weights = zipf_weights(len(user_ids), self.zipf)
+        users = rng.sample(user_ids, len(user_ids))
+        top = user_weights[-1]
+
+        def pick_user() -> int:
+            return users[bisect_left(user_weights, rng.random() * top)]
+
+        # The busiest threads are scattered rather than the oldest ones
+        order = rng.sample(range(len(thread_ids)), len(thread_ids))
+        counts = [0] * len(thread_ids)
+        for rank, count in enumerate(zipf_counts(total, len(thread_ids), self.zipf)):
+            counts[order[rank]] = count
+
+        next_id = first_id
+        for thread_id, epoch, count in zip(thread_ids, created, counts):
+            yield from self.replies(thread_id, count, epoch, next_id, pick_user)
+            next_id += count
+
+    # ════════════════════════════════════════════
+    # RUN
+    # ════════════════════════════════════════════
+
+    def _next_id(self, table: str) -> int:
+        """Id AUTOINCREMENT will hand out next"""
+        with self.db._read() as conn:
+            row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)).fetchone()
+        return (row[0] if row else 0) + 1
+
+    def run(self, users: int, threads: int, posts: int, categories: int = 0,
+            progress: Optional[Callable[[str, int], None]] = None) -> SeedResult:
+        """Generate and insert the forum
+
+        Args:
+            users: Users to create
+            threads: Threads to create
+            posts: Replies to create, spread over the threads
+            categories: Minimum number of categories (extra ones are created)
+            progress: Called with (table, rows inserted so far) after each batch
+
+        Returns:
+            Counts and timing of the run
+
+        Raises:
+            ValueError: If the database is sharded (post ids cannot be predicted)
+        """
+        if self.db.router is not None:
+            raise ValueError("Seeding a sharded database is not supported")
+
+        started = time.perf_counter()
+        report = progress or (lambda table, rows: None)
+        category_ids = self.ensure_categories(categories)
+
+        # Building indexes once at the end only pays off when most rows are new
+        with self.db._read() as conn:
+            existing = conn.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+
+        with self.db.bulk_load(defer_indexes=posts > existing):
+            user_ids = self.db.bulk_create_users(self.users(users, self._next_id("users")),
+                                                 self.batch_size)
+            report("users", len(user_ids))
+
+            created: List[int] = []
+            thread_ids: List[int] = []
+            rows = self.threads(threads, user_ids, category_ids, self._next_id("threads"), created)
+            for batch in Database._batches(rows, self.batch_size):
+                thread_ids.extend(self.db.bulk_create_threads(batch, self.batch_size))
+                report("threads", len(thread_ids))
+
+            # Parent ids are predicted, which holds while this is the only writer
+            first_post = next_post = self._next_id("posts")
+            rows = self.posts(posts, thread_ids, created, user_ids, first_post)
+            for batch in Database._batches(rows, self.batch_size):
+                ids = self.db.bulk_create_posts(batch, self.batch_size)
+                if ids[0] != next_post:
+                    raise RuntimeError("Post ids changed while seeding; another process wrote to the database")
+                next_post += len(ids)
+                report("posts", next_post - first_post)
+
+        return SeedResult(len(user_ids), len(category_ids), len(thread_ids), next_post - first_post,
+                          self.deepest, time.perf_counter() - started)
@@ -1,5 +1,15 @@
 """Storage layer for TermForum"""
 
 from .database import Database
+from .async_database import AsyncDatabase
+from .pool import ConnectionPool, DEFAULT_PRAGMAS, register_functions
+from .migrations import MIGRATIONS, SCHEMA_VERSION, migrate, plan_migrations
+from .instrumentation import QueryStats
+from .changes import ChangeWatcher, ForumWatcher
+from .sharding import ShardRouter
 
-__all__ = ["Database"]
+__all__ = [
+    "Database", "AsyncDatabase", "ConnectionPool", "DEFAULT_PRAGMAS", "register_functions",
+    "MIGRATIONS", "SCHEMA_VERSION", "migrate", "plan_migrations", "QueryStats",
+    "ChangeWatcher", "ForumWatcher", "ShardRouter",
+]
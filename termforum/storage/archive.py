@@ -0,0 +1,306 @@
+"""Cold archive for inactive threads
+
+Threads whose last post is older than a cutoff move, together with all
+their posts, from forum.db into a second file (forum.archive.db next to
+it) that every pool connection ATTACHes as `archive`. The hot database
+keeps only recent threads, so its tables and indexes stay small enough
+to live in the page cache. get_thread(), the post listings and search
+fall back to the archive when a thread is not found in the hot tables.
+
+Pinned and soft-deleted threads are never archived (the latter are left
+for the purge). Archived threads are read-only history, apart from their
+view counts (see view_counter.py). They still count
+towards the user, category and forum stats counters: the delete from
+the hot tables runs with the counter and stats triggers suspended, and
+reconciling with the archive attached counts its rows.
+
+A chunk is copied into the archive and deleted from the hot database in
+two transactions, archive first. SQLite commits attached WAL databases
+one file at a time, main first, so a single transaction could lose a
+chunk if the process died between the two commits. In this order a
+crash can only leave a duplicate. Readers prefer the hot copy, and the
+next run copies the chunk again. The delete re-checks the cutoff, so a
+thread that got a reply between the two steps stays hot.
+"""
+
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from .bulk import restore, suspend_triggers
+from .epoch import EPOCH_COLUMNS
+from .search import stores_text
+
+
+ARCHIVE_SCHEMA = "archive"
+
+# Threads per chunk, and a soft cap on the posts they carry
+DEFAULT_CHUNK_THREADS = 100
+DEFAULT_CHUNK_POSTS = 5000
+
+ARCHIVE_TABLES = ("threads", "posts")
+
+# Triggers that would subtract archived rows from the counters and stats
+COUNT_TRIGGERS = ("counters_", "forum_stats_")
+
+ARCHIVE_INDEXES: List[str] = [
+    f"CREATE INDEX IF NOT EXISTS {ARCHIVE_SCHEMA}.idx_posts_thread_tree ON posts(thread_id, path)",
+    f"CREATE INDEX IF NOT EXISTS {ARCHIVE_SCHEMA}.idx_posts_thread_timeline "
+    f"ON posts(thread_id, is_deleted, created_epoch ASC, id ASC)",
+]
+
+# Same layout as the hot index (see search.py), without triggers: copy_chunk indexes rows
+ARCHIVE_SEARCH_SCHEMA: List[str] = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {ARCHIVE_SCHEMA}.threads_fts USING fts5(
+        title, content,
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {ARCHIVE_SCHEMA}.posts_fts USING fts5(
+        content,
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+]
+
+# Oldest archivable threads; served by idx_threads_archivable
+CANDIDATES_QUERY = """
+    SELECT id, posts_count FROM main.threads
+    WHERE is_deleted = 0 AND is_pinned = 0 AND last_post_epoch < :cutoff
+    ORDER BY last_post_epoch, id
+    LIMIT :limit
+"""
+
+CANDIDATES_SCHEMA = """
+    CREATE INDEX IF NOT EXISTS idx_threads_archivable ON threads(last_post_epoch, id)
+    WHERE is_deleted = 0 AND is_pinned = 0
+"""
+
+
+@dataclass
+class ArchiveResult:
+    """Outcome of one archive run"""
+
+    threads: int = 0
+    posts: int = 0
+    chunks: int = 0
+    seconds: float = 0.0
+
+
+def archive_path_for(db_path: str) -> str:
+    """Default archive file of a database: forum.db -> forum.archive.db"""
+    path = Path(db_path)
+    return str(path.with_name(f"{path.stem}.archive{path.suffix or '.db'}"))
+
+
+def create_candidates_schema(cursor: sqlite3.Cursor) -> None:
+    """Index for finding the oldest archivable threads"""
+    cursor.execute(CANDIDATES_SCHEMA)
+
+
+# ════════════════════════════════════════════
+# SCHEMA
+# ════════════════════════════════════════════
+
+def is_attached(conn: sqlite3.Connection) -> bool:
+    """Whether the archive is attached to this connection"""
+    return any(row[1] == ARCHIVE_SCHEMA for row in conn.execute("PRAGMA database_list"))
+
+
+def stored_columns(conn: sqlite3.Connection, table: str, schema: str = "main") -> List[str]:
+    """Stored (non-generated) columns of a table"""
+    return [row[1] for row in conn.execute(f"PRAGMA {schema}.table_info({table})").fetchall()]
+
+
+def create_archive_schema(cursor: sqlite3.Cursor) -> None:
+    """Create or extend the archive tables to match the hot ones
+
+    Archive tables have the hot tables' stored columns and epoch columns
+    but no constraints: users and categories live in the main database,
+    and archived rows are only written to add views.
+    """
+    for table in ARCHIVE_TABLES:
+        cursor.execute(f"PRAGMA main.table_info({table})")
+        columns = [(row[1], row[2]) for row in cursor.fetchall()]
+        existing = stored_columns(cursor.connection, table, ARCHIVE_SCHEMA)
+
+        if not existing:
+            definitions = [
+                "id INTEGER PRIMARY KEY" if name == "id" else f"{name} {kind}".strip()
+                for name, kind in columns
+            ]
+            cursor.execute(f"CREATE TABLE {ARCHIVE_SCHEMA}.{table} ({', '.join(definitions)})")
+        else:
+            # Columns added to the hot table by later migrations
+            for name, kind in columns:
+                if name not in existing:
+                    cursor.execute(f"ALTER TABLE {ARCHIVE_SCHEMA}.{table} ADD COLUMN {name} {kind}")
+
+        cursor.execute(f"PRAGMA {ARCHIVE_SCHEMA}.table_xinfo({table})")
+        present = {row[1] for row in cursor.fetchall()}
+        for source, column in EPOCH_COLUMNS[table].items():
+            if column not in present:
+                cursor.execute(f"""
+                    ALTER TABLE {ARCHIVE_SCHEMA}.{table} ADD COLUMN {column} INTEGER
+                    GENERATED ALWAYS AS (CAST(strftime('%s', {source}) AS INTEGER)) VIRTUAL
+                """)
+
+    # Archives with an older index layout are re-indexed into one holding its own text
+    cursor.execute(f"SELECT 1 FROM {ARCHIVE_SCHEMA}.sqlite_master WHERE name = 'posts_fts'")
+    reindex = cursor.fetchone() is not None and not stores_text(cursor, ARCHIVE_SCHEMA)
+    if reindex:
+        cursor.execute(f"DROP TABLE {ARCHIVE_SCHEMA}.threads_fts")
+        cursor.execute(f"DROP TABLE {ARCHIVE_SCHEMA}.posts_fts")
+        for view in ("threads_text", "posts_text"):
+            cursor.execute(f"DROP VIEW IF EXISTS {ARCHIVE_SCHEMA}.{view}")
+
+    for statement in ARCHIVE_INDEXES + ARCHIVE_SEARCH_SCHEMA:
+        cursor.execute(statement)
+
+    if reindex:
+        cursor.execute(f"""
+            INSERT INTO {ARCHIVE_SCHEMA}.threads_fts(rowid, title, content)
+            SELECT id, title, body(content) FROM {ARCHIVE_SCHEMA}.threads
+        """)
+        cursor.execute(f"""
+            INSERT INTO {ARCHIVE_SCHEMA}.posts_fts(rowid, content)
+            SELECT id, body(content) FROM {ARCHIVE_SCHEMA}.posts
+        """)
+
+
+# ════════════════════════════════════════════
+# ARCHIVING
+# ════════════════════════════════════════════
+
+def next_chunk(cursor: sqlite3.Cursor, cutoff: int, chunk_threads: int = DEFAULT_CHUNK_THREADS,
+               chunk_posts: int = DEFAULT_CHUNK_POSTS) -> List[int]:
+    """Ids of the next threads to archive, oldest activity first
+
+    Stops adding threads once their posts exceed chunk_posts, but always
+    takes at least one.
+    """
+    cursor.execute(CANDIDATES_QUERY, {"cutoff": cutoff, "limit": chunk_threads})
+    ids, posts = [], 0
+    for thread_id, posts_count in cursor.fetchall():
+        if ids and posts + posts_count > chunk_posts:
+            break
+        ids.append(thread_id)
+        posts += posts_count
+    return ids
+
+
+def copy_chunk(cursor: sqlite3.Cursor, thread_ids: Sequence[int]) -> None:
+    """Copy threads and their posts into the archive, replacing earlier copies"""
+    ids = ", ".join(str(int(thread_id)) for thread_id in thread_ids)
+
+    # A copy left by an interrupted run: drop it and its search entries first
+    cursor.execute(f"DELETE FROM {ARCHIVE_SCHEMA}.threads_fts WHERE rowid IN ({ids})")
+    cursor.execute(f"""
+        DELETE FROM {ARCHIVE_SCHEMA}.posts_fts WHERE rowid IN (
+            SELECT id FROM {ARCHIVE_SCHEMA}.posts WHERE thread_id IN ({ids}))
+    """)
+    cursor.execute(f"DELETE FROM {ARCHIVE_SCHEMA}.posts WHERE thread_id IN ({ids})")
+    cursor.execute(f"DELETE FROM {ARCHIVE_SCHEMA}.threads WHERE id IN ({ids})")
+
+    for table, key in (("threads", "id"), ("posts", "thread_id")):
+        columns = ", ".join(stored_columns(cursor.connection, table, ARCHIVE_SCHEMA))
+        cursor.execute(f"""
+            INSERT INTO {ARCHIVE_SCHEMA}.{table} ({columns})
+            SELECT {columns} FROM main.{table} WHERE {key} IN ({ids})
+        """)
+
+    # Like the hot index, soft-deleted rows are indexed and skipped by search
+    cursor.execute(f"""
+        INSERT INTO {ARCHIVE_SCHEMA}.threads_fts(rowid, title, content)
+        SELECT id, title, body(content) FROM {ARCHIVE_SCHEMA}.threads WHERE id IN ({ids})
+    """)
+    cursor.execute(f"""
+        INSERT INTO {ARCHIVE_SCHEMA}.posts_fts(rowid, content)
+        SELECT id, body(content) FROM {ARCHIVE_SCHEMA}.posts WHERE thread_id IN ({ids})
+    """)
+
+
+def delete_chunk(cursor: sqlite3.Cursor, thread_ids: Sequence[int], cutoff: int) -> Tuple[int, int]:
+    """Delete archived threads from the hot tables, skipping any that became active again
+
+    Returns:
+        (threads deleted, posts deleted)
+    """
+    ids = ", ".join(str(int(thread_id)) for thread_id in thread_ids)
+    cursor.execute(f"""
+        SELECT id FROM main.threads
+        WHERE id IN ({ids}) AND is_deleted = 0 AND is_pinned = 0 AND last_post_epoch < ?
+    """, (cutoff,))
+    cold = ", ".join(str(row[0]) for row in cursor.fetchall())
+    if not cold:
+        return 0, 0
+
+    # Counted up front: rows removed by the parent_post_id cascade are missing from rowcount
+    cursor.execute(f"SELECT COUNT(*) FROM main.posts WHERE thread_id IN ({cold})")
+    posts = cursor.fetchone()[0]
+    # Archived rows keep counting (see module docstring); the search and
+    # change-log triggers still fire
+    triggers = suspend_triggers(cursor, COUNT_TRIGGERS)
+    cursor.execute(f"DELETE FROM main.posts WHERE thread_id IN ({cold})")
+    cursor.execute(f"DELETE FROM main.threads WHERE id IN ({cold})")
+    threads = cursor.rowcount
+    restore(cursor, triggers)
+    return threads, posts
+
+
+def archive_threads(write: Callable, cutoff: int, chunk_threads: int = DEFAULT_CHUNK_THREADS,
+                    chunk_posts: int = DEFAULT_CHUNK_POSTS, max_threads: Optional[int] = None,
+                    pause: float = 0.0,
+                    progress: Optional[Callable[[int, int], None]] = None) -> ArchiveResult:
+    """Move every thread inactive since before cutoff into the archive
+
+    Args:
+        write: ConnectionPool.write-style context manager for the writer
+            connection (with the archive attached)
+        cutoff: Epoch seconds; threads whose last post is older are archived
+        chunk_threads: Threads moved per chunk
+        chunk_posts: Soft cap on the posts moved per chunk
+        max_threads: Stop after this many threads (None = all)
+        pause: Seconds to sleep between chunks, letting other writers in
+        progress: Called with (threads, posts) archived so far after each chunk
+
+    Returns:
+        Counts and timing of the run
+    """
+    started = time.perf_counter()
+    result = ArchiveResult()
+
+    while max_threads is None or result.threads < max_threads:
+        limit = chunk_threads if max_threads is None else min(chunk_threads, max_threads - result.threads)
+        # The outer block holds the writer lock across both steps, so no other
+        # write from this process lands between them. Each inner block starts
+        # outside a transaction and so commits on its own (see module docstring).
+        with write() as conn:
+            cursor = conn.cursor()
+            with write():
+                thread_ids = next_chunk(cursor, cutoff, limit, chunk_posts)
+                if thread_ids:
+                    copy_chunk(cursor, thread_ids)
+            if not thread_ids:
+                break
+            with write():
+                # Explicit, so the trigger drops and restores in delete_chunk commit with it
+                cursor.execute("BEGIN IMMEDIATE")
+                threads, posts = delete_chunk(cursor, thread_ids, cutoff)
+
+        result.threads += threads
+        result.posts += posts
+        result.chunks += 1
+        if progress is not None:
+            progress(result.threads, result.posts)
+        if not threads:
+            break
+        if pause:
+            time.sleep(pause)
+
+    result.seconds = time.perf_counter() - started
+    return result
@@ -0,0 +1,71 @@
+"""Asynchronous facade over Database for the Textual UI
+
+Every public Database method is exposed as a coroutine that runs on a
+single dedicated executor thread, so SQLite work never blocks the event
+loop. The facade wraps the Database it is given rather than opening a
+second one: the pool, identity map and view counter are the same for
+sync and async callers. Cancelling the awaiting task (e.g. when Textual
+cancels a screen's workers on pop) drops queued calls and interrupts a
+query that is already running on the executor thread.
+"""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from .database import Database
+
+
+class AsyncDatabase:
+    """Awaitable wrapper running Database calls on a dedicated thread"""
+
+    def __init__(self, database: Database):
+        """Initialize the facade
+
+        Args:
+            database: Database to wrap; its owner remains responsible for closing it
+        """
+        self._database = database
+        self._thread_id: Optional[int] = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="termforum-db",
+            initializer=self._started,
+        )
+
+    def _started(self) -> None:
+        """Remember the executor thread (runs on that thread)"""
+        self._thread_id = threading.get_ident()
+
+    def _run(self, name: str, args: tuple, kwargs: dict) -> Any:
+        """Invoke a Database method on the executor thread"""
+        return getattr(self._database, name)(*args, **kwargs)
+
+    async def _call(self, name: str, *args: Any, **kwargs: Any) -> Any:
+        """Run a Database method on the executor and await the result"""
+        future = self._executor.submit(self._run, name, args, kwargs)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # Queued calls are cancelled with the awaiting task; a running one must be
+            # interrupted, leaving queries of other threads on the shared pool alone
+            if future.running() and self._thread_id is not None:
+                self._database.pool.interrupt_readers(self._thread_id)
+            raise
+
+    def __getattr__(self, name: str) -> Callable:
+        """Expose every public Database method as a coroutine function"""
+        if name.startswith("_") or not callable(getattr(Database, name, None)):
+            raise AttributeError(name)
+
+        @functools.wraps(getattr(Database, name))
+        async def method(*args: Any, **kwargs: Any) -> Any:
+            return await self._call(name, *args, **kwargs)
+
+        return method
+
+    async def close(self) -> None:
+        """Stop the executor (the wrapped Database is closed by its owner)"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,292 @@
+"""Online backups with the SQLite backup API
+
+Copying the database file while the forum runs can tear it: the copy
+may catch the main file and the WAL at different moments. Instead,
+backup() copies pages with sqlite3's backup API, a few hundred pages per
+step, pausing between steps so the writer is never starved.
+
+The source connection holds one read transaction for the whole copy.
+In WAL mode that pins a consistent snapshot without blocking writers.
+Otherwise every concurrent commit would restart the copy.
+
+A forum can span several files: the archive (forum.archive.db) and, in
+a sharded forum, the shards under forum.shards/. backup() copies them
+next to the target under the matching names, so a copy opens as the
+same forum. Shards are copied first, one snapshot each. The main
+database and its archive are copied last, from one read transaction
+with the archive attached, because archiving moves rows between those
+two files. Threads and posts created during a sharded backup may be
+missing from the copy, but every user and category its shards
+reference is in the catalog.
+
+snapshot() writes timestamped copies into a directory and prunes all but
+the newest `keep`. Each copy is written under a temporary name and
+renamed when complete, so a crash never leaves a half-written file that
+looks like a snapshot. verify_in_background() runs PRAGMA
+integrity_check on every file of a copy in a separate process, away
+from the forum's own connections.
+"""
+
+import json
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from .archive import ARCHIVE_SCHEMA, archive_path_for
+from .pool import register_functions
+from .sharding import shard_directory, shard_files
+
+
+# Pages copied per backup step (4 MiB at the default 4 KiB page size)
+DEFAULT_STEP_PAGES = 1024
+# Pause between steps, letting writers in
+DEFAULT_STEP_SLEEP = 0.01
+SNAPSHOT_PREFIX = "forum-"
+SNAPSHOT_SUFFIX = ".db"
+
+
+@dataclass
+class BackupResult:
+    """Outcome of one backup"""
+
+    path: Path
+    pages: int
+    steps: int
+    bytes: int
+    seconds: float
+    # Archive and shard files copied alongside path
+    companions: List[Path] = field(default_factory=list)
+
+
+def backup(source_path: str, target_path: str, step_pages: int = DEFAULT_STEP_PAGES,
+           step_sleep: float = DEFAULT_STEP_SLEEP,
+           progress: Optional[Callable[[int, int], None]] = None) -> BackupResult:
+    """Copy a live database, with its archive and shards, page-step by page-step
+
+    Args:
+        source_path: Database to copy (may be in use by other processes)
+        target_path: File to write; replaced if it exists. The archive and
+            shards are written next to it under the matching names
+        step_pages: Pages copied per step
+        step_sleep: Seconds to pause between steps
+        progress: Called with (pages copied, total pages so far) after each step
+
+    Returns:
+        Size and timing of the copy, over every file
+    """
+    started = time.perf_counter()
+    result = BackupResult(Path(target_path), 0, 0, 0, 0.0)
+
+    def on_step(status: int, remaining: int, pages: int) -> None:
+        result.steps += 1
+        if progress is not None:
+            progress(result.pages + pages - remaining, result.pages + pages)
+        if remaining and step_sleep:
+            time.sleep(step_sleep)
+        if not remaining:
+            result.pages += pages
+
+    # Shards first (see module docstring)
+    for shard in shard_files(source_path):
+        target = shard_directory(target_path) / shard.name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        _copy(str(shard), {"main": target}, step_pages, on_step)
+        result.companions.append(target)
+
+    targets = {"main": Path(target_path)}
+    archive = Path(archive_path_for(source_path))
+    if archive.exists():
+        targets[ARCHIVE_SCHEMA] = Path(archive_path_for(target_path))
+        result.companions.append(targets[ARCHIVE_SCHEMA])
+    _copy(source_path, targets, step_pages, on_step, archive if archive.exists() else None)
+
+    result.bytes = sum(os.path.getsize(path) for path in [result.path, *result.companions])
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def _copy(source_path: str, targets: Dict[str, Path], step_pages: int,
+          on_step: Callable[[int, int, int], None], archive: Optional[Path] = None) -> None:
+    """Copy the schemas of one source connection (main, and the archive if given) to target files"""
+    source = sqlite3.connect(source_path, timeout=30)
+    register_functions(source)
+    try:
+        if archive is not None:
+            source.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (str(archive),))
+        # Pin one snapshot of every schema for the whole copy (see module docstring)
+        source.execute("BEGIN")
+        for schema in targets:
+            source.execute(f"SELECT COUNT(*) FROM {schema}.sqlite_master").fetchone()
+
+        for schema, target_path in targets.items():
+            target = sqlite3.connect(target_path)
+            try:
+                source.backup(target, pages=step_pages, progress=on_step, name=schema)
+                # A self-contained single file: no -wal/-shm beside the copy
+                target.execute("PRAGMA journal_mode = DELETE")
+            finally:
+                target.close()
+        source.rollback()
+    finally:
+        source.close()
+
+
+# ════════════════════════════════════════════
+# SNAPSHOTS
+# ════════════════════════════════════════════
+
+def list_snapshots(directory: str) -> List[Path]:
+    """Completed snapshots in a directory, oldest first (main files only)"""
+    folder = Path(directory)
+    if not folder.is_dir():
+        return []
+    # forum-<time>.archive.db is the archive of forum-<time>.db
+    return sorted(path for path in folder.glob(f"{SNAPSHOT_PREFIX}*{SNAPSHOT_SUFFIX}")
+                  if not path.stem.endswith(".archive"))
+
+
+def snapshot_companions(path: Path) -> List[Path]:
+    """Archive file and shard directory belonging to a snapshot, where present"""
+    companions = [Path(archive_path_for(str(path))), shard_directory(str(path))]
+    return [companion for companion in companions if companion.exists()]
+
+
+def _remove(path: Path) -> None:
+    """Delete a snapshot file or shard directory"""
+    if path.is_dir():
+        shutil.rmtree(path)
+    else:
+        path.unlink()
+
+
+def prune_snapshots(directory: str, keep: int) -> List[Path]:
+    """Delete all but the newest `keep` snapshots, with their archive and shards
+
+    Returns:
+        The deleted snapshot paths
+    """
+    snapshots = list_snapshots(directory)
+    expired = snapshots[:-keep] if keep > 0 else snapshots
+    for path in expired:
+        for companion in snapshot_companions(path):
+            _remove(companion)
+        path.unlink()
+        verify_report_path(path).unlink(missing_ok=True)
+    return expired
+
+
+def snapshot(source_path: str, directory: str, keep: int = 7,
+             step_pages: int = DEFAULT_STEP_PAGES, step_sleep: float = DEFAULT_STEP_SLEEP,
+             progress: Optional[Callable[[int, int], None]] = None) -> BackupResult:
+    """Write a timestamped backup into directory, then apply retention
+
+    Args:
+        source_path: Database to copy
+        directory: Snapshot directory (created if missing)
+        keep: Number of snapshots to retain, this one included
+        step_pages: Pages copied per step
+        step_sleep: Seconds to pause between steps
+        progress: Called with (pages copied, total pages so far) after each step
+
+    Returns:
+        Result of the backup, with the final snapshot paths
+    """
+    folder = Path(directory)
+    folder.mkdir(parents=True, exist_ok=True)
+
+    name = f"{SNAPSHOT_PREFIX}{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}{SNAPSHOT_SUFFIX}"
+    final = folder / name
+    staging = folder / f".{name}.partial"
+    moved: List[Path] = []
+    try:
+        staging.mkdir()
+        result = backup(source_path, str(staging / name), step_pages, step_sleep, progress)
+        # Companions first: a snapshot only counts once its main file appears
+        for companion in snapshot_companions(staging / name):
+            moved.append(companion.rename(folder / companion.name))
+        (staging / name).rename(final)
+        staging.rmdir()
+    except BaseException:
+        for companion in moved:
+            _remove(companion)
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    result.path = final
+    result.companions = moved
+    prune_snapshots(directory, keep)
+    return result
+
+
+# ════════════════════════════════════════════
+# VERIFICATION
+# ════════════════════════════════════════════
+
+def verify_report_path(path: Path) -> Path:
+    """Where the integrity report of a snapshot is written"""
+    return path.with_name(path.name + ".verify.json")
+
+
+def _integrity_check(path: str) -> None:
+    """Child process: run integrity_check read-only on every file of a snapshot and write the report"""
+    try:
+        os.nice(10)
+    except (AttributeError, OSError):
+        pass
+
+    started = time.perf_counter()
+    snapshot_path = Path(path)
+    files = [snapshot_path, *shard_files(path)]
+    if Path(archive_path_for(path)).exists():
+        files.append(Path(archive_path_for(path)))
+
+    messages = []
+    for file in files:
+        try:
+            conn = sqlite3.connect(f"{file.resolve().as_uri()}?mode=ro", uri=True)
+            register_functions(conn)
+            try:
+                found = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            found = [f"error: {e}"]
+        if found != ["ok"]:
+            messages.extend(found if file == snapshot_path else [f"{file.name}: {message}" for message in found])
+    messages = messages or ["ok"]
+
+    report = {
+        "path": path,
+        "ok": messages == ["ok"],
+        "messages": messages[:100],
+        "seconds": round(time.perf_counter() - started, 3),
+        "checked_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    verify_report_path(Path(path)).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+
+def verify_in_background(path: str) -> multiprocessing.Process:
+    """Start PRAGMA integrity_check on a backup in a separate, low-priority process
+
+    The report is written to verify_report_path(path); join() the process
+    and call read_verify_report() to wait for it.
+    """
+    process = multiprocessing.get_context("spawn").Process(
+        target=_integrity_check, args=(str(path),), daemon=False,
+    )
+    process.start()
+    return process
+
+
+def read_verify_report(path: str) -> Optional[dict]:
+    """Integrity report of a backup, or None if it has not been verified"""
+    report = verify_report_path(Path(path))
+    if not report.exists():
+        return None
+    return json.loads(report.read_text(encoding="utf-8"))
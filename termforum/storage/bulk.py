@@ -0,0 +1,188 @@
+"""Bulk-load mode
+
+Every inserted post normally fires the reply-tree, search, stats,
+counter and change-log triggers and updates several secondary indexes. Together these
+cost several times more than the insert itself. For a large import it
+is much cheaper to drop the triggers and rebuild their derived data
+afterwards with a few set-based statements over the new rows, and
+optionally to build the indexes once at the end by sorting instead of
+one row at a time.
+
+While loading, Database.bulk_create_posts computes reply-tree paths
+itself, because it knows the ids it is about to insert.
+
+The trigger drops happen in one transaction and the rebuild in another,
+so readers never see a half-dropped set. While the triggers are
+suspended, writes from other connections do not maintain derived data
+either. Only the loading process should write until the load finishes.
+"""
+
+import sqlite3
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .changes import log_reload
+from .counters import reconcile_counters
+from .post_tree import SEGMENT_WIDTH
+from .stats import reconcile_stats
+
+
+# Triggers maintaining derived data, by name prefix
+BULK_LOAD_TRIGGERS: Tuple[str, ...] = (
+    "posts_tree_",
+    "threads_fts_",
+    "posts_fts_",
+    "forum_stats_",
+    "counters_",
+    "changes_",
+)
+
+# Tables whose secondary indexes can be deferred to the end of a load
+BULK_LOAD_TABLES: Tuple[str, ...] = ("threads", "posts")
+
+# Paths for new posts that were inserted without one (e.g. by create_post
+# during a load); replies to older posts start from their parent's path
+TREE_BACKFILL_SINCE_QUERY = f"""
+    WITH RECURSIVE tree(id, path, depth) AS (
+        SELECT p.id,
+               COALESCE(parent.path, '') || printf('%0{SEGMENT_WIDTH}d/', p.id),
+               COALESCE(parent.depth + 1, 0)
+        FROM posts p LEFT JOIN posts parent ON parent.id = p.parent_post_id
+        WHERE p.id > :since AND p.path IS NULL
+          AND (p.parent_post_id IS NULL OR parent.path IS NOT NULL OR parent.id IS NULL)
+        UNION ALL
+        SELECT p.id, tree.path || printf('%0{SEGMENT_WIDTH}d/', p.id), tree.depth + 1
+        FROM posts p JOIN tree ON p.parent_post_id = tree.id
+        WHERE p.path IS NULL
+    )
+    UPDATE posts SET path = tree.path, depth = tree.depth
+    FROM tree WHERE posts.id = tree.id
+"""
+
+
+def high_water_marks(cursor: sqlite3.Cursor) -> Dict[str, int]:
+    """Largest thread and post ids; rows above them are new"""
+    marks = {}
+    for table in ("threads", "posts"):
+        cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}")
+        marks[table] = cursor.fetchone()[0]
+    return marks
+
+
+def _drop(cursor: sqlite3.Cursor, kind: str, query: str, params: Sequence[str]) -> List[str]:
+    """Drop the schema objects a query selects, returning their CREATE statements"""
+    cursor.execute(query, params)
+    objects = cursor.fetchall()
+    for name, _ in objects:
+        cursor.execute(f"DROP {kind} {name}")
+    return [sql for _, sql in objects]
+
+
+def suspend_triggers(cursor: sqlite3.Cursor, prefixes: Sequence[str] = BULK_LOAD_TRIGGERS) -> List[str]:
+    """Drop the derived-data triggers (those whose names start with one of prefixes)
+
+    Returns:
+        CREATE statements of the dropped triggers, for restore()
+    """
+    clauses = " OR ".join("name LIKE ?" for _ in prefixes)
+    return _drop(
+        cursor, "TRIGGER",
+        f"SELECT name, sql FROM main.sqlite_master WHERE type = 'trigger' AND ({clauses}) ORDER BY name",
+        [f"{prefix}%" for prefix in prefixes],
+    )
+
+
+def suspend_indexes(cursor: sqlite3.Cursor) -> List[str]:
+    """Drop the secondary indexes of the bulk-loaded tables
+
+    Returns:
+        CREATE statements of the dropped indexes, for restore()
+    """
+    tables = ", ".join("?" for _ in BULK_LOAD_TABLES)
+    # Automatic indexes (UNIQUE constraints) have no SQL and stay
+    return _drop(
+        cursor, "INDEX",
+        f"""SELECT name, sql FROM sqlite_master
+            WHERE type = 'index' AND sql IS NOT NULL AND tbl_name IN ({tables}) ORDER BY name""",
+        BULK_LOAD_TABLES,
+    )
+
+
+def next_post_id(cursor: sqlite3.Cursor) -> int:
+    """Id the next inserted post will get (AUTOINCREMENT never reuses ids)"""
+    cursor.execute("""
+        SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'posts'), 0),
+                   COALESCE((SELECT MAX(id) FROM posts), 0)) + 1
+    """)
+    return cursor.fetchone()[0]
+
+
+def tree_paths(cursor: sqlite3.Cursor, first_id: int,
+               parent_ids: Sequence[int]) -> List[Tuple[str, int]]:
+    """(path, depth) for posts about to be inserted as first_id, first_id + 1, ..."""
+    return post_paths(cursor, range(first_id, first_id + len(parent_ids)), parent_ids)
+
+
+def post_paths(cursor: sqlite3.Cursor, post_ids: Sequence[int],
+               parent_ids: Sequence[Optional[int]]) -> List[Tuple[str, int]]:
+    """(path, depth) for posts about to be inserted with the given ids
+
+    Matches what the posts_tree_insert trigger would store; parents may be
+    earlier rows of the same batch or existing posts.
+    """
+    batch = set(post_ids)
+    known: Dict[int, Tuple[str, int]] = {}
+    existing = sorted({parent for parent in parent_ids if parent is not None and parent not in batch})
+    for start in range(0, len(existing), 500):
+        chunk = existing[start:start + 500]
+        cursor.execute(
+            f"SELECT id, path, depth FROM posts WHERE id IN ({', '.join('?' for _ in chunk)})", chunk
+        )
+        for post_id, path, depth in cursor.fetchall():
+            known[post_id] = (path or "", depth or 0)
+
+    paths = []
+    for post_id, parent in zip(post_ids, parent_ids):
+        parent_path, parent_depth = known.get(parent, ("", -1))
+        entry = (f"{parent_path}{post_id:0{SEGMENT_WIDTH}d}/", parent_depth + 1)
+        known[post_id] = entry
+        paths.append(entry)
+    return paths
+
+
+def rebuild_derived(cursor: sqlite3.Cursor, marks: Dict[str, int],
+                    schemas: Sequence[str] = ("main",)) -> Dict[str, int]:
+    """Bring derived data up to date after rows were loaded without triggers
+
+    Tree paths and search entries are added for the new rows only;
+    counters and stats are recomputed set-based. Instead of one change
+    log row per loaded row, readers get a single reload change.
+
+    Args:
+        cursor: Cursor inside the rebuild transaction
+        marks: high_water_marks() taken before the load
+        schemas: Schemas counted towards counters and stats (see counters.py)
+
+    Returns:
+        Number of rows repaired per counter
+    """
+    cursor.execute(TREE_BACKFILL_SINCE_QUERY, {"since": marks["posts"]})
+
+    cursor.execute("""
+        INSERT INTO threads_fts(rowid, title, content)
+        SELECT id, title, body(content) FROM threads WHERE id > ?
+    """, (marks["threads"],))
+    cursor.execute("""
+        INSERT INTO posts_fts(rowid, content)
+        SELECT id, body(content) FROM posts WHERE id > ?
+    """, (marks["posts"],))
+
+    repaired = reconcile_counters(cursor, schemas)
+    reconcile_stats(cursor, schemas)
+    log_reload(cursor)
+    return repaired
+
+
+def restore(cursor: sqlite3.Cursor, statements: List[str]) -> None:
+    """Recreate objects dropped by suspend_triggers() or suspend_indexes()"""
+    for sql in statements:
+        cursor.execute(sql)
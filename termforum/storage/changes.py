@@ -0,0 +1,297 @@
+"""Change-data-capture log
+
+Triggers on users, categories, threads and posts append one row to the
+`changes` table per insert, update or delete, in the same transaction as
+the write itself. `seq` grows monotonically and commits in order (there
+is only one writer), so a reader that remembers the last seq it saw can
+ask for exactly what happened since.
+
+Soft-deletes are reported as deletes and restores as inserts, so readers
+never need to look at is_deleted. Updates to rows that stay soft-deleted,
+and the later purge of such rows, are not reported. Thread view counts
+are left out, since the batched view flush would otherwise log every
+viewed thread every few seconds.
+
+ChangeWatcher keeps its own read-only connection and polls
+`PRAGMA data_version`, which reads a counter from shared memory and
+touches no table. The log itself is only read after another connection
+has committed.
+
+In a sharded forum every shard keeps its own log. ForumWatcher runs one
+ChangeWatcher for the catalog and one per shard, picking up new shard
+files as they appear.
+"""
+
+import asyncio
+import sqlite3
+import threading
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from ..models import Change
+from .mapper import RowMapper
+from .pool import register_functions
+from .sharding import directory_stamp, shard_directory, shard_files
+
+
+CHANGE_MAPPER = RowMapper(Change, timestamps=("created_at",))
+
+# Rows read per query
+DEFAULT_BATCH_SIZE = 1000
+# Seconds between data_version polls
+DEFAULT_POLL_INTERVAL = 0.25
+
+# (entity, table, parent column, columns whose updates are reported, soft-deletable)
+CHANGE_SOURCES: List[Tuple[str, str, Optional[str], Tuple[str, ...], bool]] = [
+    ("user", "users", None,
+     ("username", "email", "bio", "avatar", "reputation", "is_admin", "is_banned",
+      "posts_count", "threads_count"), False),
+    ("category", "categories", None,
+     ("name", "slug", "description", "icon", "color", "position", "threads_count", "posts_count"), False),
+    ("thread", "threads", "category_id",
+     ("title", "content", "category_id", "posts_count", "upvotes", "downvotes", "is_pinned",
+      "is_locked", "is_deleted", "last_post_user_id", "last_post_at"), True),
+    ("post", "posts", "thread_id",
+     ("content", "upvotes", "downvotes", "is_deleted", "is_edited", "edit_reason"), True),
+]
+
+CHANGES_TABLE = """
+    CREATE TABLE IF NOT EXISTS changes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        entity TEXT NOT NULL,
+        entity_id INTEGER NOT NULL,
+        op TEXT NOT NULL,
+        parent_id INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+CHANGES_QUERY = """
+    SELECT seq, entity, entity_id, op, parent_id, created_at
+    FROM changes WHERE seq > ? ORDER BY seq LIMIT ?
+"""
+
+
+def change_triggers(entity: str, table: str, parent: Optional[str], columns: Tuple[str, ...],
+                    soft_delete: bool) -> List[str]:
+    """CREATE TRIGGER statements logging one table's writes"""
+    def log(row: str, op: str) -> str:
+        parent_id = f"{row}.{parent}" if parent else "NULL"
+        return (f"INSERT INTO changes (entity, entity_id, op, parent_id) "
+                f"VALUES ('{entity}', {row}.id, {op}, {parent_id});")
+
+    live = "WHEN {row}.is_deleted = 0" if soft_delete else ""
+    update_op = ("CASE WHEN old.is_deleted = new.is_deleted THEN 'update' "
+                 "WHEN new.is_deleted = 0 THEN 'insert' ELSE 'delete' END") if soft_delete else "'update'"
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS changes_{table}_insert AFTER INSERT ON {table}
+        {live.format(row="new")}
+        BEGIN
+            {log("new", "'insert'")}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS changes_{table}_update AFTER UPDATE OF {", ".join(columns)} ON {table}
+        {"WHEN old.is_deleted = 0 OR new.is_deleted = 0" if soft_delete else ""}
+        BEGIN
+            {log("new", update_op)}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS changes_{table}_delete AFTER DELETE ON {table}
+        {live.format(row="old")}
+        BEGIN
+            {log("old", "'delete'")}
+        END
+        """,
+    ]
+
+
+def create_changes_schema(cursor: sqlite3.Cursor) -> None:
+    """Create the change log table and its triggers"""
+    cursor.execute(CHANGES_TABLE)
+    for source in CHANGE_SOURCES:
+        for statement in change_triggers(*source):
+            cursor.execute(statement)
+
+
+def log_reload(cursor: sqlite3.Cursor) -> None:
+    """Tell readers to re-query everything (e.g. after writes that bypassed the triggers)"""
+    cursor.execute("INSERT INTO changes (entity, entity_id, op) VALUES ('forum', 0, 'reload')")
+
+
+def latest_seq(conn: sqlite3.Connection) -> int:
+    """seq of the newest change, or 0 if there is none"""
+    return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+
+
+def read_changes(conn: sqlite3.Connection, since: int,
+                 limit: int = DEFAULT_BATCH_SIZE) -> List[Change]:
+    """Changes after seq `since`, oldest first
+
+    If changes right after `since` were already pruned, the result starts
+    with a synthetic reload change instead.
+    """
+    cursor = conn.execute(CHANGES_QUERY, (since, limit))
+    changes = CHANGE_MAPPER.map(cursor.description, cursor.fetchall())
+    # seq never skips a value, so a hole after `since` means pruning
+    if since and changes and changes[0].seq > since + 1:
+        changes.insert(0, Change(changes[0].seq - 1, "forum", 0, "reload"))
+    return changes
+
+
+class ChangeWatcher:
+    """Polls a database for new changes from its own read-only connection"""
+
+    def __init__(self, db_path: str, since: Optional[int] = None,
+                 poll_interval: float = DEFAULT_POLL_INTERVAL, batch_size: int = DEFAULT_BATCH_SIZE):
+        """Initialize the watcher
+
+        Args:
+            db_path: Database file to watch (in-memory databases cannot be watched)
+            since: Last seq already seen; None starts from the newest change
+            poll_interval: Seconds between data_version polls
+            batch_size: Changes read per query
+        """
+        uri = f"{Path(db_path).resolve().as_uri()}?mode=ro"
+        self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        register_functions(self._conn)
+        self._lock = threading.Lock()
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+
+        self._version: Optional[int] = None
+        self.seq = latest_seq(self._conn) if since is None else since
+
+    def changed(self) -> bool:
+        """Whether another connection has committed since the last fetch()"""
+        with self._lock:
+            return self._data_version() != self._version
+
+    def _data_version(self) -> int:
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def fetch(self) -> List[Change]:
+        """Every change since the last fetch, oldest first"""
+        with self._lock:
+            # Read the version first: a commit landing mid-read is caught next time
+            self._version = self._data_version()
+            changes = []
+            while True:
+                batch = read_changes(self._conn, self.seq, self.batch_size)
+                if not batch:
+                    break
+                changes.extend(batch)
+                self.seq = batch[-1].seq
+                if len(batch) < self.batch_size:
+                    break
+            return changes
+
+    def poll(self) -> List[Change]:
+        """New changes, or an empty list without touching the log if nothing was committed"""
+        if not self.changed():
+            return []
+        return self.fetch()
+
+    def watch(self, stop: Optional[threading.Event] = None) -> Iterator[Change]:
+        """Yield changes as they are committed until stop is set"""
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            yield from self.poll()
+            stop.wait(self.poll_interval)
+
+    async def stream(self) -> AsyncIterator[List[Change]]:
+        """Yield each non-empty batch of new changes, reading the log off the event loop"""
+        while True:
+            if self.changed():
+                changes = await asyncio.to_thread(self.fetch)
+                if changes:
+                    yield changes
+            await asyncio.sleep(self.poll_interval)
+
+    def close(self) -> None:
+        """Close the watcher's connection"""
+        with self._lock:
+            self._conn.close()
+
+
+class ForumWatcher:
+    """Watches a forum's catalog and, in a sharded forum, each of its shards
+
+    Has the same poll/fetch/stream interface as ChangeWatcher. Each file
+    has its own seq, so changes from different files are returned in
+    file order rather than commit order.
+    """
+
+    def __init__(self, db_path: str, poll_interval: float = DEFAULT_POLL_INTERVAL,
+                 batch_size: int = DEFAULT_BATCH_SIZE):
+        """Initialize the watcher, starting from the newest change of every file
+
+        Args:
+            db_path: Catalog (or only) database file of the forum
+            poll_interval: Seconds between data_version polls
+            batch_size: Changes read per query
+        """
+        self.db_path = db_path
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self._watchers: Dict[str, ChangeWatcher] = {}
+        self._directory_version: Optional[int] = None
+        self._lock = threading.Lock()
+
+        self._watchers[db_path] = ChangeWatcher(db_path, poll_interval=poll_interval, batch_size=batch_size)
+        self._discover(since=None)
+
+    def _discover(self, since: Optional[int] = 0) -> None:
+        """Start watching shard files created since the last look
+
+        A stat of the shard directory tells whether anything was added, so
+        polls stay cheap (see directory_stamp). Shards found after start-up
+        are read from their first change.
+        """
+        stamp = directory_stamp(shard_directory(self.db_path))
+        if stamp is not None and stamp == self._directory_version:
+            return
+        self._directory_version = stamp
+        for path in map(str, shard_files(self.db_path)):
+            if path not in self._watchers:
+                self._watchers[path] = ChangeWatcher(path, since=since, poll_interval=self.poll_interval,
+                                                     batch_size=self.batch_size)
+
+    def changed(self) -> bool:
+        """Whether any watched file has been committed to since the last fetch()"""
+        with self._lock:
+            self._discover()
+            return any(watcher.changed() for watcher in self._watchers.values())
+
+    def fetch(self) -> List[Change]:
+        """Every change since the last fetch, oldest first within each file"""
+        with self._lock:
+            self._discover()
+            changes = []
+            for watcher in self._watchers.values():
+                if watcher.changed():
+                    changes.extend(watcher.fetch())
+            return changes
+
+    def poll(self) -> List[Change]:
+        """New changes, or an empty list if nothing was committed"""
+        if not self.changed():
+            return []
+        return self.fetch()
+
+    async def stream(self) -> AsyncIterator[List[Change]]:
+        """Yield each non-empty batch of new changes, reading the logs off the event loop"""
+        while True:
+            if self.changed():
+                changes = await asyncio.to_thread(self.fetch)
+                if changes:
+                    yield changes
+            await asyncio.sleep(self.poll_interval)
+
+    def close(self) -> None:
+        """Close every watcher's connection"""
+        with self._lock:
+            for watcher in self._watchers.values():
+                watcher.close()
@@ -0,0 +1,112 @@
+"""Compaction of stored thread and post bodies
+
+New bodies are compressed as they are written (see models/body.py).
+compact_bodies() brings existing rows in line with a threshold. It
+compresses long text bodies and re-encodes compressed ones, which turns
+those now under the threshold back into text. It works in short batches
+through the writer connection.
+
+The text of a compacted body does not change, so neither does anything
+derived from it. In the main schema each batch therefore runs with the
+derived-data triggers suspended, in the same transaction. That skips a
+pointless search re-index of every row and keeps compaction out of the
+change log. Archive tables have no triggers.
+"""
+
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Callable, ContextManager, Optional, Sequence
+
+from ..models.body import decode_body, encode_body, stored_size
+from .bulk import restore, suspend_triggers
+
+
+DEFAULT_COMPACT_BATCH = 500
+
+COMPACT_TABLES = ("threads", "posts")
+
+# Rows whose stored form may change: compressed ones, and text longer than the threshold
+CANDIDATES_QUERY = """
+    SELECT id, content FROM {schema}.{table}
+    WHERE id > ? AND (typeof(content) = 'blob' OR length(content) > ?)
+    ORDER BY id LIMIT ?
+"""
+
+
+@dataclass
+class CompactResult:
+    """Outcome of one compaction run"""
+
+    rows: int = 0
+    bytes_before: int = 0
+    bytes_after: int = 0
+    seconds: float = 0.0
+
+    @property
+    def saved(self) -> int:
+        """Bytes of body storage saved (negative if bodies were decompressed)"""
+        return self.bytes_before - self.bytes_after
+
+    def add(self, other: "CompactResult") -> None:
+        """Accumulate another run's counts"""
+        self.rows += other.rows
+        self.bytes_before += other.bytes_before
+        self.bytes_after += other.bytes_after
+
+
+def compact_bodies(write: Callable[[], ContextManager[sqlite3.Connection]], threshold: Optional[int],
+                   schemas: Sequence[str] = ("main",), batch_size: int = DEFAULT_COMPACT_BATCH,
+                   pause: float = 0.0,
+                   progress: Optional[Callable[[CompactResult], None]] = None) -> CompactResult:
+    """Re-encode every thread and post body for a compression threshold
+
+    Args:
+        write: ConnectionPool.write-style context manager for the writer connection
+        threshold: Compress bodies longer than this many characters (None decompresses all)
+        schemas: Schemas whose threads and posts are compacted
+        batch_size: Candidate rows examined per transaction
+        pause: Seconds to sleep between batches, letting other writers in
+        progress: Called with the running totals after each batch
+
+    Returns:
+        Rows rewritten and body bytes before and after
+    """
+    started = time.perf_counter()
+    result = CompactResult()
+
+    for schema in schemas:
+        for table in COMPACT_TABLES:
+            last_id = 0
+            while True:
+                with write() as conn:
+                    conn.execute("BEGIN IMMEDIATE")
+                    cursor = conn.cursor()
+                    cursor.execute(CANDIDATES_QUERY.format(schema=schema, table=table),
+                                   (last_id, threshold, batch_size))
+                    rows = cursor.fetchall()
+                    if not rows:
+                        break
+                    last_id = rows[-1][0]
+
+                    updates = []
+                    for row_id, stored in rows:
+                        encoded = encode_body(decode_body(stored), threshold)
+                        if encoded != stored:
+                            updates.append((encoded, row_id))
+                            result.bytes_before += stored_size(stored)
+                            result.bytes_after += stored_size(encoded)
+
+                    if updates:
+                        triggers = suspend_triggers(cursor) if schema == "main" else []
+                        cursor.executemany(f"UPDATE {schema}.{table} SET content = ? WHERE id = ?", updates)
+                        restore(cursor, triggers)
+                        result.rows += len(updates)
+
+                if progress is not None:
+                    progress(result)
+                if pause:
+                    time.sleep(pause)
+
+    result.seconds = time.perf_counter() - started
+    return result
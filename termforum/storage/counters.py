@@ -0,0 +1,314 @@
+"""Trigger-maintained denormalized counters
+
+`users.posts_count`, `users.threads_count`, `categories.threads_count`,
+`categories.posts_count` and `threads.posts_count` (plus the thread's
+last-post info) are kept current by SQLite triggers, so any INSERT or
+soft-delete keeps them right in the same statement. Only rows with
+is_deleted = 0 are counted; `threads.posts_count` includes the opening post
+and `categories.posts_count` counts replies in live threads.
+
+Archived threads and posts still count towards their users and
+categories. Archiving leaves the counters alone, and reconciling with
+the archive attached counts its rows too.
+
+Bulk inserts outside bulk_load() suspend the counter triggers for their
+transaction and apply one aggregate statement per counter instead (see
+count_batch()).
+"""
+
+import json
+import sqlite3
+from typing import Dict, List, Sequence
+
+
+COUNTER_SCHEMA: List[str] = [
+    # Threads
+    """
+    CREATE TRIGGER IF NOT EXISTS counters_threads_insert AFTER INSERT ON threads
+    WHEN new.is_deleted = 0
+    BEGIN
+        UPDATE users SET threads_count = threads_count + 1 WHERE id = new.user_id;
+        UPDATE categories SET threads_count = threads_count + 1 WHERE id = new.category_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS counters_threads_soft_delete AFTER UPDATE OF is_deleted ON threads
+    WHEN old.is_deleted != new.is_deleted
+    BEGIN
+        UPDATE users SET threads_count = threads_count + (CASE WHEN new.is_deleted = 0 THEN 1 ELSE -1 END)
+        WHERE id = new.user_id;
+        UPDATE categories
+        SET threads_count = threads_count + (CASE WHEN new.is_deleted = 0 THEN 1 ELSE -1 END),
+            posts_count = posts_count + (CASE WHEN new.is_deleted = 0 THEN 1 ELSE -1 END) * (new.posts_count - 1)
+        WHERE id = new.category_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS counters_threads_move AFTER UPDATE OF category_id ON threads
+    WHEN old.category_id != new.category_id AND new.is_deleted = 0
+    BEGIN
+        UPDATE categories SET threads_count = threads_count - 1, posts_count = posts_count - (new.posts_count - 1)
+        WHERE id = old.category_id;
+        UPDATE categories SET threads_count = threads_count + 1, posts_count = posts_count + (new.posts_count - 1)
+        WHERE id = new.category_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS counters_threads_delete AFTER DELETE ON threads
+    WHEN old.is_deleted = 0
+    BEGIN
+        UPDATE users SET threads_count = threads_count - 1 WHERE id = old.user_id;
+        UPDATE categories SET threads_count = threads_count - 1, posts_count = posts_count - (old.posts_count - 1)
+        WHERE id = old.category_id;
+    END
+    """,
+
+    # Posts (category counts only include replies in live threads)
+    """
+    CREATE TRIGGER IF NOT EXISTS counters_posts_insert AFTER INSERT ON posts
+    WHEN new.is_deleted = 0
+    BEGIN
+        UPDATE threads
+        SET posts_count = posts_count + 1,
+            last_post_user_id = CASE WHEN last_post_at IS NULL OR new.created_at >= last_post_at
+                                     THEN new.user_id ELSE last_post_user_id END,
+            last_post_at = MAX(COALESCE(last_post_at, new.created_at), new.created_at),
+            updated_at = MAX(COALESCE(updated_at, new.created_at), new.created_at)
+        WHERE id = new.thread_id;
+        UPDATE users SET posts_count = posts_count + 1 WHERE id = new.user_id;
+        UPDATE categories SET posts_count = posts_count + 1
+        WHERE id = (SELECT category_id FROM threads WHERE id = new.thread_id AND is_deleted = 0);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS counters_posts_soft_delete AFTER UPDATE OF is_deleted ON posts
+    WHEN old.is_deleted != new.is_deleted
+    BEGIN
+        UPDATE threads SET posts_count = posts_count + (CASE WHEN new.is_deleted = 0 THEN 1 ELSE -1 END)
+        WHERE id = new.thread_id;
+        UPDATE users SET posts_count = posts_count + (CASE WHEN new.is_deleted = 0 THEN 1 ELSE -1 END)
+        WHERE id = new.user_id;
+        UPDATE categories SET posts_count = posts_count + (CASE WHEN new.is_deleted = 0 THEN 1 ELSE -1 END)
+        WHERE id = (SELECT category_id FROM threads WHERE id = new.thread_id AND is_deleted = 0);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS counters_posts_delete AFTER DELETE ON posts
+    WHEN old.is_deleted = 0
+    BEGIN
+        UPDATE threads SET posts_count = posts_count - 1 WHERE id = old.thread_id;
+        UPDATE users SET posts_count = posts_count - 1 WHERE id = old.user_id;
+        UPDATE categories SET posts_count = posts_count - 1
+        WHERE id = (SELECT category_id FROM threads WHERE id = old.thread_id AND is_deleted = 0);
+    END
+    """,
+]
+
+# Columns the user and category counters read from threads and posts
+COUNTED_COLUMNS: Dict[str, str] = {
+    "threads": "id, user_id, category_id, is_deleted",
+    "posts": "id, thread_id, user_id, is_deleted",
+}
+
+# Set-based repairs: each statement recomputes one counter for every row
+# with a single GROUP BY and only touches rows that drifted. {threads} and
+# {posts} stand for the rows of every schema (see counted_rows())
+RECONCILE_QUERIES: Dict[str, str] = {
+    "users.threads_count": """
+        UPDATE users SET threads_count = agg.n
+        FROM (
+            SELECT u.id AS id, COUNT(t.id) AS n
+            FROM users u LEFT JOIN {threads} t ON t.user_id = u.id AND t.is_deleted = 0
+            GROUP BY u.id
+        ) AS agg
+        WHERE users.id = agg.id AND users.threads_count IS NOT agg.n
+    """,
+    "users.posts_count": """
+        UPDATE users SET posts_count = agg.n
+        FROM (
+            SELECT u.id AS id, COUNT(p.id) AS n
+            FROM users u LEFT JOIN {posts} p ON p.user_id = u.id AND p.is_deleted = 0
+            GROUP BY u.id
+        ) AS agg
+        WHERE users.id = agg.id AND users.posts_count IS NOT agg.n
+    """,
+    "categories.threads_count": """
+        UPDATE categories SET threads_count = agg.n
+        FROM (
+            SELECT c.id AS id, COUNT(t.id) AS n
+            FROM categories c LEFT JOIN {threads} t ON t.category_id = c.id AND t.is_deleted = 0
+            GROUP BY c.id
+        ) AS agg
+        WHERE categories.id = agg.id AND categories.threads_count IS NOT agg.n
+    """,
+    "categories.posts_count": """
+        UPDATE categories SET posts_count = agg.n
+        FROM (
+            SELECT c.id AS id, COUNT(p.id) AS n
+            FROM categories c
+            LEFT JOIN {threads} t ON t.category_id = c.id AND t.is_deleted = 0
+            LEFT JOIN {posts} p ON p.thread_id = t.id AND p.is_deleted = 0
+            GROUP BY c.id
+        ) AS agg
+        WHERE categories.id = agg.id AND categories.posts_count IS NOT agg.n
+    """,
+    "threads.posts_count": """
+        UPDATE threads SET posts_count = agg.n
+        FROM (
+            SELECT t.id AS id, 1 + COUNT(p.id) AS n
+            FROM threads t LEFT JOIN posts p ON p.thread_id = t.id AND p.is_deleted = 0
+            GROUP BY t.id
+        ) AS agg
+        WHERE threads.id = agg.id AND threads.posts_count IS NOT agg.n
+    """,
+    # Like the insert trigger, last-post info only moves forward and ties go to the newest post
+    "threads.last_post": """
+        UPDATE threads
+        SET last_post_at = agg.last_post_at,
+            last_post_user_id = (
+                SELECT user_id FROM posts
+                WHERE thread_id = agg.id AND is_deleted = 0 AND created_at = agg.last_post_at
+                ORDER BY id DESC LIMIT 1
+            ),
+            updated_at = MAX(COALESCE(threads.updated_at, agg.last_post_at), agg.last_post_at)
+        FROM (
+            SELECT thread_id AS id, MAX(created_at) AS last_post_at
+            FROM posts WHERE is_deleted = 0
+            GROUP BY thread_id
+        ) AS agg
+        WHERE threads.id = agg.id
+          AND (threads.last_post_at IS NULL OR threads.last_post_at < agg.last_post_at)
+    """,
+}
+
+
+# Name prefix of the counter triggers
+COUNTER_TRIGGERS = "counters_"
+
+# Per-batch increments matching what the insert triggers would have done
+# row by row. :ids is a JSON array of the batch's new row ids
+BATCH_QUERIES: Dict[str, List[str]] = {
+    "threads": [
+        """
+        UPDATE users SET threads_count = threads_count + agg.n
+        FROM (
+            SELECT user_id AS id, COUNT(*) AS n FROM threads
+            WHERE id IN (SELECT value FROM json_each(:ids)) AND is_deleted = 0
+            GROUP BY user_id
+        ) AS agg
+        WHERE users.id = agg.id
+        """,
+        """
+        UPDATE categories SET threads_count = threads_count + agg.n
+        FROM (
+            SELECT category_id AS id, COUNT(*) AS n FROM threads
+            WHERE id IN (SELECT value FROM json_each(:ids)) AND is_deleted = 0
+            GROUP BY category_id
+        ) AS agg
+        WHERE categories.id = agg.id
+        """,
+    ],
+    # Like the insert trigger, ties on created_at go to the later post
+    "posts": [
+        """
+        UPDATE threads
+        SET posts_count = threads.posts_count + agg.n,
+            last_post_user_id = CASE WHEN threads.last_post_at IS NULL OR agg.last_post_at >= threads.last_post_at
+                                     THEN agg.last_post_user_id ELSE threads.last_post_user_id END,
+            last_post_at = MAX(COALESCE(threads.last_post_at, agg.last_post_at), agg.last_post_at),
+            updated_at = MAX(COALESCE(threads.updated_at, agg.last_post_at), agg.last_post_at)
+        FROM (
+            SELECT thread_id AS id, COUNT(*) AS n, MAX(created_at) AS last_post_at,
+                   MAX(CASE WHEN newest = 1 THEN user_id END) AS last_post_user_id
+            FROM (
+                SELECT thread_id, user_id, created_at,
+                       ROW_NUMBER() OVER (PARTITION BY thread_id ORDER BY created_at DESC, id DESC) AS newest
+                FROM posts
+                WHERE id IN (SELECT value FROM json_each(:ids)) AND is_deleted = 0
+            )
+            GROUP BY thread_id
+        ) AS agg
+        WHERE threads.id = agg.id
+        """,
+        """
+        UPDATE users SET posts_count = posts_count + agg.n
+        FROM (
+            SELECT user_id AS id, COUNT(*) AS n FROM posts
+            WHERE id IN (SELECT value FROM json_each(:ids)) AND is_deleted = 0
+            GROUP BY user_id
+        ) AS agg
+        WHERE users.id = agg.id
+        """,
+        """
+        UPDATE categories SET posts_count = posts_count + agg.n
+        FROM (
+            SELECT t.category_id AS id, COUNT(*) AS n
+            FROM posts p JOIN threads t ON t.id = p.thread_id AND t.is_deleted = 0
+            WHERE p.id IN (SELECT value FROM json_each(:ids)) AND p.is_deleted = 0
+            GROUP BY t.category_id
+        ) AS agg
+        WHERE categories.id = agg.id
+        """,
+    ],
+}
+
+
+def create_counter_schema(cursor: sqlite3.Cursor) -> None:
+    """Create the counter maintenance triggers, repairing counters on first creation"""
+    cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'counters_%'")
+    existed = cursor.fetchone()[0] == len(COUNTER_SCHEMA)
+
+    for statement in COUNTER_SCHEMA:
+        cursor.execute(statement)
+
+    if not existed:
+        reconcile_counters(cursor)
+
+
+def counted_rows(table: str, schemas: Sequence[str] = ("main",)) -> str:
+    """FROM-clause source of a table's rows over every schema (main and the archive)
+
+    An archive copy of a row that is still in main (left by an interrupted
+    archive run) is counted once.
+    """
+    if len(schemas) == 1:
+        return table
+    columns = COUNTED_COLUMNS[table]
+    return "(" + " UNION ALL ".join(
+        f"SELECT {columns} FROM {schema}.{table}" if schema == "main" else
+        f"SELECT {columns} FROM {schema}.{table} WHERE id NOT IN (SELECT id FROM main.{table})"
+        for schema in schemas
+    ) + ")"
+
+
+def reconcile_counters(cursor: sqlite3.Cursor, schemas: Sequence[str] = ("main",)) -> Dict[str, int]:
+    """Recompute every denormalized counter from the base tables
+
+    Args:
+        cursor: Cursor inside the repair transaction
+        schemas: Schemas holding threads and posts (main, and the archive if attached)
+
+    Returns:
+        Number of rows repaired per counter
+    """
+    sources = {table: counted_rows(table, schemas) for table in COUNTED_COLUMNS}
+    repaired = {}
+    for name, query in RECONCILE_QUERIES.items():
+        cursor.execute(query.format(**sources))
+        repaired[name] = cursor.rowcount
+    return repaired
+
+
+def count_batch(cursor: sqlite3.Cursor, table: str, ids: Sequence[int]) -> None:
+    """Add a batch of new threads or posts to the counters
+
+    Only for rows inserted while the counter triggers were suspended.
+
+    Args:
+        cursor: Cursor inside the inserting transaction
+        table: "threads" or "posts"
+        ids: Ids of the batch's new rows
+    """
+    params = {"ids": json.dumps(list(ids))}
+    for query in BATCH_QUERIES[table]:
+        cursor.execute(query, params)
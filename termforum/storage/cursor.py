@@ -0,0 +1,50 @@
+"""Opaque pagination cursors for keyset (seek) paging
+
+A cursor records the sort key of the last row on a page. The next page
+resumes strictly after that key, so every page costs the same index seek
+no matter how deep it is.
+"""
+
+import base64
+import json
+from typing import Any, Optional, Sequence, Tuple
+
+
+def encode_cursor(key: Sequence[Any]) -> str:
+    """Encode a sort key as an opaque URL-safe token
+
+    Args:
+        key: Sort key values of the last row on the page
+
+    Returns:
+        Opaque cursor string
+    """
+    raw = json.dumps(list(key), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], size: int) -> Optional[Tuple[Any, ...]]:
+    """Decode a cursor produced by encode_cursor
+
+    Args:
+        cursor: Cursor string, or None for the first page
+        size: Expected number of key values
+
+    Returns:
+        Sort key tuple, or None if cursor is None
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    if cursor is None:
+        return None
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+    if not isinstance(key, list) or len(key) != size:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return tuple(key)
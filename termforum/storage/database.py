@@ -1,136 +1,223 @@
 """SQLite database manager for TermForum"""
 
 import sqlite3
+from contextlib import ExitStack, contextmanager
+from dataclasses import replace
+from functools import partial
+from itertools import islice
 from pathlib import Path
-from typing import List, Optional, Tuple, Dict
+from typing import Any, Callable, Iterable, Iterator, List, Mapping, Optional, Tuple, Dict
 from datetime import datetime
-from ..models import User, Category, Thread, Post
+from ..models import User, Category, Thread, ThreadSummary, Post, PostRow, SearchResult, Change
+from ..models.body import DEFAULT_COMPRESS_THRESHOLD, Body, encode_body
+from .pool import ConnectionPool
+from .cursor import encode_cursor, decode_cursor
+from .search import build_match_query, index_compressed, rebuild_search_index, search_query
+from .identity_map import IdentityMap
+from .post_tree import subtree_range
+from .counters import COUNTER_TRIGGERS, count_batch, reconcile_counters
+from .bulk import (high_water_marks, next_post_id, rebuild_derived, restore, suspend_indexes,
+                   suspend_triggers, tree_paths)
+from .stats import read_stats, reconcile_stats
+from .view_counter import ViewCounter
+from .changes import ChangeWatcher, latest_seq, read_changes
+from .archive import (ARCHIVE_SCHEMA, DEFAULT_CHUNK_POSTS, DEFAULT_CHUNK_THREADS, ArchiveResult,
+                      archive_threads, create_archive_schema)
+from .compression import DEFAULT_COMPACT_BATCH, CompactResult, compact_bodies
+from .sharding import ShardRouter, merge_pages, parse_sharding, search_key, shard_of, thread_key
+from .maintenance import (DEFAULT_RETENTION_DAYS, DEFAULT_STEP_MS, MaintenanceReport, MaintenanceScheduler,
+                          enable_incremental_vacuum)
+from .mapper import RowMapper
+from .epoch import EPOCH_COLUMNS, to_epoch
+from .migrations import migrate
+from .instrumentation import QueryStats
+
+
+# One mapper per model; each works out a result shape's column positions once
+# User, category and thread timestamps are LazyTimestamps, decoded on first read
+USER_MAPPER = RowMapper(User, flags=("is_admin", "is_banned"))
+CATEGORY_MAPPER = RowMapper(Category)
+THREAD_MAPPER = RowMapper(Thread, flags=("is_pinned", "is_locked", "is_deleted"),
+                          epochs=EPOCH_COLUMNS["threads"])
+SUMMARY_MAPPER = RowMapper(ThreadSummary, flags=("is_pinned", "is_locked"),
+                           epochs=EPOCH_COLUMNS["threads"])
+POST_MAPPER = RowMapper(Post, timestamps=("created_at", "updated_at"), flags=("is_deleted", "is_edited"),
+                        epochs=EPOCH_COLUMNS["posts"], converters={"depth": lambda depth: depth or 0})
+SEARCH_RESULT_MAPPER = RowMapper(SearchResult, timestamps=("created_at",))
+
+# posts.content CHECK limit, in characters (see schema.py)
+MAX_POST_LENGTH = 10000
 
 
 class Database:
-    """SQLite database manager"""
-
-    def __init__(self, db_path: str = None):
-        """Initialize database connection"""
+    """SQLite database manager
+
+    Runs in WAL mode: reads go through a pool of read-only connections
+    while all writes are serialized through a single writer connection.
+    """
+
+    def __init__(self, db_path: str = None, pool_size: int = 4,
+                 pragmas: Optional[Dict[str, Any]] = None,
+                 view_flush_interval: Optional[float] = 5.0, view_flush_every: int = 100,
+                 identity_map_size: int = 1024, query_stats: Optional[QueryStats] = None,
+                 maintenance_interval: Optional[float] = None, maintenance_step_ms: float = DEFAULT_STEP_MS,
+                 retention_days: Optional[float] = DEFAULT_RETENTION_DAYS, archive_path: Optional[str] = None,
+                 sharding: Optional[str] = None, default_categories: bool = True,
+                 compress_threshold: Optional[int] = DEFAULT_COMPRESS_THRESHOLD):
+        """Initialize database connection
+
+        Args:
+            db_path: Path to database file. Defaults to ~/.termforum/forum.db
+            pool_size: Maximum number of reader connections
+            pragmas: Pragma overrides (synchronous, cache_size, mmap_size, busy_timeout, ...)
+            view_flush_interval: Seconds between batched view counter flushes
+            view_flush_every: Flush view counters after this many pending views
+            identity_map_size: Maximum cached User/Category objects
+            query_stats: Record per-query timings and slow queries here (opt-in)
+            maintenance_interval: Seconds between background maintenance passes (None disables them)
+            maintenance_step_ms: Time budget of each maintenance step
+            retention_days: Purge soft-deleted rows older than this (None keeps them)
+            archive_path: Archive database to attach for cold threads (None disables archiving)
+            sharding: Store threads and posts in shard files, "category" or "hash:N"
+                (only for a database without threads; later opens read it from the catalog)
+            default_categories: Create the default categories in a new database
+            compress_threshold: Store bodies longer than this many characters compressed
+                (None stores every body as text)
+        """
         if db_path is None:
             db_path = str(Path.home() / ".termforum" / "forum.db")
 
         self.db_path = db_path
-        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        if db_path != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.pool_size = pool_size
+        self.pragmas = pragmas
+        self.query_stats = query_stats
+        self.archive_path = archive_path
+        self.compress_threshold = compress_threshold
+        # Schemas holding threads and posts, hot first
+        self._schemas = ("main", ARCHIVE_SCHEMA) if archive_path else ("main",)
+        self._search_sql = search_query(self._schemas)
+        self.pool = None
         self.conn = None
+        # Set inside bulk_load(), while the derived-data triggers are suspended
+        self.bulk_loading = False
+        self.default_categories = default_categories
+        # Routes threads and posts to their shard in a sharded forum (None otherwise)
+        self.router: Optional[ShardRouter] = None
+        self.views = ViewCounter(self._write, flush_interval=view_flush_interval,
+                                 flush_every=view_flush_every, schemas=self._schemas)
+        self.maintenance = MaintenanceScheduler(
+            self._write, interval=maintenance_interval, step_ms=maintenance_step_ms,
+            retention_days=retention_days, paused=lambda: self.bulk_loading,
+            on_purge=self._invalidate_counters,
+        )
         self.connect()
-        self.init_schema()
+        self.identity_map = IdentityMap(self.pool.foreign_version, max_size=identity_map_size)
+        try:
+            self.init_schema()
+            self._init_sharding(sharding, dict(
+                pool_size=pool_size, pragmas=pragmas, view_flush_interval=view_flush_interval,
+                view_flush_every=view_flush_every, identity_map_size=identity_map_size,
+                query_stats=query_stats, maintenance_interval=maintenance_interval,
+                maintenance_step_ms=maintenance_step_ms, retention_days=retention_days,
+                compress_threshold=compress_threshold,
+            ))
+        except BaseException:
+            self.close()
+            raise
+        self.maintenance.start()
+
+    def __enter__(self) -> "Database":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
 
     def connect(self) -> None:
         """Connect to database"""
-        self.conn = sqlite3.connect(self.db_path)
-        self.conn.row_factory = sqlite3.Row
-        # Enable foreign keys
-        self.conn.execute("PRAGMA foreign_keys = ON")
+        attachments = {ARCHIVE_SCHEMA: self.archive_path} if self.archive_path else None
+        self.pool = ConnectionPool(self.db_path, size=self.pool_size, pragmas=self.pragmas,
+                                   stats=self.query_stats, attachments=attachments)
+        # Writer connection, kept as `conn` for callers that need raw access
+        self.conn = self.pool.writer
 
     def close(self) -> None:
         """Close database connection"""
-        if self.conn:
-            self.conn.close()
+        if self.pool:
+            if self.router is not None:
+                self.router.close()
+            self.maintenance.close()
+            self.views.close()
+            self.pool.close()
+
+    def _read(self):
+        """Borrow a pooled read-only connection"""
+        return self.pool.read()
+
+    def _write(self):
+        """Borrow the writer connection inside a transaction"""
+        return self.pool.write()
 
     def init_schema(self) -> None:
-        """Initialize database schema"""
-        cursor = self.conn.cursor()
-
-        # Users table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL CHECK(length(username) >= 3 AND length(username) <= 20),
-                email TEXT UNIQUE,
-                bio TEXT CHECK(length(bio) <= 500),
-                avatar TEXT DEFAULT '👤',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                posts_count INTEGER DEFAULT 0,
-                threads_count INTEGER DEFAULT 0,
-                reputation INTEGER DEFAULT 0,
-                is_admin BOOLEAN DEFAULT 0,
-                is_banned BOOLEAN DEFAULT 0,
-                last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-
-        # Categories table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS categories (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT UNIQUE NOT NULL,
-                slug TEXT UNIQUE NOT NULL,
-                description TEXT,
-                icon TEXT DEFAULT '📁',
-                color TEXT DEFAULT '#3B82F6',
-                position INTEGER DEFAULT 0,
-                threads_count INTEGER DEFAULT 0,
-                posts_count INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-
-        # Threads table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS threads (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL CHECK(length(title) >= 3 AND length(title) <= 200),
-                slug TEXT UNIQUE NOT NULL,
-                category_id INTEGER NOT NULL,
-                user_id INTEGER NOT NULL,
-                content TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                view_count INTEGER DEFAULT 0,
-                posts_count INTEGER DEFAULT 1,
-                upvotes INTEGER DEFAULT 0,
-                downvotes INTEGER DEFAULT 0,
-                is_pinned BOOLEAN DEFAULT 0,
-                is_locked BOOLEAN DEFAULT 0,
-                is_deleted BOOLEAN DEFAULT 0,
-                last_post_user_id INTEGER,
-                last_post_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (category_id) REFERENCES categories(id) ON DELETE CASCADE,
-                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-                FOREIGN KEY (last_post_user_id) REFERENCES users(id) ON DELETE SET NULL
-            )
-        """)
-
-        # Posts table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS posts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                thread_id INTEGER NOT NULL,
-                user_id INTEGER NOT NULL,
-                parent_post_id INTEGER,
-                content TEXT NOT NULL CHECK(length(content) <= 10000),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                upvotes INTEGER DEFAULT 0,
-                downvotes INTEGER DEFAULT 0,
-                is_deleted BOOLEAN DEFAULT 0,
-                is_edited BOOLEAN DEFAULT 0,
-                edit_reason TEXT,
-                FOREIGN KEY (thread_id) REFERENCES threads(id) ON DELETE CASCADE,
-                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-                FOREIGN KEY (parent_post_id) REFERENCES posts(id) ON DELETE CASCADE
-            )
-        """)
-
-        # Create indexes
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_username ON users(username)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_threads_category ON threads(category_id, is_deleted, is_pinned DESC, updated_at DESC)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_posts_thread ON posts(thread_id, is_deleted, created_at ASC)")
-
-        self.conn.commit()
+        """Apply pending schema migrations and create default categories"""
+        self.applied_migrations = migrate(self.pool)
+        if self.archive_path:
+            with self._write() as conn:
+                create_archive_schema(conn.cursor())
 
         # Create default categories if empty
-        cursor.execute("SELECT COUNT(*) FROM categories")
-        if cursor.fetchone()[0] == 0:
+        with self._read() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM categories")
+            empty = cursor.fetchone()[0] == 0
+        if empty and self.default_categories:
             self._create_default_categories()
 
+    def _init_sharding(self, sharding: Optional[str], options: Dict[str, Any]) -> None:
+        """Record the sharding mode of a new sharded forum, and start routing if there is one
+
+        Args:
+            sharding: Requested mode, or None to use the stored one
+            options: Constructor arguments shared with the shard databases
+        """
+        with self._read() as conn:
+            stored = conn.execute("SELECT mode, buckets FROM shard_config WHERE id = 1").fetchone()
+            has_threads = conn.execute("SELECT EXISTS (SELECT 1 FROM threads)").fetchone()[0]
+
+        if sharding is not None:
+            mode, buckets = parse_sharding(sharding)
+            if stored is None:
+                if has_threads:
+                    raise ValueError("Sharding can only be enabled on a database without threads")
+                with self._write() as conn:
+                    conn.execute("INSERT INTO shard_config (id, mode, buckets) VALUES (1, ?, ?)",
+                                 (mode, buckets))
+                stored = (mode, buckets)
+            elif tuple(stored) != (mode, buckets):
+                raise ValueError(f"Database is already sharded by {stored[0]}")
+
+        if stored is not None:
+            if self.archive_path:
+                raise ValueError("Archiving is not supported in a sharded database")
+            self.router = ShardRouter(self, stored[0], stored[1],
+                                      partial(Database, default_categories=False, **options))
+
+    def _body(self, content: str, limit: Optional[int] = None) -> Body:
+        """Stored form of a thread or post body
+
+        Bodies over limit stay text, so the column's length CHECK still rejects them.
+        """
+        if limit is not None and len(content) > limit:
+            return content
+        return encode_body(content, self.compress_threshold)
+
+    def _shard(self, row_id: int) -> Optional["Database"]:
+        """Shard holding a thread or post, or None to look in this database"""
+        if self.router is None:
+            return None
+        return self.router.for_id(row_id)
+
     def _create_default_categories(self) -> None:
         """Create default categories"""
         default_categories = [
@@ -149,121 +236,159 @@ class Database:
 
     def create_user(self, username: str, **kwargs) -> User:
         """Create a new user"""
-        cursor = self.conn.cursor()
-
         email = kwargs.get("email")
         bio = kwargs.get("bio")
         avatar = kwargs.get("avatar", "👤")
         is_admin = kwargs.get("is_admin", False)
+        password_hash = kwargs.get("password_hash")
 
-        cursor.execute("""
-            INSERT INTO users (username, email, bio, avatar, is_admin)
-            VALUES (?, ?, ?, ?, ?)
-        """, (username, email, bio, avatar, is_admin))
+        with self._write() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO users (username, email, bio, avatar, is_admin, password_hash)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (username, email, bio, avatar, is_admin, password_hash))
+            user_id = cursor.lastrowid
 
-        self.conn.commit()
-        user_id = cursor.lastrowid
         return self.get_user(user_id)
 
     def get_user(self, user_id: int) -> Optional[User]:
         """Get user by ID"""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
-        row = cursor.fetchone()
-
-        if row:
-            return User(
-                id=row["id"],
-                username=row["username"],
-                email=row["email"],
-                bio=row["bio"],
-                avatar=row["avatar"],
-                created_at=datetime.fromisoformat(row["created_at"]),
-                updated_at=datetime.fromisoformat(row["updated_at"]),
-                posts_count=row["posts_count"],
-                threads_count=row["threads_count"],
-                reputation=row["reputation"],
-                is_admin=bool(row["is_admin"]),
-                is_banned=bool(row["is_banned"]),
-                last_seen=datetime.fromisoformat(row["last_seen"]),
-            )
-        return None
+        user = self.identity_map.get("user", user_id)
+        if user is None:
+            generation = self.identity_map.generation()
+            with self._read() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
+                user = USER_MAPPER.map_one(cursor.description, cursor.fetchone())
+            if user is None:
+                return None
+            user = self._cache_user(user, generation)
+
+        return self._with_shard_counts("users", [user])[0]
 
     def get_user_by_username(self, username: str) -> Optional[User]:
         """Get user by username"""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM users WHERE username = ?", (username,))
-        row = cursor.fetchone()
-
-        if row:
-            return self.get_user(row["id"])
+        user_id = self.identity_map.get("username", username)
+        if user_id is not None:
+            return self.get_user(user_id)
+
+        generation = self.identity_map.generation()
+        with self._read() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM users WHERE username = ?", (username,))
+            user = USER_MAPPER.map_one(cursor.description, cursor.fetchone())
+
+        if user:
+            return self._with_shard_counts("users", [self._cache_user(user, generation)])[0]
         return None
 
+    def _cache_user(self, user: User, generation: int) -> User:
+        """Store a user in the identity map under its id and username"""
+        self.identity_map.put("username", user.username, user.id, generation)
+        return self.identity_map.put("user", user.id, user, generation)
+
+    def _with_shard_counts(self, table: str, rows: List[Any]) -> List[Any]:
+        """Add the shards' share of the counters to catalog users or categories
+
+        Returns copies, so cached objects keep the catalog's own counts.
+        """
+        if self.router is None:
+            return rows
+        return self.router.with_counts(table, rows)
+
     # ════════════════════════════════════════════
     # CATEGORY OPERATIONS
     # ════════════════════════════════════════════
 
     def create_category(self, name: str, **kwargs) -> Category:
         """Create a new category"""
-        cursor = self.conn.cursor()
-
         slug = kwargs.get("slug", name.lower().replace(" ", "-"))
         description = kwargs.get("description")
         icon = kwargs.get("icon", "📁")
         color = kwargs.get("color", "#3B82F6")
         position = kwargs.get("position", 0)
 
-        cursor.execute("""
-            INSERT INTO categories (name, slug, description, icon, color, position)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (name, slug, description, icon, color, position))
+        with self._write() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO categories (name, slug, description, icon, color, position)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (name, slug, description, icon, color, position))
+            category_id = cursor.lastrowid
 
-        self.conn.commit()
-        category_id = cursor.lastrowid
+        self.identity_map.invalidate("categories")
         return self.get_category(category_id)
 
     def get_category(self, category_id: int) -> Optional[Category]:
         """Get category by ID"""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM categories WHERE id = ?", (category_id,))
-        row = cursor.fetchone()
-
-        if row:
-            return Category(
-                id=row["id"],
-                name=row["name"],
-                slug=row["slug"],
-                description=row["description"],
-                icon=row["icon"],
-                color=row["color"],
-                position=row["position"],
-                threads_count=row["threads_count"],
-                posts_count=row["posts_count"],
-                created_at=datetime.fromisoformat(row["created_at"]),
-            )
-        return None
+        category = self.identity_map.get("category", category_id)
+        if category is None:
+            generation = self.identity_map.generation()
+            with self._read() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT * FROM categories WHERE id = ?", (category_id,))
+                category = CATEGORY_MAPPER.map_one(cursor.description, cursor.fetchone())
+            if category is None:
+                return None
+            self.identity_map.put("category", category_id, category, generation)
+
+        return self._with_shard_counts("categories", [category])[0]
 
     def list_categories(self) -> List[Category]:
         """List all categories"""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM categories ORDER BY position ASC")
-
-        categories = []
-        for row in cursor.fetchall():
-            categories.append(Category(
-                id=row["id"],
-                name=row["name"],
-                slug=row["slug"],
-                description=row["description"],
-                icon=row["icon"],
-                color=row["color"],
-                position=row["position"],
-                threads_count=row["threads_count"],
-                posts_count=row["posts_count"],
-                created_at=datetime.fromisoformat(row["created_at"]),
-            ))
+        categories = self.identity_map.get("categories", None)
+        if categories is None:
+            generation = self.identity_map.generation()
+            with self._read() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT * FROM categories ORDER BY position ASC")
+                categories = CATEGORY_MAPPER.map(cursor.description, cursor.fetchall())
+
+            self.identity_map.put("categories", None, categories, generation)
+            for category in categories:
+                self.identity_map.put("category", category.id, category, generation)
+
+        return self._with_shard_counts("categories", categories)
+
+    def _invalidate_counters(self, user_id: int = None, category_id: int = None) -> None:
+        """Drop cached rows whose trigger-maintained counters just changed
+
+        Args:
+            user_id: Author whose counters changed, or None for every user
+            category_id: Category whose counters changed, or None for every category
+        """
+        self.identity_map.invalidate("user", user_id)
+        self.identity_map.invalidate("user_counts", user_id)
+        self.identity_map.invalidate("category", category_id)
+        self.identity_map.invalidate("category_counts", category_id)
+        self.identity_map.invalidate("categories")
 
-        return categories
+    def _counters(self, table: str, ids: List[int]) -> Dict[int, Tuple[int, int]]:
+        """threads_count and posts_count of users or categories, cached like the rows
+
+        A shard answers this for its catalog (ShardRouter.with_counts). Ids
+        missing from this database count as zero.
+        """
+        kind = "user_counts" if table == "users" else "category_counts"
+        counts = {}
+        for row_id in ids:
+            cached = self.identity_map.get(kind, row_id)
+            if cached is not None:
+                counts[row_id] = tuple(cached)
+        missing = [row_id for row_id in ids if row_id not in counts]
+        if not missing:
+            return counts
+
+        generation = self.identity_map.generation()
+        with self._read() as conn:
+            found = {row[0]: (row[1], row[2]) for row in conn.execute(f"""
+                SELECT id, threads_count, posts_count FROM {table}
+                WHERE id IN ({", ".join("?" for _ in missing)})
+            """, missing)}
+        for row_id in missing:
+            counts[row_id] = self.identity_map.put(kind, row_id, found.get(row_id, (0, 0)), generation)
+        return counts
 
     # ════════════════════════════════════════════
     # THREAD OPERATIONS
@@ -273,73 +398,63 @@ class Database:
         """Create a new thread"""
         from slugify import slugify
 
-        cursor = self.conn.cursor()
-        slug = kwargs.get("slug", slugify(title))
-
-        cursor.execute("""
-            INSERT INTO threads (title, slug, category_id, user_id, content, last_post_user_id)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (title, slug, category_id, user_id, content, user_id))
-
-        # Update user threads_count
-        cursor.execute("UPDATE users SET threads_count = threads_count + 1 WHERE id = ?", (user_id,))
+        if self.router is not None:
+            shard = self.router.for_category(category_id, create=True)
+            self.router.mirror(shard, [user_id], [category_id])
+            return shard.create_thread(title, content, user_id, category_id, **kwargs)
 
-        # Update category threads_count
-        cursor.execute("UPDATE categories SET threads_count = threads_count + 1 WHERE id = ?", (category_id,))
+        slug = kwargs.get("slug", slugify(title))
 
-        self.conn.commit()
-        thread_id = cursor.lastrowid
+        stored = self._body(content)
+        with self._write() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO threads (title, slug, category_id, user_id, content, last_post_user_id)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (title, slug, category_id, user_id, stored, user_id))
+            # User and category threads_count are maintained by triggers
+            thread_id = cursor.lastrowid
+            index_compressed(cursor, "threads", [(thread_id, content, stored)])
+
+        self._invalidate_counters(user_id, category_id)
         return self.get_thread(thread_id, increment_views=False)
 
     def get_thread(self, thread_id: int, increment_views: bool = True) -> Optional[Thread]:
         """Get thread by ID"""
-        cursor = self.conn.cursor()
+        shard = self._shard(thread_id)
+        if shard is not None:
+            return shard.get_thread(thread_id, increment_views)
 
         if increment_views:
-            cursor.execute("UPDATE threads SET view_count = view_count + 1 WHERE id = ?", (thread_id,))
-            self.conn.commit()
-
-        cursor.execute("""
-            SELECT t.*, c.name as category_name, c.icon as category_icon,
-                   u.username as user_name, u.avatar as user_avatar
-            FROM threads t
-            JOIN categories c ON t.category_id = c.id
-            JOIN users u ON t.user_id = u.id
-            WHERE t.id = ?
-        """, (thread_id,))
-
-        row = cursor.fetchone()
-
-        if row:
-            return Thread(
-                id=row["id"],
-                title=row["title"],
-                slug=row["slug"],
-                category_id=row["category_id"],
-                user_id=row["user_id"],
-                content=row["content"],
-                created_at=datetime.fromisoformat(row["created_at"]),
-                updated_at=datetime.fromisoformat(row["updated_at"]),
-                view_count=row["view_count"],
-                posts_count=row["posts_count"],
-                upvotes=row["upvotes"],
-                downvotes=row["downvotes"],
-                is_pinned=bool(row["is_pinned"]),
-                is_locked=bool(row["is_locked"]),
-                is_deleted=bool(row["is_deleted"]),
-                last_post_user_id=row["last_post_user_id"],
-                last_post_at=datetime.fromisoformat(row["last_post_at"]),
-                category_name=row["category_name"],
-                category_icon=row["category_icon"],
-                user_name=row["user_name"],
-                user_avatar=row["user_avatar"],
-            )
+            self.views.increment(thread_id)
+
+        with self._read() as conn:
+            cursor = conn.cursor()
+            # Archived threads are only looked up once the hot table misses
+            for schema in self._schemas:
+                cursor.execute(f"""
+                    SELECT t.*, c.name as category_name, c.icon as category_icon,
+                           u.username as user_name, u.avatar as user_avatar
+                    FROM {schema}.threads t
+                    JOIN categories c ON t.category_id = c.id
+                    JOIN users u ON t.user_id = u.id
+                    WHERE t.id = ?
+                """, (thread_id,))
+                thread = THREAD_MAPPER.map_one(cursor.description, cursor.fetchone())
+                if thread:
+                    break
+
+        if thread:
+            return self._merge_pending_views([thread])[0]
         return None
 
     def list_threads(self, category_id: int = None, user_id: int = None,
                      limit: int = 50, offset: int = 0) -> List[Thread]:
         """List threads with optional filters"""
-        cursor = self.conn.cursor()
+        if self.router is not None:
+            pages = [shard.list_threads(category_id, user_id, offset + limit)
+                     for shard in self._listing_shards(category_id)]
+            return merge_pages(pages, thread_key, offset + limit, reverse=True)[offset:]
 
         query = """
             SELECT t.*, c.name as category_name, c.icon as category_icon,
@@ -359,37 +474,163 @@ class Database:
             query += " AND t.user_id = ?"
             params.append(user_id)
 
-        query += " ORDER BY t.is_pinned DESC, t.updated_at DESC LIMIT ? OFFSET ?"
+        query += " ORDER BY t.is_pinned DESC, t.updated_epoch DESC LIMIT ? OFFSET ?"
         params.extend([limit, offset])
 
-        cursor.execute(query, params)
-
-        threads = []
-        for row in cursor.fetchall():
-            threads.append(Thread(
-                id=row["id"],
-                title=row["title"],
-                slug=row["slug"],
-                category_id=row["category_id"],
-                user_id=row["user_id"],
-                content=row["content"],
-                created_at=datetime.fromisoformat(row["created_at"]),
-                updated_at=datetime.fromisoformat(row["updated_at"]),
-                view_count=row["view_count"],
-                posts_count=row["posts_count"],
-                upvotes=row["upvotes"],
-                downvotes=row["downvotes"],
-                is_pinned=bool(row["is_pinned"]),
-                is_locked=bool(row["is_locked"]),
-                is_deleted=bool(row["is_deleted"]),
-                last_post_user_id=row["last_post_user_id"],
-                last_post_at=datetime.fromisoformat(row["last_post_at"]),
-                category_name=row["category_name"],
-                category_icon=row["category_icon"],
-                user_name=row["user_name"],
-                user_avatar=row["user_avatar"],
-            ))
+        with self._read() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            threads = THREAD_MAPPER.map(cursor.description, cursor.fetchall())
+
+        return self._merge_pending_views(threads)
+
+    # Columns for list views: everything except the thread body (timestamps as epochs)
+    THREAD_SUMMARY_COLUMNS = """
+        t.id, t.title, t.slug, t.category_id, t.user_id, t.created_epoch, t.updated_epoch,
+        t.view_count, t.posts_count, t.upvotes, t.downvotes, t.is_pinned, t.is_locked,
+        t.last_post_user_id, t.last_post_epoch
+    """
+
+    def list_threads_page(self, category_id: int = None, user_id: int = None,
+                          limit: int = 50, cursor: str = None,
+                          since: datetime = None) -> Tuple[List[Thread], Optional[str]]:
+        """List threads using keyset pagination
+
+        Args:
+            category_id: Only threads in this category
+            user_id: Only threads started by this user
+            limit: Page size
+            cursor: Cursor returned by the previous page, or None for the first page
+            since: Only threads updated at or after this time (naive = UTC)
+
+        Returns:
+            (threads, next_cursor) - next_cursor is None on the last page
+        """
+        threads, next_cursor = self._thread_page(THREAD_MAPPER, "t.*", category_id, user_id,
+                                                 limit, cursor, since)
+        return self._merge_pending_views(threads), next_cursor
+
+    def list_thread_summaries(self, category_id: int = None, user_id: int = None, limit: int = 50,
+                              cursor: str = None, since: datetime = None) -> Tuple[List[ThreadSummary], Optional[str]]:
+        """List thread summaries (no body content) using keyset pagination
+
+        Same ordering and cursors as list_threads_page; use get_thread to
+        load the body when a thread is opened.
+
+        Returns:
+            (summaries, next_cursor) - next_cursor is None on the last page
+        """
+        summaries, next_cursor = self._thread_page(SUMMARY_MAPPER, self.THREAD_SUMMARY_COLUMNS,
+                                                   category_id, user_id, limit, cursor, since)
+        return self._merge_pending_views(summaries), next_cursor
+
+    def _thread_page(self, mapper: RowMapper, columns: str, category_id: Optional[int],
+                     user_id: Optional[int], limit: int, cursor: Optional[str],
+                     since: Optional[datetime] = None) -> Tuple[List[Any], Optional[str]]:
+        """Fetch one keyset page of joined thread rows with the given thread columns and map them
+
+        The columns must include updated_epoch for the cursor.
+        """
+        if self.router is not None:
+            # Keys are unique across shards, so every shard can seek past the same cursor
+            pages = [shard._merge_pending_views(shard._thread_page(mapper, columns, category_id, user_id,
+                                                                   limit, cursor, since)[0])
+                     for shard in self._listing_shards(category_id)]
+            threads = merge_pages(pages, thread_key, limit, reverse=True)
+            next_cursor = encode_cursor(thread_key(threads[-1])) if len(threads) == limit else None
+            return threads, next_cursor
+
+        key = decode_cursor(cursor, 3)
+
+        # Seek the page through the covering listing index, then join only those rows
+        inner = "SELECT id FROM threads WHERE is_deleted = 0"
+        params = []
+
+        if category_id:
+            inner += " AND category_id = ?"
+            params.append(category_id)
+
+        if user_id:
+            inner += " AND user_id = ?"
+            params.append(user_id)
+
+        if since is not None:
+            inner += " AND updated_epoch >= ?"
+            params.append(to_epoch(since))
+
+        if key is not None:
+            inner += " AND (is_pinned, updated_epoch, id) < (?, ?, ?)"
+            params.extend(key)
+
+        inner += " ORDER BY is_pinned DESC, updated_epoch DESC, id DESC LIMIT ?"
+        params.append(limit)
 
+        query = f"""
+            SELECT {columns}, c.name as category_name, c.icon as category_icon,
+                   u.username as user_name, u.avatar as user_avatar
+            FROM threads t
+            JOIN categories c ON t.category_id = c.id
+            JOIN users u ON t.user_id = u.id
+            WHERE t.id IN ({inner})
+            ORDER BY t.is_pinned DESC, t.updated_epoch DESC, t.id DESC
+        """
+
+        with self._read() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+            description = cursor.description
+
+        next_cursor = None
+        if len(rows) == limit:
+            last = rows[-1]
+            next_cursor = encode_cursor((last["is_pinned"], last["updated_epoch"], last["id"]))
+
+        return mapper.map(description, rows), next_cursor
+
+    def get_thread_summaries(self, thread_ids: Iterable[int]) -> List[ThreadSummary]:
+        """Summaries of the given live threads, in listing order (missing and deleted ids are skipped)"""
+        ids = list(thread_ids)
+        if not ids:
+            return []
+
+        if self.router is not None:
+            by_shard: Dict[int, List[int]] = {}
+            for thread_id in ids:
+                by_shard.setdefault(shard_of(thread_id), []).append(thread_id)
+            summaries = []
+            for shard_ids in by_shard.values():
+                shard = self.router.for_id(shard_ids[0])
+                if shard is not None:
+                    summaries.extend(shard.get_thread_summaries(shard_ids))
+            return sorted(summaries, key=thread_key, reverse=True)
+
+        with self._read() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT {self.THREAD_SUMMARY_COLUMNS}, c.name as category_name, c.icon as category_icon,
+                       u.username as user_name, u.avatar as user_avatar
+                FROM threads t
+                JOIN categories c ON t.category_id = c.id
+                JOIN users u ON t.user_id = u.id
+                WHERE t.id IN ({", ".join("?" for _ in ids)}) AND t.is_deleted = 0
+                ORDER BY t.is_pinned DESC, t.updated_epoch DESC, t.id DESC
+            """, ids)
+            summaries = SUMMARY_MAPPER.map(cursor.description, cursor.fetchall())
+
+        return self._merge_pending_views(summaries)
+
+    def _listing_shards(self, category_id: Optional[int]) -> List["Database"]:
+        """Shards a thread listing has to read: the category's shard, or all of them"""
+        if category_id:
+            shard = self.router.for_category(category_id)
+            return [shard] if shard is not None else []
+        return self.router.shards()
+
+    def _merge_pending_views(self, threads: List[Any]) -> List[Any]:
+        """Add not-yet-flushed views to each thread's view_count"""
+        for thread in threads:
+            thread.view_count += self.views.pending(thread.id)
         return threads
 
     # ════════════════════════════════════════════
@@ -399,120 +640,766 @@ class Database:
     def create_post(self, thread_id: int, user_id: int, content: str,
                     parent_post_id: int = None) -> Post:
         """Create a new post"""
-        cursor = self.conn.cursor()
-
-        cursor.execute("""
-            INSERT INTO posts (thread_id, user_id, content, parent_post_id)
-            VALUES (?, ?, ?, ?)
-        """, (thread_id, user_id, content, parent_post_id))
-
-        # Update thread posts_count and last_post info
-        cursor.execute("""
-            UPDATE threads
-            SET posts_count = posts_count + 1,
-                last_post_user_id = ?,
-                last_post_at = CURRENT_TIMESTAMP,
-                updated_at = CURRENT_TIMESTAMP
-            WHERE id = ?
-        """, (user_id, thread_id))
-
-        # Update user posts_count
-        cursor.execute("UPDATE users SET posts_count = posts_count + 1 WHERE id = ?", (user_id,))
-
-        self.conn.commit()
-        post_id = cursor.lastrowid
+        shard = self._shard(thread_id)
+        if shard is not None:
+            self.router.mirror(shard, [user_id])
+            return shard.create_post(thread_id, user_id, content, parent_post_id)
+
+        stored = self._body(content, MAX_POST_LENGTH)
+        with self._write() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO posts (thread_id, user_id, content, parent_post_id)
+                VALUES (?, ?, ?, ?)
+            """, (thread_id, user_id, stored, parent_post_id))
+            # Thread, user and category counters are maintained by triggers
+            post_id = cursor.lastrowid
+            index_compressed(cursor, "posts", [(post_id, content, stored)])
+            row = cursor.execute("SELECT category_id FROM threads WHERE id = ?", (thread_id,)).fetchone()
+
+        self._invalidate_counters(user_id, row[0] if row else None)
         return self.get_post(post_id)
 
     def get_post(self, post_id: int) -> Optional[Post]:
         """Get post by ID"""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT p.*, u.username as user_name, u.avatar as user_avatar, u.reputation as user_reputation
-            FROM posts p
-            JOIN users u ON p.user_id = u.id
-            WHERE p.id = ?
-        """, (post_id,))
-
-        row = cursor.fetchone()
-
-        if row:
-            return Post(
-                id=row["id"],
-                thread_id=row["thread_id"],
-                user_id=row["user_id"],
-                content=row["content"],
-                parent_post_id=row["parent_post_id"],
-                created_at=datetime.fromisoformat(row["created_at"]),
-                updated_at=datetime.fromisoformat(row["updated_at"]),
-                upvotes=row["upvotes"],
-                downvotes=row["downvotes"],
-                is_deleted=bool(row["is_deleted"]),
-                is_edited=bool(row["is_edited"]),
-                edit_reason=row["edit_reason"],
-                user_name=row["user_name"],
-                user_avatar=row["user_avatar"],
-                user_reputation=row["user_reputation"],
-            )
-        return None
+        shard = self._shard(post_id)
+        if shard is not None:
+            return shard.get_post(post_id)
+
+        with self._read() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT p.*, u.username as user_name, u.avatar as user_avatar, u.reputation as user_reputation
+                FROM posts p
+                JOIN users u ON p.user_id = u.id
+                WHERE p.id = ?
+            """, (post_id,))
+            return POST_MAPPER.map_one(cursor.description, cursor.fetchone())
 
     def list_posts(self, thread_id: int, limit: int = 100, offset: int = 0) -> List[Post]:
         """List posts in a thread"""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT p.*, u.username as user_name, u.avatar as user_avatar, u.reputation as user_reputation
-            FROM posts p
-            JOIN users u ON p.user_id = u.id
-            WHERE p.thread_id = ? AND p.is_deleted = 0
-            ORDER BY p.created_at ASC
-            LIMIT ? OFFSET ?
-        """, (thread_id, limit, offset))
-
-        posts = []
-        for row in cursor.fetchall():
-            posts.append(Post(
-                id=row["id"],
-                thread_id=row["thread_id"],
-                user_id=row["user_id"],
-                content=row["content"],
-                parent_post_id=row["parent_post_id"],
-                created_at=datetime.fromisoformat(row["created_at"]),
-                updated_at=datetime.fromisoformat(row["updated_at"]),
-                upvotes=row["upvotes"],
-                downvotes=row["downvotes"],
-                is_deleted=bool(row["is_deleted"]),
-                is_edited=bool(row["is_edited"]),
-                edit_reason=row["edit_reason"],
-                user_name=row["user_name"],
-                user_avatar=row["user_avatar"],
-                user_reputation=row["user_reputation"],
-            ))
+        shard = self._shard(thread_id)
+        if shard is not None:
+            return shard.list_posts(thread_id, limit, offset)
+
+        with self._read() as conn:
+            schema = self._thread_schema(conn, thread_id)
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT p.*, u.username as user_name, u.avatar as user_avatar, u.reputation as user_reputation
+                FROM {schema}.posts p
+                JOIN users u ON p.user_id = u.id
+                WHERE p.thread_id = ? AND p.is_deleted = 0
+                ORDER BY p.created_epoch ASC
+                LIMIT ? OFFSET ?
+            """, (thread_id, limit, offset))
+            return POST_MAPPER.map(cursor.description, cursor.fetchall())
+
+    def list_posts_page(self, thread_id: int, limit: int = 100, cursor: str = None,
+                        since: datetime = None) -> Tuple[List[Post], Optional[str]]:
+        """List posts in a thread using keyset pagination
+
+        Args:
+            thread_id: Thread to list
+            limit: Page size
+            cursor: Cursor returned by the previous page, or None for the first page
+            since: Only posts created at or after this time (naive = UTC)
+
+        Returns:
+            (posts, next_cursor) - next_cursor is None on the last page
+        """
+        shard = self._shard(thread_id)
+        if shard is not None:
+            return shard.list_posts_page(thread_id, limit, cursor, since)
+
+        key = decode_cursor(cursor, 2)
+
+        inner = "SELECT id FROM {schema}.posts WHERE thread_id = ? AND is_deleted = 0"
+        params = [thread_id]
+
+        if since is not None:
+            inner += " AND created_epoch >= ?"
+            params.append(to_epoch(since))
+
+        if key is not None:
+            inner += " AND (created_epoch, id) > (?, ?)"
+            params.extend(key)
+
+        inner += " ORDER BY created_epoch ASC, id ASC LIMIT ?"
+        params.append(limit)
+
+        with self._read() as conn:
+            schema = self._thread_schema(conn, thread_id)
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT p.*, u.username as user_name, u.avatar as user_avatar, u.reputation as user_reputation
+                FROM {schema}.posts p
+                JOIN users u ON p.user_id = u.id
+                WHERE p.id IN ({inner.format(schema=schema)})
+                ORDER BY p.created_epoch ASC, p.id ASC
+            """, params)
+            rows = cursor.fetchall()
+            description = cursor.description
+
+        next_cursor = None
+        if len(rows) == limit:
+            last = rows[-1]
+            next_cursor = encode_cursor((last["created_epoch"], last["id"]))
+
+        return POST_MAPPER.map(description, rows), next_cursor
+
+    # Columns for PostRow, in PostRow.FIELDS order, plus the trailing path for the cursor
+    POST_ROW_COLUMNS = """
+        p.id, p.thread_id, p.user_id, p.content, p.parent_post_id,
+        p.created_epoch, p.updated_epoch, p.upvotes, p.downvotes,
+        p.is_deleted, p.is_edited, p.edit_reason, p.depth,
+        u.username, u.avatar, u.reputation, p.path
+    """
+
+    def list_post_tree(self, thread_id: int, root_post_id: int = None, max_depth: int = None,
+                       cursor: str = None, limit: int = 100) -> Tuple[List[Post], Optional[str]]:
+        """List a thread's reply tree in depth-first display order
+
+        Deleted posts are kept so their replies stay attached; they render
+        through Post.display_content as a placeholder.
+
+        Args:
+            thread_id: Thread to list
+            root_post_id: Only this post and its descendants (None for the whole thread)
+            max_depth: Maximum depth below the root (0 = root level only)
+            cursor: Cursor returned by the previous page, or None for the first page
+            limit: Page size
+
+        Returns:
+            (posts with depth set, next_cursor)
+        """
+        columns = "p.*, u.username as user_name, u.avatar as user_avatar, u.reputation as user_reputation"
+        return self._post_tree_page(columns, POST_MAPPER.map, thread_id, root_post_id, max_depth,
+                                    cursor, limit)
+
+    def list_post_tree_rows(self, thread_id: int, root_post_id: int = None, max_depth: int = None,
+                            cursor: str = None, limit: int = 100) -> Tuple[List[PostRow], Optional[str]]:
+        """Same as list_post_tree, but returns read-only PostRow tuples
+
+        Much cheaper to build and hold for large threads; timestamps are
+        parsed only when accessed.
+        """
+        return self._post_tree_page(self.POST_ROW_COLUMNS, lambda _, rows: PostRow.from_tuples(rows),
+                                    thread_id, root_post_id, max_depth, cursor, limit, raw=True)
+
+    def _post_tree_page(self, columns: str, build: Callable[[Any, List[Any]], List[Any]],
+                        thread_id: int, root_post_id: Optional[int], max_depth: Optional[int],
+                        cursor: Optional[str], limit: int, raw: bool = False) -> Tuple[List[Any], Optional[str]]:
+        """Fetch one page of a thread's reply tree with the given columns
+
+        The columns must include path; with raw=True rows are plain tuples
+        and path must be the last column. build(description, rows) turns
+        the page into models.
+        """
+        shard = self._shard(thread_id)
+        if shard is not None:
+            return shard._post_tree_page(columns, build, thread_id, root_post_id, max_depth,
+                                         cursor, limit, raw)
+
+        key = decode_cursor(cursor, 1)
+
+        where = "p.thread_id = ?"
+        params: List[Any] = [thread_id]
+        base_depth = 0
+
+        with self._read() as conn:
+            schema = self._thread_schema(conn, thread_id)
+
+        if root_post_id is not None:
+            with self._read() as conn:
+                row = conn.execute(
+                    f"SELECT path, depth FROM {schema}.posts WHERE id = ? AND thread_id = ?",
+                    (root_post_id, thread_id),
+                ).fetchone()
+            if row is None:
+                return [], None
+            low, high = subtree_range(row["path"])
+            where += " AND p.path >= ? AND p.path < ?"
+            params.extend([low, high])
+            base_depth = row["depth"]
+
+        if max_depth is not None:
+            where += " AND p.depth <= ?"
+            params.append(base_depth + max_depth)
+
+        if key is not None:
+            where += " AND p.path > ?"
+            params.append(key[0])
+
+        params.append(limit)
+
+        with self._read() as conn:
+            cursor = conn.cursor()
+            if raw:
+                cursor.row_factory = None
+            cursor.execute(f"""
+                SELECT {columns}
+                FROM {schema}.posts p
+                JOIN users u ON p.user_id = u.id
+                WHERE {where}
+                ORDER BY p.path
+                LIMIT ?
+            """, params)
+            rows = cursor.fetchall()
+            description = cursor.description
+
+        next_cursor = None
+        if len(rows) == limit:
+            next_cursor = encode_cursor((rows[-1][-1] if raw else rows[-1]["path"],))
+
+        return build(description, rows), next_cursor
+
+    def _thread_schema(self, conn: sqlite3.Connection, thread_id: int) -> str:
+        """Schema holding a thread's posts: main, or the archive if it was moved there"""
+        if len(self._schemas) == 1:
+            return "main"
+        for schema in self._schemas:
+            if conn.execute(f"SELECT 1 FROM {schema}.threads WHERE id = ?", (thread_id,)).fetchone():
+                return schema
+        return "main"
+
+
+    # ════════════════════════════════════════════
+    # BULK OPERATIONS
+    # ════════════════════════════════════════════
+
+    @staticmethod
+    def _batches(rows: Iterable[Mapping[str, Any]], batch_size: int) -> Iterator[List[Mapping[str, Any]]]:
+        """Split an iterable into lists of at most batch_size items"""
+        iterator = iter(rows)
+        while True:
+            batch = list(islice(iterator, batch_size))
+            if not batch:
+                return
+            yield batch
+
+    @staticmethod
+    def _insert_rows(cursor: sqlite3.Cursor, sql: str, params: List[Tuple]) -> List[int]:
+        """Run an INSERT ... RETURNING id once per parameter row, returning the new ids in order"""
+        ids = []
+        for row in params:
+            cursor.execute(sql, row)
+            ids.append(cursor.fetchone()[0])
+        return ids
+
+    @staticmethod
+    def _suspend_counters(conn: sqlite3.Connection) -> List[str]:
+        """Drop the counter triggers for the rest of the writer's transaction
+
+        The batch is then counted with count_batch() and the triggers are
+        restored before commit, so other connections never see them missing.
+        Inside bulk_load() they are already gone and nothing is returned.
+        """
+        if not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE")
+        return suspend_triggers(conn.cursor(), (COUNTER_TRIGGERS,))
+
+    def _scatter(self, rows: List[Mapping[str, Any]], shard_for: Callable[[Mapping[str, Any]], "Database"],
+                 insert: Callable[["Database", List[Mapping[str, Any]]], List[int]]) -> List[int]:
+        """Insert a batch into the shards its rows belong to, returning ids in input order"""
+        groups: Dict[int, Tuple["Database", List[int]]] = {}
+        for position, row in enumerate(rows):
+            shard = shard_for(row)
+            groups.setdefault(id(shard), (shard, []))[1].append(position)
+
+        ids: List[int] = [0] * len(rows)
+        for shard, positions in groups.values():
+            for position, row_id in zip(positions, insert(shard, [rows[position] for position in positions])):
+                ids[position] = row_id
+        return ids
+
+    def bulk_create_users(self, users: Iterable[Mapping[str, Any]],
+                          batch_size: int = 1000) -> List[int]:
+        """Insert many users with one transaction per batch
+
+        Args:
+            users: Mappings with username and optionally email, bio, avatar
+                and created_at
+            batch_size: Rows per transaction
+
+        Returns:
+            Ids of the new users, in input order
+        """
+        ids = []
+        for batch in self._batches(users, batch_size):
+            params = [
+                (
+                    row["username"],
+                    row.get("email"),
+                    row.get("bio"),
+                    row.get("avatar") or "👤",
+                    row.get("created_at"),
+                )
+                for row in batch
+            ]
+            with self._write() as conn:
+                ids.extend(self._insert_rows(conn.cursor(), """
+                    INSERT INTO users (username, email, bio, avatar, created_at, updated_at, last_seen)
+                    VALUES (?, ?, ?, ?, COALESCE(?5, CURRENT_TIMESTAMP),
+                            COALESCE(?5, CURRENT_TIMESTAMP), COALESCE(?5, CURRENT_TIMESTAMP))
+                    RETURNING id
+                """, params))
+
+        return ids
+
+    def bulk_create_threads(self, threads: Iterable[Mapping[str, Any]],
+                            batch_size: int = 1000) -> List[int]:
+        """Insert many threads with one transaction per batch
+
+        The counter triggers are suspended for each batch, which is then
+        counted with one aggregate statement per counter in the same
+        transaction.
+
+        Args:
+            threads: Mappings with title, content, user_id, category_id and
+                optionally slug and created_at
+            batch_size: Rows per transaction
+
+        Returns:
+            Ids of the new threads, in input order
+        """
+        from slugify import slugify
+
+        ids = []
+        if self.router is not None:
+            router = self.router
+
+            def insert(shard: "Database", rows: List[Mapping[str, Any]]) -> List[int]:
+                router.mirror(shard, {row["user_id"] for row in rows}, {row["category_id"] for row in rows})
+                return shard.bulk_create_threads(rows, batch_size)
+
+            for batch in self._batches(threads, batch_size):
+                ids.extend(self._scatter(batch, lambda row: router.for_category(row["category_id"], create=True),
+                                         insert))
+            return ids
+
+        for batch in self._batches(threads, batch_size):
+            params = [
+                (
+                    row["title"],
+                    row.get("slug") or slugify(row["title"]),
+                    row["category_id"],
+                    row["user_id"],
+                    self._body(row["content"]),
+                    row["user_id"],
+                    row.get("created_at"),
+                )
+                for row in batch
+            ]
+            with self._write() as conn:
+                triggers = self._suspend_counters(conn)
+                cursor = conn.cursor()
+                batch_ids = self._insert_rows(cursor, """
+                    INSERT INTO threads (title, slug, category_id, user_id, content, last_post_user_id,
+                                         created_at, updated_at, last_post_at)
+                    VALUES (?, ?, ?, ?, ?, ?, COALESCE(?7, CURRENT_TIMESTAMP),
+                            COALESCE(?7, CURRENT_TIMESTAMP), COALESCE(?7, CURRENT_TIMESTAMP))
+                    RETURNING id
+                """, params)
+                index_compressed(cursor, "threads", [
+                    (row_id, row["content"], param[4]) for row_id, row, param in zip(batch_ids, batch, params)
+                ])
+                if triggers:
+                    count_batch(cursor, "threads", batch_ids)
+                    restore(cursor, triggers)
+                ids.extend(batch_ids)
+
+            self._invalidate_counters()
+
+        return ids
+
+    def bulk_create_posts(self, posts: Iterable[Mapping[str, Any]],
+                          batch_size: int = 1000) -> List[int]:
+        """Insert many posts with one transaction per batch
+
+        Counters and last-post info are updated once per batch, as in
+        bulk_create_threads (inside bulk_load() they are rebuilt when the
+        load ends).
+
+        Args:
+            posts: Mappings with thread_id, user_id, content and optionally
+                parent_post_id and created_at
+            batch_size: Rows per transaction
+
+        Returns:
+            Ids of the new posts, in input order
+        """
+        ids = []
+        if self.router is not None:
+            router = self.router
+
+            def insert(shard: "Database", rows: List[Mapping[str, Any]]) -> List[int]:
+                if shard is self:
+                    raise sqlite3.IntegrityError("FOREIGN KEY constraint failed")
+                router.mirror(shard, {row["user_id"] for row in rows})
+                return shard.bulk_create_posts(rows, batch_size)
+
+            for batch in self._batches(posts, batch_size):
+                ids.extend(self._scatter(batch, lambda row: router.for_id(row["thread_id"]) or self, insert))
+            return ids
+
+        for batch in self._batches(posts, batch_size):
+            params = [
+                (
+                    row["thread_id"],
+                    row["user_id"],
+                    self._body(row["content"], MAX_POST_LENGTH),
+                    row.get("parent_post_id"),
+                    row.get("created_at"),
+                )
+                for row in batch
+            ]
+            with self._write() as conn:
+                if self.bulk_loading:
+                    ids.extend(self._insert_posts_with_paths(conn, params))
+                else:
+                    triggers = self._suspend_counters(conn)
+                    cursor = conn.cursor()
+                    batch_ids = self._insert_rows(cursor, """
+                        INSERT INTO posts (thread_id, user_id, content, parent_post_id, created_at, updated_at)
+                        VALUES (?, ?, ?, ?, COALESCE(?5, CURRENT_TIMESTAMP), COALESCE(?5, CURRENT_TIMESTAMP))
+                        RETURNING id
+                    """, params)
+                    index_compressed(cursor, "posts", [
+                        (row_id, row["content"], param[2]) for row_id, row, param in zip(batch_ids, batch, params)
+                    ])
+                    if triggers:
+                        count_batch(cursor, "posts", batch_ids)
+                        restore(cursor, triggers)
+                    ids.extend(batch_ids)
+
+            self._invalidate_counters()
+
+        return ids
+
+    def _insert_posts_with_paths(self, conn: sqlite3.Connection, params: List[Tuple]) -> List[int]:
+        """Insert a batch while the tree trigger is suspended, storing paths computed here
+
+        The ids are chosen here and inserted explicitly, since each path
+        ends with the post's own id.
+        """
+        # Lock first, so no other insert takes the ids chosen below
+        if not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE")
+        cursor = conn.cursor()
+        first_id = next_post_id(cursor)
+        ids = list(range(first_id, first_id + len(params)))
+        paths = tree_paths(cursor, first_id, [row[3] for row in params])
+        cursor.executemany("""
+            INSERT INTO posts (thread_id, user_id, content, parent_post_id, created_at, updated_at,
+                               path, depth, id)
+            VALUES (?, ?, ?, ?, COALESCE(?5, CURRENT_TIMESTAMP), COALESCE(?5, CURRENT_TIMESTAMP), ?, ?, ?)
+        """, [row + path + (post_id,) for row, path, post_id in zip(params, paths, ids)])
+        return ids
+
+    @contextmanager
+    def bulk_load(self, defer_indexes: bool = False) -> Iterator[Dict[str, int]]:
+        """Suspend the derived-data triggers for a large import
+
+        Inside the block, bulk_create_* only insert base rows, and
+        bulk_create_posts fills in reply-tree paths itself. On exit (also
+        after an error, since finished batches are already committed) search
+        entries are built for the new rows, counters and stats are
+        recomputed, and the triggers are restored, all in one transaction.
+        No other connection should write meanwhile.
+
+        Args:
+            defer_indexes: Also drop the thread and post indexes and rebuild
+                them on exit; faster when loading into a small or empty
+                database, slower when the tables are already large
+
+        Yields:
+            Counter repairs made on exit, filled in once the block ends
+            (summed over the shards of a sharded forum)
+        """
+        repaired: Dict[str, int] = {}
+        with ExitStack() as shards:
+            shard_repairs = self.router.enter_bulk_load(shards, defer_indexes) if self.router else []
+
+            with self._write() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                cursor = conn.cursor()
+                marks = high_water_marks(cursor)
+                triggers = suspend_triggers(cursor)
+                indexes = suspend_indexes(cursor) if defer_indexes else []
+                self.bulk_loading = True
+
+            try:
+                yield repaired
+            finally:
+                with self._write() as conn:
+                    conn.execute("BEGIN IMMEDIATE")
+                    cursor = conn.cursor()
+                    # Indexes first: the set-based rebuild relies on them
+                    restore(cursor, indexes)
+                    repaired.update(rebuild_derived(cursor, marks, self._schemas))
+                    restore(cursor, triggers)
+                    # Cleared under the writer lock, once the triggers are back
+                    self.bulk_loading = False
+                # Loads may write any user or category row (a dump import replaces categories)
+                self.identity_map.clear()
+
+        for counts in shard_repairs:
+            for name, count in counts.items():
+                repaired[name] = repaired.get(name, 0) + count
 
-        return posts
+    # ════════════════════════════════════════════
+    # SEARCH
+    # ════════════════════════════════════════════
+
+    def search(self, query: str, limit: int = 20, cursor: str = None,
+               highlight: Tuple[str, str] = ("[b]", "[/b]"),
+               snippet_tokens: int = 16) -> Tuple[List[SearchResult], Optional[str]]:
+        """Full-text search over thread titles, thread bodies and posts
+
+        Args:
+            query: Free-text search terms (the last term matches as a prefix)
+            limit: Page size
+            cursor: Cursor returned by the previous page, or None for the first page
+            highlight: Markers placed around matched terms in snippets
+            snippet_tokens: Maximum snippet length in tokens
+
+        Returns:
+            (results ordered by bm25 relevance, next_cursor)
+        """
+        if self.router is not None:
+            pages = [shard.search(query, limit, cursor, highlight, snippet_tokens)[0]
+                     for shard in self.router.shards()]
+            results = merge_pages(pages, search_key, limit)
+            return results, encode_cursor(search_key(results[-1])) if len(results) == limit else None
+
+        key = decode_cursor(cursor, 3)
+        match = build_match_query(query)
+        if not match:
+            return [], None
+
+        params = {
+            "match": match,
+            "start": highlight[0],
+            "end": highlight[1],
+            "tokens": snippet_tokens,
+            "limit": limit,
+        }
+        sql = self._search_sql
+        if key is not None:
+            sql += " WHERE (rank, kind, id) > (:rank, :kind, :id)"
+            params.update(rank=key[0], kind=key[1], id=key[2])
+        sql += " ORDER BY rank, kind, id LIMIT :limit"
+
+        with self._read() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+            results = SEARCH_RESULT_MAPPER.map(cursor.description, rows)
+
+        next_cursor = None
+        if len(rows) == limit:
+            last = rows[-1]
+            next_cursor = encode_cursor((last["rank"], last["kind"], last["id"]))
+
+        return results, next_cursor
+
+    def rebuild_search_index(self) -> None:
+        """Rebuild the full-text search index from scratch"""
+        with self._write() as conn:
+            rebuild_search_index(conn.cursor())
+        for shard in self.router.shards() if self.router else []:
+            shard.rebuild_search_index()
 
     # ════════════════════════════════════════════
     # STATISTICS
     # ════════════════════════════════════════════
 
+    def cache_stats(self) -> Dict:
+        """Identity map hit/miss counters"""
+        return self.identity_map.stats()
+
     def get_forum_stats(self) -> Dict:
         """Get forum statistics"""
-        cursor = self.conn.cursor()
+        with self._read() as conn:
+            stats = read_stats(conn.cursor())
+        # Shards count their mirrored users and categories too; only their content adds up
+        for shard in self.router.shards() if self.router else []:
+            with shard._read() as conn:
+                shard_stats = read_stats(conn.cursor())
+            stats["threads"] += shard_stats["threads"]
+            stats["posts"] += shard_stats["posts"]
+
+        stats["total_content"] = stats["threads"] + stats["posts"]
+        return stats
+
+    def reconcile_forum_stats(self) -> Tuple[Dict, Dict]:
+        """Recompute the materialized forum statistics from the tables
+
+        Returns:
+            (stats before, stats after)
+        """
+        with self._write() as conn:
+            cursor = conn.cursor()
+            before = read_stats(cursor)
+            after = reconcile_stats(cursor, self._schemas)
+        for shard in self.router.shards() if self.router else []:
+            shard_before, shard_after = shard.reconcile_forum_stats()
+            for totals, shard_totals in ((before, shard_before), (after, shard_after)):
+                totals["threads"] += shard_totals["threads"]
+                totals["posts"] += shard_totals["posts"]
+        return before, after
+
+    def reconcile_counters(self) -> Dict[str, int]:
+        """Repair drift in the denormalized user, category and thread counters
+
+        Returns:
+            Number of rows repaired per counter
+        """
+        with self._write() as conn:
+            repaired = reconcile_counters(conn.cursor(), self._schemas)
+        for shard in self.router.shards() if self.router else []:
+            for name, count in shard.reconcile_counters().items():
+                repaired[name] = repaired.get(name, 0) + count
+
+        self._invalidate_counters()
+        return repaired
 
-        cursor.execute("SELECT COUNT(*) as count FROM users")
-        users_count = cursor.fetchone()["count"]
+    # ════════════════════════════════════════════
+    # CHANGE LOG
+    # ════════════════════════════════════════════
 
-        cursor.execute("SELECT COUNT(*) as count FROM threads WHERE is_deleted = 0")
-        threads_count = cursor.fetchone()["count"]
+    def changes_since(self, seq: int = 0, limit: int = 1000) -> List[Change]:
+        """Changes committed after `seq`, oldest first
 
-        cursor.execute("SELECT COUNT(*) as count FROM posts WHERE is_deleted = 0")
-        posts_count = cursor.fetchone()["count"]
+        Args:
+            seq: Last seq the caller has seen (0 for the whole log)
+            limit: Maximum number of changes
 
-        cursor.execute("SELECT COUNT(*) as count FROM categories")
-        categories_count = cursor.fetchone()["count"]
+        Returns:
+            Changes in seq order; starts with a reload change if the ones
+            right after `seq` were already pruned
+        """
+        with self._read() as conn:
+            return read_changes(conn, seq, limit)
 
-        return {
-            "users": users_count,
-            "threads": threads_count,
-            "posts": posts_count,
-            "categories": categories_count,
-            "total_content": threads_count + posts_count,
-        }
+    def latest_change_seq(self) -> int:
+        """seq of the newest change, or 0 if there is none"""
+        with self._read() as conn:
+            return latest_seq(conn)
+
+    def watch_changes(self, since: Optional[int] = None, poll_interval: float = 0.25) -> ChangeWatcher:
+        """Watcher yielding changes as they are committed (by this or any other connection)
+
+        The watcher has its own connection; close() it when done. It
+        reads the log of this file only, which in a sharded forum is the
+        catalog; ForumWatcher also follows the shards.
+
+        Args:
+            since: Last seq already seen; None starts from the newest change
+            poll_interval: Seconds between PRAGMA data_version polls
+        """
+        if self.pool.shared:
+            raise ValueError("In-memory databases cannot be watched")
+        return ChangeWatcher(self.db_path, since=since, poll_interval=poll_interval)
+
+    # ════════════════════════════════════════════
+    # ARCHIVE
+    # ════════════════════════════════════════════
+
+    def archive(self, inactive_since: datetime, chunk_threads: int = DEFAULT_CHUNK_THREADS,
+                chunk_posts: int = DEFAULT_CHUNK_POSTS, max_threads: Optional[int] = None,
+                pause: float = 0.0,
+                progress: Optional[Callable[[int, int], None]] = None) -> ArchiveResult:
+        """Move threads with no posts since inactive_since into the archive database
+
+        Args:
+            inactive_since: Threads whose last post is older are moved (naive = UTC)
+            chunk_threads: Threads moved per pair of transactions
+            chunk_posts: Soft cap on the posts moved per chunk
+            max_threads: Stop after this many threads (None = all)
+            pause: Seconds to sleep between chunks, letting other writers in
+            progress: Called with (threads, posts) archived so far after each chunk
+
+        Returns:
+            Counts and timing of the run
+
+        Raises:
+            ValueError: If the database was opened without an archive_path
+        """
+        if not self.archive_path:
+            raise ValueError("Database was opened without an archive_path")
+
+        try:
+            return archive_threads(self._write, to_epoch(inactive_since), chunk_threads=chunk_threads,
+                                   chunk_posts=chunk_posts, max_threads=max_threads, pause=pause,
+                                   progress=progress)
+        finally:
+            self._invalidate_counters()
+
+    def archive_stats(self) -> Dict[str, int]:
+        """Thread and post counts of the hot tables and of the archive"""
+        with self._read() as conn:
+            return {
+                f"{schema}_{table}": conn.execute(f"SELECT COUNT(*) FROM {schema}.{table}").fetchone()[0]
+                for schema in self._schemas
+                for table in ("threads", "posts")
+            }
+
+    # ════════════════════════════════════════════
+    # COMPRESSION
+    # ════════════════════════════════════════════
+
+    def compact(self, threshold: Optional[int] = None, batch_size: int = DEFAULT_COMPACT_BATCH,
+                pause: float = 0.0,
+                progress: Optional[Callable[[CompactResult], None]] = None) -> CompactResult:
+        """Compress (or decompress) existing bodies to match a threshold
+
+        Args:
+            threshold: Compress bodies longer than this many characters
+                (defaults to compress_threshold; if that is None too, every
+                body is decompressed)
+            batch_size: Candidate rows examined per transaction
+            pause: Seconds to sleep between batches, letting other writers in
+            progress: Called with the running totals after each batch
+
+        Returns:
+            Rows rewritten and body bytes before and after, over every
+            schema (and shard)
+        """
+        if threshold is None:
+            threshold = self.compress_threshold
+
+        result = compact_bodies(self._write, threshold, self._schemas, batch_size, pause, progress)
+        for shard in self.router.shards() if self.router else []:
+            # Report running totals across shards, not per shard
+            report = None
+            if progress is not None:
+                def report(totals: CompactResult, done: CompactResult = replace(result)) -> None:
+                    combined = replace(done)
+                    combined.add(totals)
+                    progress(combined)
+
+            shard_result = shard.compact(threshold, batch_size, pause, report)
+            result.add(shard_result)
+            result.seconds += shard_result.seconds
+        return result
+
+    # ════════════════════════════════════════════
+    # MAINTENANCE
+    # ════════════════════════════════════════════
+
+    def maintain(self) -> MaintenanceReport:
+        """Run one time-boxed maintenance pass now"""
+        return self.maintenance.run_once()
+
+    def enable_incremental_vacuum(self) -> bool:
+        """Switch an existing database to incremental auto-vacuum with a full VACUUM
+
+        Blocks writers until the VACUUM finishes.
+
+        Returns:
+            False if the database already used incremental vacuum
+        """
+        with self._write() as conn:
+            return enable_incremental_vacuum(conn)
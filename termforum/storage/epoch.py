@@ -0,0 +1,82 @@
+"""Integer epoch companions for timestamp columns
+
+Timestamps are stored as CURRENT_TIMESTAMP text. Sorting and range
+filters on text compare strings, and every read parses them in Python.
+Each hot timestamp column gets a virtual generated `*_epoch` column
+(Unix seconds, UTC). Adding one is a schema-only change, so no table
+rewrite is needed, and the listing indexes are built on the epoch
+columns. Sorting and keyset seeks therefore compare integers straight
+out of the index, and row decoding turns an int into a datetime with no
+string parsing.
+"""
+
+import sqlite3
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, List, Optional, Union
+
+
+# Companion epoch column per timestamp column, by table
+EPOCH_COLUMNS: Dict[str, Dict[str, str]] = {
+    "threads": {
+        "created_at": "created_epoch",
+        "updated_at": "updated_epoch",
+        "last_post_at": "last_post_epoch",
+    },
+    "posts": {
+        "created_at": "created_epoch",
+        "updated_at": "updated_epoch",
+    },
+}
+
+# Keyset listing indexes: cover the filter, full sort key and id
+EPOCH_SCHEMA: List[str] = [
+    "DROP INDEX IF EXISTS idx_threads_listing",
+    "DROP INDEX IF EXISTS idx_threads_category_listing",
+    "DROP INDEX IF EXISTS idx_threads_user_listing",
+    "DROP INDEX IF EXISTS idx_posts_thread_listing",
+    "CREATE INDEX IF NOT EXISTS idx_threads_activity ON threads(is_deleted, is_pinned DESC, updated_epoch DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_threads_category_activity ON threads(category_id, is_deleted, is_pinned DESC, updated_epoch DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_threads_user_activity ON threads(user_id, is_deleted, is_pinned DESC, updated_epoch DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_posts_thread_timeline ON posts(thread_id, is_deleted, created_epoch ASC, id ASC)",
+]
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def create_epoch_schema(cursor: sqlite3.Cursor) -> None:
+    """Add missing epoch columns, then (re)create the listing indexes"""
+    for table, columns in EPOCH_COLUMNS.items():
+        # table_info hides generated columns; table_xinfo lists them
+        cursor.execute(f"PRAGMA table_xinfo({table})")
+        existing = {row[1] for row in cursor.fetchall()}
+        for source, column in columns.items():
+            if column not in existing:
+                cursor.execute(f"""
+                    ALTER TABLE {table} ADD COLUMN {column} INTEGER
+                    GENERATED ALWAYS AS (CAST(strftime('%s', {source}) AS INTEGER)) VIRTUAL
+                """)
+
+    for statement in EPOCH_SCHEMA:
+        cursor.execute(statement)
+
+
+@lru_cache(maxsize=8192)
+def _from_epoch(value: int) -> datetime:
+    return _EPOCH + timedelta(seconds=value)
+
+
+def from_epoch(value: Optional[int]) -> Optional[datetime]:
+    """Naive UTC datetime for an epoch value (matches CURRENT_TIMESTAMP text)"""
+    if value is None:
+        return None
+    return _from_epoch(value)
+
+
+def to_epoch(value: Union[datetime, int, float]) -> int:
+    """Epoch seconds for a bound parameter; naive datetimes are taken as UTC"""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            return int(value.timestamp())
+        return int((value - _EPOCH).total_seconds())
+    return int(value)
@@ -0,0 +1,136 @@
+"""Per-process identity map for rarely-changing rows
+
+Users and categories are read constantly but change rarely. The map
+keeps one bounded LRU of loaded model objects keyed by (kind, key).
+Writes made through Database invalidate the entries they touch. Writes
+made by any other connection or process are noticed through
+`PRAGMA data_version` (ConnectionPool.foreign_version, which ignores
+the pool's own commits) and clear the whole map.
+
+Every invalidation bumps a generation number. A loader takes the
+generation before it reads and hands it to put(), which drops the value
+if anything was invalidated in between, so a row read before a write
+is never cached after it. Callers get copies of the cached objects and
+may modify them freely.
+"""
+
+import copy
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class IdentityMap:
+    """Bounded LRU cache of model objects with hit/miss counters"""
+
+    def __init__(self, data_version: Callable[[], int], max_size: int = 1024):
+        """Initialize the map
+
+        Args:
+            data_version: Callable returning a version that changes when another
+                connection commits (e.g. ConnectionPool.foreign_version)
+            max_size: Maximum number of cached entries
+        """
+        self._data_version = data_version
+        self.max_size = max(1, max_size)
+
+        self._entries: "OrderedDict[Tuple[str, Hashable], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _check_version(self, version: int) -> None:
+        """Drop everything if another connection has committed since the last check
+
+        The version is read before taking the map's lock: reading it may
+        wait for the writer lock, whose holder may be invalidating entries.
+        """
+        if version != self._version:
+            if self._version is not None:
+                self._entries.clear()
+                self._generation += 1
+                self.invalidations += 1
+            self._version = version
+
+    def generation(self) -> int:
+        """Current generation; pass it to put() for a value loaded after this call"""
+        version = self._data_version()
+        with self._lock:
+            self._check_version(version)
+            return self._generation
+
+    def get(self, kind: str, key: Hashable) -> Optional[Any]:
+        """Look up a copy of a cached object, or None on a miss"""
+        version = self._data_version()
+        with self._lock:
+            self._check_version(version)
+            value = self._entries.get((kind, key))
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((kind, key))
+            self.hits += 1
+        return _copy(value)
+
+    def put(self, kind: str, key: Hashable, value: Any, generation: int) -> Any:
+        """Cache a copy of an object, evicting the least recently used entry when full
+
+        Args:
+            kind: Entry kind ("user", "category", ...)
+            key: Entry key within the kind
+            value: Object to cache; the caller keeps this instance
+            generation: generation() taken before the value was loaded;
+                the value is not cached if the map was invalidated since
+
+        Returns:
+            value
+        """
+        stored = _copy(value)
+        version = self._data_version()
+        with self._lock:
+            self._check_version(version)
+            if generation == self._generation:
+                self._entries[(kind, key)] = stored
+                self._entries.move_to_end((kind, key))
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, kind: str, key: Hashable = None) -> None:
+        """Drop one entry, or every entry of a kind when key is None"""
+        with self._lock:
+            self._generation += 1
+            if key is not None:
+                self._entries.pop((kind, key), None)
+                return
+            for entry in [entry for entry in self._entries if entry[0] == kind]:
+                del self._entries[entry]
+
+    def clear(self) -> None:
+        """Drop every entry"""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+        }
+
+
+def _copy(value: Any) -> Any:
+    """Shallow copy of a cached object, or of each object in a cached list"""
+    if isinstance(value, (list, tuple)):
+        return [copy.copy(item) for item in value]
+    return copy.copy(value)
@@ -0,0 +1,327 @@
+"""Opt-in per-query instrumentation
+
+When a Database is given a QueryStats, every pooled connection is
+opened as an InstrumentedConnection. Its cursors time each execute(),
+including the fetches that follow it, and file the sample under the
+name of the Database method that issued the query. Per query the stats
+keep call counts, a latency histogram and the slowest call.
+
+Calls above `slow_ms` go to a bounded in-memory log and, if configured,
+are appended as JSON lines to a slow-query log file. The first time a
+query is slow, its EXPLAIN QUERY PLAN is captured with the same
+parameters.
+
+Without a QueryStats the pool opens plain connections, so nothing is
+added to the query path.
+"""
+
+import json
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Upper bounds (ms) of the latency histogram buckets; one more bucket catches the rest
+LATENCY_BUCKETS_MS: Tuple[float, ...] = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000)
+
+_DATABASE_FILE = str(Path(__file__).with_name("database.py"))
+
+
+def _query_name() -> str:
+    """Name of the public Database method issuing the current query
+
+    Falls back to module.function of the nearest caller for queries that
+    do not come from Database (e.g. the view counter's flush thread).
+    """
+    frame = sys._getframe(2)
+    fallback = None
+    while frame is not None:
+        code = frame.f_code
+        if code.co_filename == _DATABASE_FILE and not code.co_name.startswith("_"):
+            return code.co_name
+        if fallback is None and code.co_filename != __file__:
+            fallback = f"{Path(code.co_filename).stem}.{code.co_name}"
+        frame = frame.f_back
+    return fallback or "unknown"
+
+
+def _bucket(ms: float) -> int:
+    """Histogram bucket index for a latency"""
+    for index, bound in enumerate(LATENCY_BUCKETS_MS):
+        if ms <= bound:
+            return index
+    return len(LATENCY_BUCKETS_MS)
+
+
+class _Record:
+    """Accumulated timings of one (name, statement) pair"""
+
+    __slots__ = ("name", "sql", "calls", "errors", "total_ms", "max_ms", "buckets",
+                 "slow_calls", "plan")
+
+    def __init__(self, name: str, sql: str):
+        self.name = name
+        self.sql = sql
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.slow_calls = 0
+        self.plan: Optional[List[str]] = None
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Upper bound of the bucket holding the given fraction of calls"""
+        if not self.calls:
+            return None
+        target = fraction * self.calls
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= target:
+                if index < len(LATENCY_BUCKETS_MS):
+                    return min(LATENCY_BUCKETS_MS[index], round(self.max_ms, 3))
+                return round(self.max_ms, 3)
+        return round(self.max_ms, 3)
+
+
+class _Sample:
+    """One in-flight call, extended by the fetches that follow execute()"""
+
+    __slots__ = ("record", "ms", "connection", "sql", "parameters")
+
+    def __init__(self, record: _Record, ms: float, connection: sqlite3.Connection,
+                 sql: str, parameters: Any):
+        self.record = record
+        self.ms = ms
+        self.connection = connection
+        self.sql = sql
+        self.parameters = parameters
+
+
+class QueryStats:
+    """Thread-safe per-query counters, histograms and slow-query log"""
+
+    def __init__(self, slow_ms: float = 100.0, slow_log: Optional[str] = None, keep_slow: int = 100):
+        """Initialize the stats
+
+        Args:
+            slow_ms: Calls taking longer than this are logged as slow
+            slow_log: File to append slow calls to as JSON lines (None = memory only)
+            keep_slow: Number of recent slow calls kept in memory
+        """
+        self.slow_ms = slow_ms
+        self.slow_log = slow_log
+        self.started_at = datetime.now()
+
+        self._records: Dict[Tuple[str, str], _Record] = {}
+        self._statements: Dict[str, str] = {}
+        self._slow: "deque[Dict[str, Any]]" = deque(maxlen=keep_slow)
+        self._lock = threading.Lock()
+
+    def _statement(self, sql: str) -> str:
+        """Whitespace-normalized SQL (cached, statements are mostly constants)"""
+        statement = self._statements.get(sql)
+        if statement is None:
+            statement = " ".join(sql.split())
+            if len(self._statements) < 10000:
+                self._statements[sql] = statement
+        return statement
+
+    def observe(self, connection: sqlite3.Connection, name: str, sql: str, parameters: Any,
+                ms: float, error: bool = False) -> _Sample:
+        """Record one execute() call"""
+        key = (name, self._statement(sql))
+        with self._lock:
+            record = self._records.get(key)
+            if record is None:
+                record = self._records[key] = _Record(*key)
+            record.calls += 1
+            record.errors += error
+            record.total_ms += ms
+            record.max_ms = max(record.max_ms, ms)
+            record.buckets[_bucket(ms)] += 1
+
+        sample = _Sample(record, ms, connection, sql, parameters)
+        if ms > self.slow_ms:
+            self._on_slow(sample)
+        return sample
+
+    def extend(self, sample: _Sample, ms: float) -> None:
+        """Add fetch time to a call already recorded by observe()"""
+        before = sample.ms
+        after = before + ms
+        sample.ms = after
+        record = sample.record
+        with self._lock:
+            record.total_ms += ms
+            record.max_ms = max(record.max_ms, after)
+            record.buckets[_bucket(before)] -= 1
+            record.buckets[_bucket(after)] += 1
+
+        if before <= self.slow_ms < after:
+            self._on_slow(sample)
+
+    def _on_slow(self, sample: _Sample) -> None:
+        """Log a slow call and capture its plan the first time"""
+        record = sample.record
+        with self._lock:
+            record.slow_calls += 1
+            needs_plan = record.plan is None and sample.parameters is not None
+
+        if needs_plan:
+            record.plan = self._explain(sample)
+
+        entry = {
+            "time": datetime.now().isoformat(timespec="milliseconds"),
+            "name": record.name,
+            "ms": round(sample.ms, 3),
+            "sql": record.sql,
+        }
+        with self._lock:
+            self._slow.append(entry)
+            if self.slow_log:
+                with open(self.slow_log, "a", encoding="utf-8") as log:
+                    log.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    @staticmethod
+    def _explain(sample: _Sample) -> List[str]:
+        """EXPLAIN QUERY PLAN of a sample, run on its own connection"""
+        try:
+            # A plain cursor, so the EXPLAIN itself is not instrumented
+            cursor = sqlite3.Cursor(sample.connection)
+            cursor.row_factory = None
+            rows = cursor.execute(f"EXPLAIN QUERY PLAN {sample.sql}", sample.parameters).fetchall()
+        except sqlite3.Error as e:
+            return [f"(plan unavailable: {e})"]
+        return [row[3] for row in rows]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """All stats as a JSON-serializable dict, slowest total time first"""
+        with self._lock:
+            records = sorted(self._records.values(), key=lambda r: r.total_ms, reverse=True)
+            slow = list(self._slow)
+
+        # Label statements sharing a method name as name[1], name[2], ...
+        per_name: Dict[str, int] = {}
+        for record in records:
+            per_name[record.name] = per_name.get(record.name, 0) + 1
+        seen: Dict[str, int] = {}
+
+        queries = []
+        for record in records:
+            label = record.name
+            if per_name[record.name] > 1:
+                seen[record.name] = seen.get(record.name, 0) + 1
+                label = f"{record.name}[{seen[record.name]}]"
+            queries.append({
+                "name": label,
+                "sql": record.sql,
+                "calls": record.calls,
+                "errors": record.errors,
+                "total_ms": round(record.total_ms, 3),
+                "mean_ms": round(record.total_ms / record.calls, 3) if record.calls else 0.0,
+                "max_ms": round(record.max_ms, 3),
+                "p50_ms": record.percentile(0.50),
+                "p95_ms": record.percentile(0.95),
+                "p99_ms": record.percentile(0.99),
+                "histogram": dict(zip([f"<={b}ms" for b in LATENCY_BUCKETS_MS] + ["more"],
+                                      record.buckets)),
+                "slow_calls": record.slow_calls,
+                "plan": record.plan,
+            })
+
+        return {
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "slow_ms": self.slow_ms,
+            "queries": queries,
+            "slow": slow,
+        }
+
+    def dump(self, path: str) -> None:
+        """Write snapshot() to a JSON file"""
+        Path(path).write_text(json.dumps(self.snapshot(), indent=2, ensure_ascii=False), encoding="utf-8")
+
+    def reset(self) -> None:
+        """Forget everything recorded so far"""
+        with self._lock:
+            self._records.clear()
+            self._slow.clear()
+            self.started_at = datetime.now()
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor timing execute() plus the fetches that follow it"""
+
+    _sample: Optional[_Sample] = None
+
+    def execute(self, sql: str, parameters: Any = ()) -> "InstrumentedCursor":
+        start = time.perf_counter()
+        error = False
+        try:
+            return super().execute(sql, parameters)
+        except sqlite3.Error:
+            error = True
+            raise
+        finally:
+            self._sample = self.connection.stats.observe(
+                self.connection, _query_name(), sql, parameters,
+                (time.perf_counter() - start) * 1000, error,
+            )
+
+    def executemany(self, sql: str, seq_of_parameters: Any) -> "InstrumentedCursor":
+        start = time.perf_counter()
+        error = False
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        except sqlite3.Error:
+            error = True
+            raise
+        finally:
+            # No parameters kept: a batch has no single plan worth capturing
+            self._sample = self.connection.stats.observe(
+                self.connection, _query_name(), sql, None,
+                (time.perf_counter() - start) * 1000, error,
+            )
+
+    def _extend(self, start: float) -> None:
+        if self._sample is not None:
+            self.connection.stats.extend(self._sample, (time.perf_counter() - start) * 1000)
+
+    def fetchone(self) -> Any:
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._extend(start)
+        return row
+
+    def fetchmany(self, size: int = None) -> List[Any]:
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._extend(start)
+        return rows
+
+    def fetchall(self) -> List[Any]:
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._extend(start)
+        return rows
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors (including execute() shortcuts) are instrumented"""
+
+    stats: Optional[QueryStats] = None
+
+    def cursor(self, factory: type = InstrumentedCursor) -> sqlite3.Cursor:
+        return super().cursor(factory)
+
+    def execute(self, sql: str, parameters: Any = ()) -> sqlite3.Cursor:
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters: Any) -> sqlite3.Cursor:
+        return self.cursor().executemany(sql, seq_of_parameters)
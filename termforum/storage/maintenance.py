@@ -0,0 +1,430 @@
+"""Background database maintenance
+
+A long-running forum needs upkeep that nothing else does. Query planner
+statistics go stale, pages freed by deletes are never returned to the
+filesystem, and soft-deleted rows stay in the tables forever. The
+MaintenanceScheduler runs these steps on a background thread, on an
+interval:
+
+- `PRAGMA optimize`, which re-analyzes tables whose statistics are stale
+- ANALYZE, one index at a time, on first use and then periodically
+- merging full-text index segments, a few pages per transaction
+- `PRAGMA incremental_vacuum`, a few pages per transaction
+- purging soft-deleted threads and posts older than a retention window,
+  when one is configured
+- trimming the change log to its newest rows
+
+Every step goes through the single writer connection, so an interactive
+write has to wait for whatever step is running. Each step therefore gets
+a time budget of a few milliseconds. A progress handler aborts any
+statement that runs past the budget, and loops stop taking new batches
+once it is spent. Unfinished work carries over to the next tick.
+`PRAGMA analysis_limit` keeps a single ANALYZE down to a bounded sample.
+
+Incremental vacuum needs `auto_vacuum = INCREMENTAL`. New databases get
+it from DEFAULT_PRAGMAS, but an existing database only switches after one
+full VACUUM (enable_incremental_vacuum()). That rewrites the whole file
+and blocks writers while it runs, so it is never done automatically.
+"""
+
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, ContextManager, Iterator, List, Optional
+
+from .search import SEARCH_TABLES
+
+
+DEFAULT_INTERVAL = 300.0
+DEFAULT_STEP_MS = 5.0
+# Soft-deleted rows are kept until a retention window is configured
+DEFAULT_RETENTION_DAYS: Optional[float] = None
+# Seconds between full ANALYZE passes once statistics exist
+DEFAULT_ANALYZE_INTERVAL = 24 * 3600.0
+# Rows sampled per index by ANALYZE and PRAGMA optimize
+ANALYSIS_LIMIT = 400
+# Pages freed per incremental_vacuum transaction
+VACUUM_PAGES = 64
+# Pages of search index segments merged per transaction
+MERGE_PAGES = 16
+# Largest number of rows deleted per purge transaction
+PURGE_BATCH = 200
+# Change log rows kept for readers catching up (older ones get a reload)
+DEFAULT_CHANGES_RETENTION = 100_000
+# SQLite VM instructions between time-box checks
+PROGRESS_STEPS = 1000
+
+# Soft-delete purge. Expired deleted threads go one at a time: their posts
+# newest first (so the parent_post_id cascade only ever removes leaves),
+# then the emptied thread.
+EXPIRED_THREAD_QUERY = """
+    SELECT id FROM threads WHERE is_deleted = 1 AND updated_epoch < :cutoff
+    ORDER BY updated_epoch, id LIMIT 1
+"""
+PURGE_THREAD_POSTS = """
+    DELETE FROM posts WHERE id IN (
+        SELECT id FROM posts WHERE thread_id = :thread_id ORDER BY id DESC LIMIT :limit
+    )
+"""
+PURGE_THREAD = "DELETE FROM threads WHERE id = :thread_id AND is_deleted = 1"
+
+# Other expired deleted posts are swept in id order from a cursor kept
+# between batches. Only posts with no replies left are purged; a deleted
+# post with live replies stays behind as a tombstone.
+EXPIRED_POSTS_QUERY = """
+    SELECT id FROM posts
+    WHERE is_deleted = 1 AND id > :after AND updated_epoch < :cutoff
+    ORDER BY id LIMIT :limit
+"""
+PURGE_POSTS = """
+    DELETE FROM posts WHERE id IN ({ids}) AND is_deleted = 1
+      AND NOT EXISTS (SELECT 1 FROM posts child WHERE child.parent_post_id = posts.id)
+"""
+
+PRUNE_CHANGES = """
+    DELETE FROM changes WHERE seq IN (
+        SELECT seq FROM changes WHERE seq <= :upto ORDER BY seq LIMIT :limit
+    )
+"""
+
+# Partial indexes that let the purge find expired rows without a scan
+PURGE_SCHEMA: List[str] = [
+    "CREATE INDEX IF NOT EXISTS idx_threads_deleted ON threads(updated_epoch) WHERE is_deleted = 1",
+    "CREATE INDEX IF NOT EXISTS idx_posts_deleted ON posts(id, updated_epoch) WHERE is_deleted = 1",
+]
+
+
+@dataclass
+class MaintenanceReport:
+    """What one maintenance pass did"""
+
+    optimized: bool = False
+    analyzed: List[str] = field(default_factory=list)
+    merged_steps: int = 0
+    vacuumed_pages: int = 0
+    purged_threads: int = 0
+    purged_posts: int = 0
+    pruned_changes: int = 0
+    # Steps whose budget ran out with work left
+    interrupted: List[str] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def idle(self) -> bool:
+        """Nothing was left to do
+
+        PRAGMA optimize carries no work over between passes, so running out
+        of budget there does not count.
+        """
+        return not (self.analyzed or self.merged_steps or self.vacuumed_pages or self.purged_threads
+                    or self.purged_posts or self.pruned_changes or set(self.interrupted) - {"optimize"})
+
+
+def create_purge_schema(cursor: sqlite3.Cursor) -> None:
+    """Create the indexes used to find expired soft-deleted rows"""
+    for statement in PURGE_SCHEMA:
+        cursor.execute(statement)
+
+
+def enable_incremental_vacuum(conn: sqlite3.Connection) -> bool:
+    """Switch a database to auto_vacuum = INCREMENTAL
+
+    Runs a full VACUUM, which rewrites the file and blocks writers for its
+    duration. Use it once, while the forum is idle.
+
+    Returns:
+        False if the database already used incremental vacuum
+    """
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        return False
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("VACUUM")
+    return True
+
+
+@contextmanager
+def time_box(conn: sqlite3.Connection, deadline: float) -> Iterator[None]:
+    """Abort statements on conn that are still running at deadline
+
+    The aborted statement raises sqlite3.OperationalError("interrupted").
+    """
+    conn.set_progress_handler(lambda: time.perf_counter() > deadline, PROGRESS_STEPS)
+    try:
+        yield
+    finally:
+        conn.set_progress_handler(None, 0)
+
+
+def _interrupted(error: sqlite3.Error) -> bool:
+    return isinstance(error, sqlite3.OperationalError) and "interrupted" in str(error)
+
+
+class MaintenanceScheduler:
+    """Runs time-boxed maintenance steps on a background thread"""
+
+    def __init__(self, write: Callable[[], ContextManager[sqlite3.Connection]],
+                 interval: Optional[float] = DEFAULT_INTERVAL, step_ms: float = DEFAULT_STEP_MS,
+                 retention_days: Optional[float] = DEFAULT_RETENTION_DAYS,
+                 analyze_interval: float = DEFAULT_ANALYZE_INTERVAL,
+                 changes_retention: int = DEFAULT_CHANGES_RETENTION,
+                 paused: Callable[[], bool] = lambda: False,
+                 on_purge: Optional[Callable[[], None]] = None):
+        """Initialize the scheduler
+
+        Args:
+            write: Callable returning the database writer context manager
+            interval: Seconds between passes (None disables the background thread)
+            step_ms: Time budget of each step, in milliseconds
+            retention_days: Purge soft-deleted rows older than this (None keeps them)
+            analyze_interval: Seconds between full ANALYZE passes
+            changes_retention: Newest change log rows to keep
+            paused: Skip passes while this returns True (e.g. during a bulk load)
+            on_purge: Called after a pass that deleted rows
+        """
+        self._write = write
+        self.interval = interval
+        self.step_budget = step_ms / 1000
+        self.retention_days = retention_days
+        self.analyze_interval = analyze_interval
+        self.changes_retention = changes_retention
+        self._paused = paused
+        self._on_purge = on_purge
+
+        self._analyze_queue: List[str] = []
+        self._last_analyze: Optional[float] = None
+        self._purge_batch = PURGE_BATCH
+        self._purge_after = 0
+        self._last_batch = 0.0
+        self._pass_lock = threading.Lock()
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ════════════════════════════════════════════
+    # STEPS
+    # ════════════════════════════════════════════
+    # Each step returns False when its budget ran out with work left.
+
+    def optimize(self, report: MaintenanceReport) -> bool:
+        """PRAGMA optimize with a bounded ANALYZE sample"""
+        with self._write() as conn, time_box(conn, time.perf_counter() + self.step_budget):
+            conn.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+            conn.execute("PRAGMA optimize").fetchall()
+        report.optimized = True
+        return True
+
+    def analyze(self, report: MaintenanceReport) -> bool:
+        """ANALYZE queued indexes until the budget is spent, refilling the queue when due"""
+        deadline = time.perf_counter() + self.step_budget
+        with self._write() as conn:
+            if not self._analyze_queue and self._analyze_due(conn):
+                self._analyze_queue = [row[0] for row in conn.execute("""
+                    SELECT i.name FROM sqlite_master i
+                    JOIN pragma_table_list t ON t.schema = 'main' AND t.name = i.tbl_name
+                    WHERE i.type = 'index' AND t.type = 'table' AND t.name NOT LIKE 'sqlite_%'
+                    ORDER BY i.name
+                """)]
+                self._last_analyze = time.monotonic()
+
+            conn.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+            while self._analyze_queue and time.perf_counter() < deadline:
+                name = self._analyze_queue.pop(0)
+                try:
+                    with time_box(conn, deadline):
+                        conn.execute(f'ANALYZE "{name}"')
+                except sqlite3.OperationalError as e:
+                    if not _interrupted(e):
+                        continue  # Index was dropped since it was queued
+                    self._analyze_queue.append(name)
+                    raise
+                report.analyzed.append(name)
+        return not self._analyze_queue
+
+    def _analyze_due(self, conn: sqlite3.Connection) -> bool:
+        """Whether a full ANALYZE pass should start"""
+        if self._last_analyze is None:
+            # Only skip the first pass if statistics already exist
+            has_stats = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+            ).fetchone()
+            if not has_stats:
+                return True
+            self._last_analyze = time.monotonic()
+        return time.monotonic() - self._last_analyze >= self.analyze_interval
+
+    def merge(self, report: MaintenanceReport) -> bool:
+        """Merge full-text index segments a few pages at a time
+
+        Otherwise FTS5 merges whole segments inside whichever write happens
+        to trigger its automerge, which can take tens of milliseconds.
+        """
+        deadline = time.perf_counter() + self.step_budget
+        for table in SEARCH_TABLES:
+            while True:
+                if time.perf_counter() >= deadline:
+                    return False
+                with self._write() as conn, time_box(conn, deadline):
+                    before = conn.total_changes
+                    conn.execute(f"INSERT INTO {table}({table}, rank) VALUES ('merge', {MERGE_PAGES})")
+                    # FTS5 reports fewer than two changes when there was nothing to merge
+                    if conn.total_changes - before < 2:
+                        break
+                report.merged_steps += 1
+        return True
+
+    def vacuum(self, report: MaintenanceReport) -> bool:
+        """Return free pages to the filesystem a few at a time"""
+        deadline = time.perf_counter() + self.step_budget
+        while time.perf_counter() < deadline:
+            with self._write() as conn:
+                if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                    return True
+                free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                if not free:
+                    return True
+                with time_box(conn, deadline):
+                    conn.execute(f"PRAGMA incremental_vacuum({VACUUM_PAGES})").fetchall()
+                report.vacuumed_pages += min(free, VACUUM_PAGES)
+        return False
+
+    def purge(self, report: MaintenanceReport) -> bool:
+        """Delete expired soft-deleted threads and posts in small batches"""
+        if self.retention_days is None:
+            return True
+        cutoff = int(time.time() - self.retention_days * 86400)
+        deadline = time.perf_counter() + self.step_budget
+        self._last_batch = 0.0
+
+        while True:
+            with self._write() as conn:
+                row = conn.execute(EXPIRED_THREAD_QUERY, {"cutoff": cutoff}).fetchone()
+            if row is None:
+                break
+            params = {"thread_id": row[0], "limit": self._purge_batch}
+            deleted = self._delete(PURGE_THREAD_POSTS, params, deadline)
+            if deleted is None:
+                return False
+            report.purged_posts += deleted
+            if not deleted:
+                deleted = self._delete(PURGE_THREAD, params, deadline)
+                if deleted is None:
+                    return False
+                report.purged_threads += deleted
+                if not deleted:
+                    break  # Restored meanwhile
+
+        while True:
+            with self._write() as conn:
+                ids = [row[0] for row in conn.execute(EXPIRED_POSTS_QUERY, {
+                    "cutoff": cutoff, "after": self._purge_after, "limit": self._purge_batch,
+                })]
+            if not ids:
+                self._purge_after = 0  # Sweep from the start next time
+                return True
+            deleted = self._delete(PURGE_POSTS.format(ids=", ".join("?" for _ in ids)), ids, deadline)
+            if deleted is None:
+                return False
+            self._purge_after = ids[-1]
+            report.purged_posts += deleted
+
+    def prune(self, report: MaintenanceReport) -> bool:
+        """Trim the change log to its newest changes_retention rows"""
+        deadline = time.perf_counter() + self.step_budget
+        self._last_batch = 0.0
+        with self._write() as conn:
+            upto = conn.execute("SELECT MAX(seq) FROM changes").fetchone()[0]
+        if upto is None or upto <= self.changes_retention:
+            return True
+        upto -= self.changes_retention
+
+        while True:
+            deleted = self._delete(PRUNE_CHANGES, {"upto": upto, "limit": self._purge_batch}, deadline)
+            if deleted is None:
+                return False
+            if not deleted:
+                return True
+            report.pruned_changes += deleted
+
+    def _delete(self, sql: str, params: Any, deadline: float) -> Optional[int]:
+        """Run one purge batch within the budget, adapting the batch size
+
+        Returns:
+            Rows deleted, or None if the budget is spent or purging is paused
+        """
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0 or remaining < self._last_batch:
+            return None  # Another batch would overrun the budget
+
+        started = time.perf_counter()
+        try:
+            with self._write() as conn, time_box(conn, deadline):
+                # Checked under the writer lock: deletes need the triggers
+                if self._paused():
+                    return None
+                deleted = conn.execute(sql, params).rowcount
+        except sqlite3.OperationalError as e:
+            if _interrupted(e):
+                self._purge_batch = max(1, self._purge_batch // 2)
+            raise
+        self._last_batch = time.perf_counter() - started
+
+        # Aim for batches of a quarter to half the budget
+        if self._last_batch < self.step_budget / 4:
+            self._purge_batch = min(PURGE_BATCH, self._purge_batch * 2)
+        elif self._last_batch > self.step_budget / 2:
+            self._purge_batch = max(1, self._purge_batch // 2)
+        return deleted
+
+    # ════════════════════════════════════════════
+    # SCHEDULING
+    # ════════════════════════════════════════════
+
+    def run_once(self) -> MaintenanceReport:
+        """Run every step once, each within its time budget"""
+        report = MaintenanceReport()
+        if self._paused():
+            return report
+
+        started = time.perf_counter()
+        with self._pass_lock:
+            # ANALYZE first: once sqlite_stat1 exists it only runs when due
+            for name, step in (("analyze", self.analyze), ("optimize", self.optimize),
+                               ("merge", self.merge), ("purge", self.purge), ("prune", self.prune),
+                               ("vacuum", self.vacuum)):
+                try:
+                    finished = step(report)
+                except sqlite3.OperationalError as e:
+                    if not _interrupted(e):
+                        raise
+                    finished = False
+                if not finished:
+                    report.interrupted.append(name)
+        report.seconds = time.perf_counter() - started
+
+        if (report.purged_threads or report.purged_posts) and self._on_purge is not None:
+            self._on_purge()
+        return report
+
+    def start(self) -> None:
+        """Start the background thread"""
+        if self.interval is None or self._thread is not None or self._stop.is_set():
+            return
+        self._thread = threading.Thread(target=self._run, name="termforum-maintenance", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        """Background loop running a pass on an interval"""
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except sqlite3.Error:
+                pass  # Retried on the next tick
+
+    def close(self) -> None:
+        """Stop the background thread, waiting for a running pass"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,138 @@
+"""Positional row-to-model mapping
+
+Each model gets one RowMapper. The first time it sees a result shape
+(the column names in cursor.description) it works out, once, which
+column feeds which dataclass field and which values need converting.
+Whole result sets are then built in a tight loop of positional
+constructor calls, with no per-row name lookups. Timestamp fields that
+are LazyTimestamps (see models/timestamp.py) get the stored value and
+decode it themselves when read.
+"""
+
+from dataclasses import MISSING, fields
+from datetime import datetime
+from functools import lru_cache
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ..models.timestamp import LazyTimestamp
+from .epoch import from_epoch
+
+
+@lru_cache(maxsize=8192)
+def _parse_timestamp(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Parse an SQLite timestamp string, reusing results for repeated strings
+
+    datetime objects are immutable, so sharing them between models is safe.
+    """
+    if value is None:
+        return None
+    return _parse_timestamp(value)
+
+
+def _constant(value: Any) -> Callable[[Any], Any]:
+    """Converter ignoring its input (fills fields the query did not select)"""
+    return lambda _: value
+
+
+# (getter, [(position, converter), ...]) for one result shape
+_Plan = Tuple[Callable[[Sequence[Any]], Tuple[Any, ...]], List[Tuple[int, Callable[[Any], Any]]]]
+
+
+class RowMapper:
+    """Builds dataclass models from result rows by column position"""
+
+    def __init__(self, model: type, timestamps: Iterable[str] = (), flags: Iterable[str] = (),
+                 converters: Dict[str, Callable[[Any], Any]] = None, epochs: Dict[str, str] = None):
+        """Initialize the mapper
+
+        Args:
+            model: Dataclass to build; columns are matched to its fields by name
+            timestamps: Fields parsed with parse_timestamp (LazyTimestamp fields need not be listed)
+            flags: Integer fields exposed as bool
+            converters: Extra per-field converters
+            epochs: Timestamp field -> integer epoch column, preferred when selected
+        """
+        self.model = model
+        self.epochs = epochs or {}
+        self.converters: Dict[str, Callable[[Any], Any]] = {
+            **{name: parse_timestamp for name in timestamps},
+            **{name: bool for name in flags},
+            **(converters or {}),
+        }
+        self._fields = [field for field in fields(model) if field.init]
+        # Fields that take the stored value and decode it on read
+        self._lazy = {
+            field.name for field in self._fields if isinstance(vars(model).get(field.name), LazyTimestamp)
+        }
+        self._plans: Dict[Tuple[str, ...], _Plan] = {}
+
+    def _plan(self, description: Sequence[Sequence[Any]]) -> _Plan:
+        """Column positions and converters for one result shape (cached)"""
+        names = tuple(column[0] for column in description)
+        plan = self._plans.get(names)
+        if plan is not None:
+            return plan
+
+        # First occurrence wins, so "t.*" columns beat same-named joined ones
+        positions: Dict[str, int] = {}
+        for index, name in enumerate(names):
+            positions.setdefault(name, index)
+
+        indices = []
+        conversions = []
+        for position, field in enumerate(self._fields):
+            epoch_column = self.epochs.get(field.name)
+            if epoch_column in positions:
+                indices.append(positions[epoch_column])
+                if field.name not in self._lazy:
+                    conversions.append((position, from_epoch))
+            elif field.name in positions:
+                indices.append(positions[field.name])
+                converter = self.converters.get(field.name)
+                if converter is not None and field.name not in self._lazy:
+                    conversions.append((position, converter))
+            elif field.default is not MISSING:
+                indices.append(0)
+                conversions.append((position, _constant(field.default)))
+            elif field.default_factory is not MISSING:
+                indices.append(0)
+                conversions.append((position, lambda _, factory=field.default_factory: factory()))
+            else:
+                raise ValueError(f"{self.model.__name__}: query has no column for '{field.name}'")
+
+        plan = (itemgetter(*indices), conversions)
+        self._plans[names] = plan
+        return plan
+
+    def map(self, description: Sequence[Sequence[Any]], rows: Iterable[Sequence[Any]]) -> List[Any]:
+        """Build one model per row
+
+        Args:
+            description: cursor.description of the query that produced the rows
+            rows: Result rows (tuples or sqlite3.Row)
+        """
+        getter, conversions = self._plan(description)
+        model = self.model
+
+        if not conversions:
+            return [model(*getter(row)) for row in rows]
+
+        models = []
+        append = models.append
+        for row in rows:
+            values = list(getter(row))
+            for position, converter in conversions:
+                values[position] = converter(values[position])
+            append(model(*values))
+        return models
+
+    def map_one(self, description: Sequence[Sequence[Any]], row: Optional[Sequence[Any]]) -> Optional[Any]:
+        """Build a model from a single row, or None when there is no row"""
+        if row is None:
+            return None
+        return self.map(description, (row,))[0]
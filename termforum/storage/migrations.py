@@ -0,0 +1,271 @@
+"""Versioned schema migrations
+
+`PRAGMA user_version` holds the number of the last applied migration.
+Opening a Database runs every newer migration in order. Each step
+commits together with its version bump, so an interrupted upgrade
+resumes from the last completed step.
+
+A step runs in a single write transaction, except for its backfills.
+These fill in rows for the step's new schema a chunk of ids at a time,
+each chunk in its own short transaction, so other writers are blocked
+for one chunk rather than for the whole table. The version is bumped
+once every backfill is done, and an interrupted backfill starts over
+on the next run, skipping rows that are already filled in. Index builds
+stay in the step's transaction, since SQLite builds an index in one
+statement. `termforum migrate --dry-run` shows each step's estimated row
+count first, so a long step can be scheduled for a quiet moment.
+"""
+
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from .archive import create_candidates_schema
+from .changes import create_changes_schema
+from .maintenance import create_purge_schema
+from .pool import ConnectionPool, register_functions
+from .schema import create_base_schema
+from .search import index_missing, store_search_text
+from .sharding import create_shard_schema
+
+
+# Rows filled in per transaction by a backfill
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def _no_rows(conn: sqlite3.Connection) -> int:
+    return 0
+
+
+@dataclass(frozen=True)
+class Backfill:
+    """Rows of one table filled in after a step's schema change
+
+    fill(cursor, first_id, last_id) handles one chunk of ids and must skip
+    rows that are already done, so an interrupted backfill can rerun.
+    """
+
+    table: str
+    fill: Callable[[sqlite3.Cursor, int, int], None]
+
+
+@dataclass(frozen=True)
+class Migration:
+    """One schema step
+
+    apply runs inside the step's transaction, then each backfill in its own
+    chunked transactions. estimate returns the number of rows the step is
+    expected to touch.
+    """
+
+    version: int
+    name: str
+    apply: Callable[[sqlite3.Cursor], None]
+    estimate: Callable[[sqlite3.Connection], int] = _no_rows
+    backfills: Tuple[Backfill, ...] = ()
+
+
+@dataclass(frozen=True)
+class MigrationResult:
+    """Outcome of one applied step"""
+
+    version: int
+    name: str
+    estimated_rows: int
+    seconds: float
+
+
+# ════════════════════════════════════════════
+# HELPERS
+# ════════════════════════════════════════════
+
+def count_rows(conn: sqlite3.Connection, *tables: str) -> int:
+    """Total rows in the given tables, skipping tables that do not exist yet"""
+    total = 0
+    for table in tables:
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ).fetchone()
+        if exists:
+            total += conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    return total
+
+
+def table_columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    """Stored (non-generated) column names of a table"""
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()]
+
+
+def add_columns(cursor: sqlite3.Cursor, table: str, columns: Dict[str, str]) -> None:
+    """ALTER TABLE ADD COLUMN for each column that is not there yet"""
+    existing = set(table_columns(cursor.connection, table))
+    for name, definition in columns.items():
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+
+
+def run_backfill(pool: ConnectionPool, backfill: Backfill, chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+    """Walk a table's ids in chunks, filling in each chunk in its own transaction"""
+    last_id = 0
+    while True:
+        with pool.write() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            upto = conn.execute(
+                f"SELECT MAX(id) FROM (SELECT id FROM {backfill.table} WHERE id > ? ORDER BY id LIMIT ?)",
+                (last_id, chunk_size),
+            ).fetchone()[0]
+            if upto is None:
+                return
+            backfill.fill(conn.cursor(), last_id + 1, upto)
+        last_id = upto
+
+
+# ════════════════════════════════════════════
+# MIGRATIONS
+# ════════════════════════════════════════════
+
+def _add_user_auth_columns(cursor: sqlite3.Cursor) -> None:
+    add_columns(cursor, "users", {
+        "password_hash": "TEXT",
+        "failed_login_attempts": "INTEGER DEFAULT 0",
+        "account_locked_until": "TIMESTAMP",
+    })
+
+
+# Append new steps at the end; never edit or reorder applied ones
+MIGRATIONS: List[Migration] = [
+    Migration(
+        1, "Base tables, indexes, search, counters",
+        apply=create_base_schema,
+        # Databases created before versioning may need tree paths and counters backfilled
+        estimate=lambda conn: count_rows(conn, "users", "categories", "threads", "posts"),
+    ),
+    Migration(
+        2, "User authentication columns",
+        apply=_add_user_auth_columns,
+    ),
+    Migration(
+        3, "Soft-delete purge indexes",
+        apply=create_purge_schema,
+        estimate=lambda conn: count_rows(conn, "threads", "posts"),
+    ),
+    Migration(
+        4, "Change log",
+        apply=create_changes_schema,
+    ),
+    Migration(
+        5, "Archive candidate index",
+        apply=create_candidates_schema,
+        estimate=lambda conn: count_rows(conn, "threads"),
+    ),
+    Migration(
+        6, "Shard map",
+        apply=create_shard_schema,
+    ),
+    # Steps 7 and 8 once built intermediate search index layouts. They now go
+    # straight to the layout of step 9, which indexes the rows.
+    Migration(
+        7, "Search index over compressed bodies",
+        apply=store_search_text,
+        estimate=lambda conn: count_rows(conn, "threads", "posts"),
+    ),
+    Migration(
+        8, "Single search update trigger per table",
+        apply=store_search_text,
+        estimate=lambda conn: count_rows(conn, "threads", "posts"),
+    ),
+    Migration(
+        9, "Search index keeps its own copy of the text",
+        apply=store_search_text,
+        estimate=lambda conn: count_rows(conn, "threads", "posts"),
+        backfills=(
+            Backfill("threads", lambda cursor, first, last: index_missing(cursor, "threads", first, last)),
+            Backfill("posts", lambda cursor, first, last: index_missing(cursor, "posts", first, last)),
+        ),
+    ),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
+
+# ════════════════════════════════════════════
+# RUNNER
+# ════════════════════════════════════════════
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    """Last applied migration version"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def pending_migrations(conn: sqlite3.Connection,
+                       migrations: List[Migration] = MIGRATIONS) -> List[Migration]:
+    """Migrations newer than the database's version, in order"""
+    current = schema_version(conn)
+    return [migration for migration in migrations if migration.version > current]
+
+
+def plan_migrations(db_path: str,
+                    migrations: List[Migration] = MIGRATIONS) -> Tuple[int, List[Tuple[Migration, int]]]:
+    """Pending migrations and their row estimates, without changing the database
+
+    Returns:
+        (current version, [(migration, estimated rows), ...])
+    """
+    uri = f"{Path(db_path).resolve().as_uri()}?mode=ro"
+    conn = sqlite3.connect(uri, uri=True)
+    register_functions(conn)
+    try:
+        return schema_version(conn), [
+            (migration, migration.estimate(conn)) for migration in pending_migrations(conn, migrations)
+        ]
+    finally:
+        conn.close()
+
+
+def migrate(pool: ConnectionPool, migrations: List[Migration] = MIGRATIONS,
+            progress: Callable[[MigrationResult], None] = None,
+            chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[MigrationResult]:
+    """Apply every pending migration in order
+
+    Args:
+        pool: Connection pool of the database
+        migrations: Migration list (defaults to MIGRATIONS)
+        progress: Called with each step's result as soon as it completes
+        chunk_size: Rows filled in per backfill transaction
+
+    Returns:
+        One result per applied step, with its timing
+    """
+    results = []
+    with pool.write() as conn:
+        pending = pending_migrations(conn, migrations)
+
+    for migration in pending:
+        with pool.write() as conn:
+            estimated = migration.estimate(conn)
+        start = time.perf_counter()
+
+        with pool.write() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # Another process may have applied this step while we waited for the lock
+            if schema_version(conn) >= migration.version:
+                continue
+            migration.apply(conn.cursor())
+            if not migration.backfills:
+                conn.execute(f"PRAGMA user_version = {migration.version}")
+
+        if migration.backfills:
+            for backfill in migration.backfills:
+                run_backfill(pool, backfill, chunk_size)
+            with pool.write() as conn:
+                conn.execute(f"PRAGMA user_version = {migration.version}")
+
+        result = MigrationResult(migration.version, migration.name, estimated,
+                                 time.perf_counter() - start)
+        results.append(result)
+        if progress is not None:
+            progress(result)
+
+    return results
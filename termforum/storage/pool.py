@@ -0,0 +1,256 @@
+"""SQLite connection pool for TermForum
+
+WAL mode lets any number of readers run alongside a single writer.
+The pool hands out read-only connections to readers and serializes
+all writes through one shared writer connection.
+"""
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from ..models.body import decode_body
+from .instrumentation import InstrumentedConnection, QueryStats
+
+
+# Pragmas applied to every connection (journal_mode and auto_vacuum are only
+# set by the writer; auto_vacuum only takes effect on a new, empty database)
+DEFAULT_PRAGMAS: Dict[str, Any] = {
+    "auto_vacuum": "INCREMENTAL",
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -16000,      # negative = KiB, so ~16 MB per connection
+    "mmap_size": 134217728,    # 128 MB
+    "busy_timeout": 5000,      # milliseconds
+    "foreign_keys": "ON",
+}
+
+# Pragmas that change the database file, so read-only connections skip them
+WRITER_PRAGMAS = ("auto_vacuum", "journal_mode")
+
+
+def apply_pragmas(conn: sqlite3.Connection, pragmas: Dict[str, Any], writer: bool = True) -> None:
+    """Apply pragmas to a connection
+
+    Args:
+        conn: Connection to configure
+        pragmas: Mapping of pragma name to value
+        writer: Whether this is the writer connection (controls WRITER_PRAGMAS)
+    """
+    for name, value in pragmas.items():
+        if value is None:
+            continue
+        if name in WRITER_PRAGMAS and not writer:
+            continue
+        conn.execute(f"PRAGMA {name} = {value}")
+
+
+def register_functions(conn: sqlite3.Connection) -> None:
+    """Register the SQL functions termforum's own statements call
+
+    Rebuilding the search index, migrations, bulk loads and dumps decode
+    compressed bodies with `body()` (see search.py). The schema itself
+    never calls it, so other SQLite clients work without it. Call this on
+    every connection termforum opens outside the pool.
+    """
+    conn.create_function("body", 1, decode_body, deterministic=True)
+
+
+class ConnectionPool:
+    """Pool of read-only connections plus one serialized writer"""
+
+    def __init__(self, db_path: str, size: int = 4, pragmas: Optional[Dict[str, Any]] = None,
+                 stats: Optional[QueryStats] = None, attachments: Optional[Dict[str, str]] = None):
+        """Initialize the pool
+
+        Args:
+            db_path: Path to the SQLite database file
+            size: Maximum number of reader connections
+            pragmas: Pragma overrides merged over DEFAULT_PRAGMAS
+            stats: Record per-query timings here (None disables instrumentation)
+            attachments: Schema name -> database file ATTACHed to every connection
+                (created by the writer if missing, read-only for readers)
+        """
+        self.db_path = db_path
+        self.size = max(1, size)
+        self.pragmas = {**DEFAULT_PRAGMAS, **(pragmas or {})}
+        self.stats = stats
+        self.attachments = dict(attachments or {})
+
+        # In-memory databases are private to one connection, so readers share the writer
+        self.shared = db_path == ":memory:" or db_path.startswith("file::memory:")
+
+        self._write_lock = threading.RLock()
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+        # Readers currently borrowed, by thread id (for interrupt_readers)
+        self._borrowed: Dict[int, List[sqlite3.Connection]] = {}
+        self._closed = False
+
+        self.writer = self._open(writer=True)
+        # Polled by data_version() so cache checks never wait on the writer lock
+        self._version_conn: Optional[sqlite3.Connection] = None
+        self._version_lock = threading.Lock()
+        # Last data_version() seen by foreign_version(), and the writer's version then
+        self._polled: Optional[int] = None
+        self._foreign = 0
+
+    def _open(self, writer: bool) -> sqlite3.Connection:
+        """Open and configure a new connection"""
+        factory = InstrumentedConnection if self.stats is not None else sqlite3.Connection
+        if writer or self.shared:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, factory=factory)
+        else:
+            uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False, factory=factory)
+        if self.stats is not None:
+            conn.stats = self.stats
+        conn.row_factory = sqlite3.Row
+        register_functions(conn)
+        apply_pragmas(conn, self.pragmas, writer=writer)
+        for name, path in self.attachments.items():
+            if writer or self.shared:
+                conn.execute(f"ATTACH DATABASE ? AS {name}", (path,))
+                if self.pragmas.get("journal_mode"):
+                    conn.execute(f"PRAGMA {name}.journal_mode = {self.pragmas['journal_mode']}")
+            else:
+                conn.execute(f"ATTACH DATABASE ? AS {name}", (f"{Path(path).resolve().as_uri()}?mode=ro",))
+        return conn
+
+    @property
+    def journal_mode(self) -> str:
+        """Journal mode actually in effect on the writer"""
+        return self.writer.execute("PRAGMA journal_mode").fetchone()[0]
+
+    def data_version(self) -> int:
+        """PRAGMA data_version of a connection kept for polling it
+
+        Changes whenever any other connection (or process) commits,
+        including this pool's writer. The connection is separate from
+        the writer and the readers, so a poll never queues behind a
+        write transaction or waits for a free reader.
+        """
+        if self.shared:
+            with self._write_lock:
+                return self.writer.execute("PRAGMA data_version").fetchone()[0]
+
+        with self._version_lock:
+            if self._version_conn is None:
+                uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+                self._version_conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+                register_functions(self._version_conn)
+            return self._version_conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def foreign_version(self) -> int:
+        """Version that changes only when another connection (or process) commits
+
+        data_version() also moves on this pool's own commits. The writer's
+        own PRAGMA data_version ignores them, but reading it takes the
+        writer lock, so it is read only after data_version() has moved.
+        """
+        if self.shared:
+            return self.data_version()
+
+        version = self.data_version()
+        with self._version_lock:
+            if version == self._polled:
+                return self._foreign
+        with self._write_lock:
+            foreign = self.writer.execute("PRAGMA data_version").fetchone()[0]
+        with self._version_lock:
+            self._polled, self._foreign = version, foreign
+        return foreign
+
+    @contextmanager
+    def write(self) -> Iterator[sqlite3.Connection]:
+        """Borrow the writer connection inside a transaction
+
+        Commits on success and rolls back on error. Nested use from the
+        same thread joins the outer transaction.
+        """
+        with self._write_lock:
+            conn = self.writer
+            outer = not conn.in_transaction
+            try:
+                yield conn
+            except BaseException:
+                if outer:
+                    conn.rollback()
+                raise
+            else:
+                if outer:
+                    conn.commit()
+
+    @contextmanager
+    def read(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a reader connection"""
+        if self.shared:
+            with self._write_lock:
+                yield self.writer
+            return
+
+        conn = self._acquire()
+        thread_id = threading.get_ident()
+        with self._readers_lock:
+            self._borrowed.setdefault(thread_id, []).append(conn)
+        try:
+            yield conn
+        finally:
+            with self._readers_lock:
+                borrowed = self._borrowed[thread_id]
+                borrowed.remove(conn)
+                if not borrowed:
+                    del self._borrowed[thread_id]
+            # Never hand a connection back with an open read transaction
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+
+    def _acquire(self) -> sqlite3.Connection:
+        """Take an idle reader, opening a new one while under the size limit"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._readers_lock:
+            if len(self._readers) < self.size:
+                conn = self._open(writer=False)
+                self._readers.append(conn)
+                return conn
+
+        return self._idle.get()
+
+    def interrupt_readers(self, thread_id: Optional[int] = None) -> None:
+        """Abort any query currently running on a reader connection
+
+        Args:
+            thread_id: Only interrupt readers borrowed by this thread (None for all)
+        """
+        with self._readers_lock:
+            if thread_id is None:
+                readers = self._readers
+            else:
+                readers = self._borrowed.get(thread_id, [])
+            for conn in readers:
+                conn.interrupt()
+
+    def close(self) -> None:
+        """Close every connection in the pool"""
+        if self._closed:
+            return
+        self._closed = True
+        with self._readers_lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers.clear()
+        with self._version_lock:
+            if self._version_conn is not None:
+                self._version_conn.close()
+                self._version_conn = None
+        with self._write_lock:
+            self.writer.close()
@@ -0,0 +1,67 @@
+"""Materialized-path reply trees
+
+Every post stores `path`, the zero-padded ids of its ancestors and itself
+(e.g. `0000000012/0000000045/`), and its `depth`. Sorting a thread's
+posts by path yields depth-first display order, and any subtree is one
+contiguous index range, so deep threads can be fetched and paged
+without recursion.
+"""
+
+import sqlite3
+from typing import List, Tuple
+
+
+# Width of each path segment; ids up to 10 digits keep lexical order == numeric order
+SEGMENT_WIDTH = 10
+
+TREE_SCHEMA: List[str] = [
+    "CREATE INDEX IF NOT EXISTS idx_posts_parent ON posts(parent_post_id)",
+    "CREATE INDEX IF NOT EXISTS idx_posts_tree ON posts(thread_id, path)",
+    f"""
+    CREATE TRIGGER IF NOT EXISTS posts_tree_insert AFTER INSERT ON posts
+    BEGIN
+        UPDATE posts
+        SET path = COALESCE((SELECT path FROM posts WHERE id = new.parent_post_id), '')
+                   || printf('%0{SEGMENT_WIDTH}d/', new.id),
+            depth = COALESCE((SELECT depth + 1 FROM posts WHERE id = new.parent_post_id), 0)
+        WHERE id = new.id;
+    END
+    """,
+]
+
+BACKFILL_QUERY = f"""
+    WITH RECURSIVE tree(id, path, depth) AS (
+        SELECT id, printf('%0{SEGMENT_WIDTH}d/', id), 0 FROM posts WHERE parent_post_id IS NULL
+        UNION ALL
+        SELECT p.id, tree.path || printf('%0{SEGMENT_WIDTH}d/', p.id), tree.depth + 1
+        FROM posts p JOIN tree ON p.parent_post_id = tree.id
+    )
+    UPDATE posts SET path = tree.path, depth = tree.depth
+    FROM tree WHERE posts.id = tree.id
+"""
+
+
+def create_tree_schema(cursor: sqlite3.Cursor) -> None:
+    """Add path/depth to posts if missing, then create the index and trigger"""
+    cursor.execute("PRAGMA table_info(posts)")
+    columns = {row[1] for row in cursor.fetchall()}
+
+    added = False
+    if "path" not in columns:
+        cursor.execute("ALTER TABLE posts ADD COLUMN path TEXT")
+        added = True
+    if "depth" not in columns:
+        cursor.execute("ALTER TABLE posts ADD COLUMN depth INTEGER DEFAULT 0")
+        added = True
+
+    for statement in TREE_SCHEMA:
+        cursor.execute(statement)
+
+    if added:
+        cursor.execute(BACKFILL_QUERY)
+
+
+def subtree_range(path: str) -> Tuple[str, str]:
+    """Half-open [low, high) path range covering a post and all its descendants"""
+    # '0' sorts right after '/', so replacing the trailing '/' bounds the prefix
+    return path, path[:-1] + "0"
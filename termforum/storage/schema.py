@@ -0,0 +1,121 @@
+"""Base schema: tables, indexes, triggers and derived structures
+
+This is schema version 1 (see migrations.py). Every statement is
+idempotent, so it also brings databases created before versioning up to
+that baseline.
+"""
+
+import sqlite3
+
+from .counters import create_counter_schema
+from .epoch import create_epoch_schema
+from .post_tree import create_tree_schema
+from .search import create_search_schema
+from .stats import create_stats_schema
+
+
+def create_base_schema(cursor: sqlite3.Cursor) -> None:
+    """Create tables and indexes"""
+    # Users table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL CHECK(length(username) >= 3 AND length(username) <= 20),
+            email TEXT UNIQUE,
+            bio TEXT CHECK(length(bio) <= 500),
+            avatar TEXT DEFAULT '👤',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            posts_count INTEGER DEFAULT 0,
+            threads_count INTEGER DEFAULT 0,
+            reputation INTEGER DEFAULT 0,
+            is_admin BOOLEAN DEFAULT 0,
+            is_banned BOOLEAN DEFAULT 0,
+            last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Categories table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS categories (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE NOT NULL,
+            slug TEXT UNIQUE NOT NULL,
+            description TEXT,
+            icon TEXT DEFAULT '📁',
+            color TEXT DEFAULT '#3B82F6',
+            position INTEGER DEFAULT 0,
+            threads_count INTEGER DEFAULT 0,
+            posts_count INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Threads table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS threads (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL CHECK(length(title) >= 3 AND length(title) <= 200),
+            slug TEXT UNIQUE NOT NULL,
+            category_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            content TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            view_count INTEGER DEFAULT 0,
+            posts_count INTEGER DEFAULT 1,
+            upvotes INTEGER DEFAULT 0,
+            downvotes INTEGER DEFAULT 0,
+            is_pinned BOOLEAN DEFAULT 0,
+            is_locked BOOLEAN DEFAULT 0,
+            is_deleted BOOLEAN DEFAULT 0,
+            last_post_user_id INTEGER,
+            last_post_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (category_id) REFERENCES categories(id) ON DELETE CASCADE,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+            FOREIGN KEY (last_post_user_id) REFERENCES users(id) ON DELETE SET NULL
+        )
+    """)
+
+    # Posts table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS posts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            thread_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            parent_post_id INTEGER,
+            content TEXT NOT NULL CHECK(length(content) <= 10000),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            upvotes INTEGER DEFAULT 0,
+            downvotes INTEGER DEFAULT 0,
+            is_deleted BOOLEAN DEFAULT 0,
+            is_edited BOOLEAN DEFAULT 0,
+            edit_reason TEXT,
+            path TEXT,
+            depth INTEGER DEFAULT 0,
+            FOREIGN KEY (thread_id) REFERENCES threads(id) ON DELETE CASCADE,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+            FOREIGN KEY (parent_post_id) REFERENCES posts(id) ON DELETE CASCADE
+        )
+    """)
+
+    # Create indexes
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_username ON users(username)")
+
+    # Superseded by the keyset listing indexes
+    cursor.execute("DROP INDEX IF EXISTS idx_threads_category")
+    cursor.execute("DROP INDEX IF EXISTS idx_posts_thread")
+
+    # Integer epoch columns and the keyset listing indexes built on them
+    create_epoch_schema(cursor)
+
+    # Materialized-path reply trees
+    create_tree_schema(cursor)
+
+    # Full-text search index over threads and posts
+    create_search_schema(cursor)
+
+    # Trigger-maintained forum totals and per-row counters
+    create_stats_schema(cursor)
+    create_counter_schema(cursor)
@@ -0,0 +1,252 @@
+"""Full-text search index for TermForum
+
+Two FTS5 tables hold the searchable text of `threads` and `posts`, keyed
+by row id. Triggers keep them in sync. Soft-deleted rows keep their
+entry, so restoring one needs no re-index; search skips them instead.
+
+Bodies may be stored compressed (see models/body.py). The index keeps
+its own uncompressed copy of the text, so the triggers never decode a
+body and any SQLite client can write threads and posts. A trigger only
+sees the compressed bytes of a compressed body, so it indexes the row
+with no body text. The writer then supplies the text with
+index_compressed() in the same transaction. Rebuilding the index decodes
+bodies with the `body()` SQL function, which every connection termforum
+opens registers (pool.register_functions).
+"""
+
+import sqlite3
+from typing import Iterable, List, Tuple
+
+from ..models.body import Body
+
+
+SEARCH_TABLES = ("threads_fts", "posts_fts")
+
+# Indexed text of a stored body; compressed ones are filled in by the writer
+INDEXED_BODY = "CASE WHEN typeof({row}.content) = 'blob' THEN NULL ELSE {row}.content END"
+# Same, but an unchanged compressed body keeps its indexed text
+UPDATED_BODY = ("CASE WHEN typeof(new.content) <> 'blob' THEN new.content "
+                "WHEN new.content IS old.content THEN content END")
+
+SEARCH_SCHEMA: List[str] = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS threads_fts USING fts5(
+        title, content,
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(
+        content,
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+
+    # Threads
+    f"""
+    CREATE TRIGGER IF NOT EXISTS threads_fts_insert AFTER INSERT ON threads
+    BEGIN
+        INSERT INTO threads_fts(rowid, title, content) VALUES (new.id, new.title, {INDEXED_BODY.format(row="new")});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS threads_fts_update AFTER UPDATE OF title, content ON threads
+    BEGIN
+        UPDATE threads_fts SET title = new.title, content = {UPDATED_BODY} WHERE rowid = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS threads_fts_delete AFTER DELETE ON threads
+    BEGIN
+        DELETE FROM threads_fts WHERE rowid = old.id;
+    END
+    """,
+
+    # Posts
+    f"""
+    CREATE TRIGGER IF NOT EXISTS posts_fts_insert AFTER INSERT ON posts
+    BEGIN
+        INSERT INTO posts_fts(rowid, content) VALUES (new.id, {INDEXED_BODY.format(row="new")});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS posts_fts_update AFTER UPDATE OF content ON posts
+    BEGIN
+        UPDATE posts_fts SET content = {UPDATED_BODY} WHERE rowid = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_fts_delete AFTER DELETE ON posts
+    BEGIN
+        DELETE FROM posts_fts WHERE rowid = old.id;
+    END
+    """,
+]
+
+# Ranked, snippeted matches from both indexes of one schema
+SEARCH_PART = """
+        SELECT 'thread' AS kind, t.id AS id, t.id AS thread_id, t.title AS thread_title,
+               snippet(threads_fts, -1, :start, :end, '…', :tokens) AS snippet,
+               bm25(threads_fts, 10.0, 1.0) AS rank,
+               u.username AS user_name, t.created_at AS created_at
+        FROM {schema}.threads_fts
+        JOIN {schema}.threads t ON t.id = threads_fts.rowid
+        JOIN users u ON u.id = t.user_id
+        WHERE threads_fts MATCH :match AND t.is_deleted = 0{filter}
+
+        UNION ALL
+
+        SELECT 'post' AS kind, p.id AS id, p.thread_id AS thread_id, t.title AS thread_title,
+               snippet(posts_fts, 0, :start, :end, '…', :tokens) AS snippet,
+               bm25(posts_fts) AS rank,
+               u.username AS user_name, p.created_at AS created_at
+        FROM {schema}.posts_fts
+        JOIN {schema}.posts p ON p.id = posts_fts.rowid
+        JOIN {schema}.threads t ON t.id = p.thread_id
+        JOIN users u ON u.id = p.user_id
+        WHERE posts_fts MATCH :match AND p.is_deleted = 0 AND t.is_deleted = 0{filter}
+"""
+
+# Rows of an attached schema that still have a hot copy are skipped (see archive.py)
+SHADOWED_FILTER = " AND NOT EXISTS (SELECT 1 FROM main.threads WHERE id = t.id)"
+
+
+def search_query(schemas: Tuple[str, ...] = ("main",)) -> str:
+    """Search over the indexes of the given schemas, hot (main) copies first
+
+    Callers append the WHERE / ORDER BY / LIMIT of the outer query.
+    """
+    parts = [
+        SEARCH_PART.format(schema=schema, filter="" if schema == "main" else SHADOWED_FILTER)
+        for schema in schemas
+    ]
+    return "\n    SELECT * FROM (" + "\n        UNION ALL\n".join(parts) + "    )\n"
+
+
+SEARCH_QUERY = search_query()
+
+
+def create_search_schema(cursor: sqlite3.Cursor, index_rows: bool = True) -> None:
+    """Create the FTS tables and triggers, indexing existing rows on first creation
+
+    Args:
+        cursor: Cursor inside the schema transaction
+        index_rows: False leaves existing rows to index_missing() (see migrations.py)
+    """
+    cursor.execute(
+        "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name IN (?, ?)",
+        SEARCH_TABLES,
+    )
+    existed = cursor.fetchone()[0] == len(SEARCH_TABLES)
+
+    for statement in SEARCH_SCHEMA:
+        cursor.execute(statement)
+
+    if not existed and index_rows:
+        rebuild_search_index(cursor)
+
+
+def stores_text(cursor: sqlite3.Cursor, schema: str = "main") -> bool:
+    """Whether the schema's index holds its own text
+
+    Older layouts were external-content tables that read the base tables,
+    or views over them decoding bodies with body().
+    """
+    cursor.execute(f"SELECT sql FROM {schema}.sqlite_master WHERE type = 'table' AND name = 'posts_fts'")
+    row = cursor.fetchone()
+    return row is not None and "content=" not in row[0]
+
+
+def store_search_text(cursor: sqlite3.Cursor) -> None:
+    """Move an older index over to FTS tables holding their own text
+
+    Drops the old FTS tables, their triggers and the decoding views and
+    creates empty new ones. The migration then indexes the existing rows
+    in chunks with index_missing(). Older layouts could also be corrupt: the split
+    update triggers of versions before 8 ran the insert before the delete.
+    """
+    if stores_text(cursor):
+        return
+
+    cursor.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND (name LIKE ? OR name LIKE ?)",
+        [f"{table}_%" for table in SEARCH_TABLES],
+    )
+    for (name,) in cursor.fetchall():
+        cursor.execute(f"DROP TRIGGER {name}")
+    for table in SEARCH_TABLES:
+        cursor.execute(f"DROP TABLE IF EXISTS {table}")
+    for view in ("threads_text", "posts_text"):
+        cursor.execute(f"DROP VIEW IF EXISTS {view}")
+    create_search_schema(cursor, index_rows=False)
+
+
+def index_missing(cursor: sqlite3.Cursor, table: str, first_id: int, last_id: int) -> None:
+    """Index the rows of threads or posts in an id range that have no entry yet
+
+    Rows written meanwhile were indexed by the triggers and are skipped.
+    Decodes bodies with body().
+    """
+    columns = "title, content" if table == "threads" else "content"
+    values = "title, body(content)" if table == "threads" else "body(content)"
+    cursor.execute(f"""
+        INSERT INTO {table}_fts(rowid, {columns})
+        SELECT id, {values} FROM {table}
+        WHERE id BETWEEN :first AND :last
+          AND id NOT IN (SELECT rowid FROM {table}_fts WHERE rowid BETWEEN :first AND :last)
+    """, {"first": first_id, "last": last_id})
+
+
+def rebuild_search_index(cursor: sqlite3.Cursor) -> None:
+    """Repopulate both FTS tables from the base tables
+
+    Decodes bodies with body(), so the connection needs it registered.
+    """
+    cursor.execute("DELETE FROM threads_fts")
+    cursor.execute("""
+        INSERT INTO threads_fts(rowid, title, content)
+        SELECT id, title, body(content) FROM threads
+    """)
+    cursor.execute("DELETE FROM posts_fts")
+    cursor.execute("""
+        INSERT INTO posts_fts(rowid, content)
+        SELECT id, body(content) FROM posts
+    """)
+    cursor.execute("INSERT INTO threads_fts(threads_fts) VALUES ('optimize')")
+    cursor.execute("INSERT INTO posts_fts(posts_fts) VALUES ('optimize')")
+
+
+def index_compressed(cursor: sqlite3.Cursor, table: str, rows: Iterable[Tuple[int, str, Body]]) -> None:
+    """Index the text of new rows whose bodies were stored compressed
+
+    The triggers index a compressed body as NULL (see module docstring).
+    Rows without an index entry, as during a bulk load, are left alone.
+
+    Args:
+        cursor: Cursor inside the transaction that wrote the rows
+        table: "threads" or "posts"
+        rows: (id, text, stored body) per written row
+    """
+    updates = [(text, row_id) for row_id, text, stored in rows if isinstance(stored, bytes)]
+    if updates:
+        cursor.executemany(f"UPDATE {table}_fts SET content = ? WHERE rowid = ?", updates)
+
+
+def build_match_query(text: str) -> str:
+    """Turn free text into a safe FTS5 MATCH expression
+
+    Every term is quoted so punctuation such as `c++` or `foo-bar` cannot
+    raise an FTS5 syntax error. The last term is matched as a prefix.
+
+    Args:
+        text: User search input
+
+    Returns:
+        MATCH expression, or empty string if there are no terms
+    """
+    terms = [term.replace('"', '""') for term in text.split()]
+    if not terms:
+        return ""
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
@@ -0,0 +1,324 @@
+"""Per-category database sharding
+
+In a sharded forum, forum.db is a small catalog that keeps users and
+categories. Threads and posts live in shard files under forum.shards/,
+each with its own writer lock, so writes to different shards never
+queue behind each other. A category's threads all go to one shard:
+either a shard of its own ("category") or one of N buckets picked by
+category id ("hash:N"). The choice is made when the forum is created and
+stored in the catalog, together with the category -> shard map.
+
+Every shard is a complete termforum database. Its search index, reply
+trees, counters and change log are kept by the usual triggers. Users
+and categories referenced by a shard are mirrored into it on first use,
+so its foreign keys and joins work unchanged. The counters on the
+mirrors are per-shard partial sums. Database adds them up when it
+returns users and categories.
+
+Each shard hands out ids from its own range,
+[shard * SHARD_STRIDE, (shard + 1) * SHARD_STRIDE). A thread or post id
+therefore names its shard without a lookup. The stride is a power of ten,
+so all ids in a shard have the same number of digits. That keeps the
+materialized reply-tree paths in numeric order (see post_tree).
+"""
+
+import dataclasses
+import heapq
+import sqlite3
+import threading
+import time
+from contextlib import ExitStack
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+from .epoch import to_epoch
+
+
+# Ids per shard; shard n owns [n * SHARD_STRIDE, (n + 1) * SHARD_STRIDE)
+SHARD_STRIDE = 10 ** 12
+
+SHARD_SCHEMA: List[str] = [
+    """
+    CREATE TABLE IF NOT EXISTS shard_config (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        mode TEXT NOT NULL,
+        buckets INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS shard_map (
+        category_id INTEGER PRIMARY KEY,
+        shard INTEGER NOT NULL
+    )
+    """,
+]
+
+# Directory mtimes younger than this are not trusted to change again on the
+# next file creation (filesystem timestamps are only as fine as a clock tick)
+MTIME_SETTLE_NS = 1_000_000_000
+
+# Catalog columns copied into a shard's mirror rows (counters stay per shard)
+MIRROR_COLUMNS = {
+    "users": ("id", "username", "avatar", "bio", "reputation", "is_admin", "is_banned", "created_at"),
+    "categories": ("id", "name", "slug", "description", "icon", "color", "position", "created_at"),
+}
+
+T = TypeVar("T")
+
+
+def create_shard_schema(cursor: sqlite3.Cursor) -> None:
+    """Tables holding a catalog's sharding mode and category map"""
+    for statement in SHARD_SCHEMA:
+        cursor.execute(statement)
+
+
+def parse_sharding(spec: str) -> Tuple[str, int]:
+    """Parse "category" or "hash:N" into (mode, buckets)
+
+    Raises:
+        ValueError: If the spec is malformed
+    """
+    mode, _, buckets = spec.partition(":")
+    if mode == "category" and not buckets:
+        return mode, 0
+    if mode == "hash" and buckets.isdigit() and int(buckets) > 0:
+        return mode, int(buckets)
+    raise ValueError(f"Invalid sharding '{spec}'; use 'category' or 'hash:N'")
+
+
+def shard_directory(db_path: str) -> Path:
+    """Directory holding a catalog's shards: forum.db -> forum.shards/"""
+    path = Path(db_path)
+    return path.with_name(f"{path.stem}.shards")
+
+
+def shard_files(db_path: str) -> List[Path]:
+    """Shard files of a sharded forum, by number (empty otherwise)"""
+    directory = shard_directory(db_path)
+    return sorted(directory.glob("shard-*.db")) if directory.is_dir() else []
+
+
+def directory_stamp(directory: Path) -> Optional[int]:
+    """Marker that changes whenever a file is created in directory
+
+    None when the directory is missing or its mtime is too recent to
+    rely on; callers then list the directory again.
+    """
+    try:
+        mtime = directory.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    return mtime if time.time_ns() - mtime > MTIME_SETTLE_NS else None
+
+
+def shard_of(row_id: int) -> int:
+    """Shard number encoded in a thread or post id"""
+    return row_id // SHARD_STRIDE
+
+
+def thread_key(thread: Any) -> Tuple[int, int, int]:
+    """Listing order key of a Thread or ThreadSummary (sorted descending)"""
+    return int(thread.is_pinned), to_epoch(thread.updated_at), thread.id
+
+
+def search_key(result: Any) -> Tuple[float, str, int]:
+    """Ranking key of a SearchResult (sorted ascending)"""
+    return result.rank, result.kind, result.id
+
+
+def merge_pages(pages: Iterable[List[T]], key: Callable[[T], Any], limit: int,
+                reverse: bool = False) -> List[T]:
+    """k-way merge of per-shard pages that are each sorted by key, keeping the first limit items"""
+    return list(islice(heapq.merge(*pages, key=key, reverse=reverse), limit))
+
+
+class ShardRouter:
+    """Maps categories, threads and posts to shard databases
+
+    Shards are opened lazily and kept open. open_shard(path) creates the
+    Database for a shard file.
+    """
+
+    def __init__(self, catalog: Any, mode: str, buckets: int, open_shard: Callable[[str], Any]):
+        self.catalog = catalog
+        self.mode = mode
+        self.buckets = buckets
+        self.directory = shard_directory(catalog.db_path)
+        self._open_shard = open_shard
+        self._shards: Dict[int, Any] = {}
+        self._categories: Dict[int, int] = {}
+        self._mirrored: Dict[int, set] = {}
+        self._lock = threading.RLock()
+        # directory_stamp() at the last scan for shard files
+        self._scanned: Optional[int] = None
+        # (stack, defer_indexes, repairs) while a bulk load is running
+        self._bulk: Optional[Tuple[ExitStack, bool, List[Dict[str, int]]]] = None
+
+    # ════════════════════════════════════════════
+    # SHARDS
+    # ════════════════════════════════════════════
+
+    def path(self, number: int) -> Path:
+        """File of a shard"""
+        return self.directory / f"shard-{number:04d}.db"
+
+    def get(self, number: int) -> Any:
+        """Open shard `number`, creating its file on first use"""
+        with self._lock:
+            shard = self._shards.get(number)
+            if shard is None:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                shard = self._open_shard(str(self.path(number)))
+                self._reserve_ids(shard, number)
+                if self._bulk is not None:
+                    stack, defer_indexes, repairs = self._bulk
+                    repairs.append(stack.enter_context(shard.bulk_load(defer_indexes)))
+                self._shards[number] = shard
+            return shard
+
+    def shards(self) -> List[Any]:
+        """Every shard that exists on disk, by number
+
+        The directory is only listed again once some process may have
+        created a file in it (see directory_stamp).
+        """
+        stamp = directory_stamp(self.directory)
+        if stamp is None or stamp != self._scanned:
+            for path in shard_files(self.catalog.db_path):
+                self.get(int(path.stem.split("-")[1]))
+            self._scanned = stamp
+        with self._lock:
+            return [self._shards[number] for number in sorted(self._shards)]
+
+    def for_id(self, row_id: int) -> Optional[Any]:
+        """Shard holding a thread or post, or None if no such shard exists"""
+        number = shard_of(row_id)
+        if number <= 0:
+            return None
+        if number not in self._shards and not self.path(number).exists():
+            return None
+        return self.get(number)
+
+    def for_category(self, category_id: int, create: bool = False) -> Optional[Any]:
+        """Shard holding a category's threads
+
+        Args:
+            category_id: Category
+            create: Assign a shard if the category has none yet (else return None)
+        """
+        number = self._categories.get(category_id)
+        if number is None:
+            with self.catalog._read() as conn:
+                row = conn.execute("SELECT shard FROM shard_map WHERE category_id = ?",
+                                   (category_id,)).fetchone()
+            if row is None:
+                if not create:
+                    return None
+                row = self._assign(category_id)
+            number = self._categories[category_id] = row[0]
+        return self.get(number)
+
+    def _assign(self, category_id: int) -> Tuple[int]:
+        """Record the shard a category's threads go to"""
+        number = category_id if self.mode == "category" else 1 + category_id % self.buckets
+        with self.catalog._write() as conn:
+            conn.execute("INSERT OR IGNORE INTO shard_map (category_id, shard) VALUES (?, ?)",
+                         (category_id, number))
+            # Another process may have assigned it first
+            return conn.execute("SELECT shard FROM shard_map WHERE category_id = ?",
+                                (category_id,)).fetchone()
+
+    @staticmethod
+    def _reserve_ids(shard: Any, number: int) -> None:
+        """Start the shard's AUTOINCREMENT sequences at the bottom of its id range"""
+        base = number * SHARD_STRIDE
+        with shard._write() as conn:
+            for table in ("threads", "posts"):
+                conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?", (base, table))
+                conn.execute("""
+                    INSERT INTO sqlite_sequence (name, seq)
+                    SELECT ?1, ?2 WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = ?1)
+                """, (table, base))
+
+    def close(self) -> None:
+        """Close every open shard"""
+        with self._lock:
+            for shard in self._shards.values():
+                shard.close()
+            self._shards.clear()
+
+    # ════════════════════════════════════════════
+    # MIRRORS
+    # ════════════════════════════════════════════
+
+    def mirror(self, shard: Any, user_ids: Iterable[int] = (), category_ids: Iterable[int] = ()) -> None:
+        """Copy catalog users and categories into a shard, unless already there"""
+        seen = self._mirrored.setdefault(id(shard), set())
+        wanted = {"users": set(user_ids), "categories": set(category_ids)}
+        for table, ids in wanted.items():
+            ids = [row_id for row_id in ids if (table, row_id) not in seen]
+            if not ids:
+                continue
+
+            columns = MIRROR_COLUMNS[table]
+            with self.catalog._read() as conn:
+                rows = conn.execute(f"""
+                    SELECT {", ".join(columns)} FROM {table}
+                    WHERE id IN ({", ".join("?" for _ in ids)})
+                """, ids).fetchall()
+
+            updates = ", ".join(f"{column} = excluded.{column}" for column in columns[1:])
+            with shard._write() as conn:
+                conn.executemany(f"""
+                    INSERT INTO {table} ({", ".join(columns)})
+                    VALUES ({", ".join("?" for _ in columns)})
+                    ON CONFLICT(id) DO UPDATE SET {updates}
+                """, [tuple(row) for row in rows])
+            seen.update((table, row[0]) for row in rows)
+
+    def with_counts(self, table: str, rows: List[T]) -> List[T]:
+        """Copies of catalog users or categories with their counters summed over the shards
+
+        Each shard caches its counters in its own identity map, so only
+        shards written to since the last call are queried.
+        """
+        if not rows:
+            return rows
+        ids = [row.id for row in rows]
+        totals: Dict[int, List[int]] = {}
+        for shard in self.shards():
+            for row_id, (threads, posts) in shard._counters(table, ids).items():
+                if threads or posts:
+                    total = totals.setdefault(row_id, [0, 0])
+                    total[0] += threads
+                    total[1] += posts
+
+        return [
+            dataclasses.replace(row, threads_count=row.threads_count + totals[row.id][0],
+                                posts_count=row.posts_count + totals[row.id][1])
+            if row.id in totals else row
+            for row in rows
+        ]
+
+    # ════════════════════════════════════════════
+    # BULK LOADS
+    # ════════════════════════════════════════════
+
+    def enter_bulk_load(self, stack: ExitStack, defer_indexes: bool) -> List[Dict[str, int]]:
+        """Put every shard, including ones opened later, into bulk-load mode until stack closes
+
+        Returns:
+            The shards' repair counts, filled in once stack closes
+        """
+        repairs: List[Dict[str, int]] = []
+        with self._lock:
+            stack.callback(self._leave_bulk_load)
+            self._bulk = (stack, defer_indexes, repairs)
+            for shard in list(self._shards.values()):
+                repairs.append(stack.enter_context(shard.bulk_load(defer_indexes)))
+        return repairs
+
+    def _leave_bulk_load(self) -> None:
+        with self._lock:
+            self._bulk = None
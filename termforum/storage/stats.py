@@ -0,0 +1,142 @@
+"""Materialized forum statistics
+
+A single-row `forum_stats` table holds the totals shown on the home
+screen. Triggers keep it exact on insert, delete and soft-delete, so
+reading the stats is O(1) regardless of table size.
+
+Archived threads and posts stay in the totals (see counters.py).
+"""
+
+import sqlite3
+from typing import Dict, List, Sequence
+
+from .counters import counted_rows
+
+
+STATS_SCHEMA: List[str] = [
+    """
+    CREATE TABLE IF NOT EXISTS forum_stats (
+        id INTEGER PRIMARY KEY CHECK(id = 1),
+        users INTEGER NOT NULL DEFAULT 0,
+        threads INTEGER NOT NULL DEFAULT 0,
+        posts INTEGER NOT NULL DEFAULT 0,
+        categories INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+
+    # Users
+    """
+    CREATE TRIGGER IF NOT EXISTS forum_stats_users_insert AFTER INSERT ON users
+    BEGIN
+        UPDATE forum_stats SET users = users + 1 WHERE id = 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS forum_stats_users_delete AFTER DELETE ON users
+    BEGIN
+        UPDATE forum_stats SET users = users - 1 WHERE id = 1;
+    END
+    """,
+
+    # Categories
+    """
+    CREATE TRIGGER IF NOT EXISTS forum_stats_categories_insert AFTER INSERT ON categories
+    BEGIN
+        UPDATE forum_stats SET categories = categories + 1 WHERE id = 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS forum_stats_categories_delete AFTER DELETE ON categories
+    BEGIN
+        UPDATE forum_stats SET categories = categories - 1 WHERE id = 1;
+    END
+    """,
+
+    # Threads: only rows with is_deleted = 0 are counted
+    """
+    CREATE TRIGGER IF NOT EXISTS forum_stats_threads_insert AFTER INSERT ON threads
+    WHEN new.is_deleted = 0
+    BEGIN
+        UPDATE forum_stats SET threads = threads + 1 WHERE id = 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS forum_stats_threads_soft_delete AFTER UPDATE OF is_deleted ON threads
+    WHEN old.is_deleted != new.is_deleted
+    BEGIN
+        UPDATE forum_stats SET threads = threads + (CASE WHEN new.is_deleted = 0 THEN 1 ELSE -1 END) WHERE id = 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS forum_stats_threads_delete AFTER DELETE ON threads
+    WHEN old.is_deleted = 0
+    BEGIN
+        UPDATE forum_stats SET threads = threads - 1 WHERE id = 1;
+    END
+    """,
+
+    # Posts
+    """
+    CREATE TRIGGER IF NOT EXISTS forum_stats_posts_insert AFTER INSERT ON posts
+    WHEN new.is_deleted = 0
+    BEGIN
+        UPDATE forum_stats SET posts = posts + 1 WHERE id = 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS forum_stats_posts_soft_delete AFTER UPDATE OF is_deleted ON posts
+    WHEN old.is_deleted != new.is_deleted
+    BEGIN
+        UPDATE forum_stats SET posts = posts + (CASE WHEN new.is_deleted = 0 THEN 1 ELSE -1 END) WHERE id = 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS forum_stats_posts_delete AFTER DELETE ON posts
+    WHEN old.is_deleted = 0
+    BEGIN
+        UPDATE forum_stats SET posts = posts - 1 WHERE id = 1;
+    END
+    """,
+]
+
+
+def create_stats_schema(cursor: sqlite3.Cursor) -> None:
+    """Create the stats table and triggers, seeding it on first creation"""
+    cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'forum_stats'")
+    existed = cursor.fetchone()[0] == 1
+
+    for statement in STATS_SCHEMA:
+        cursor.execute(statement)
+
+    if not existed:
+        reconcile_stats(cursor)
+
+
+def read_stats(cursor: sqlite3.Cursor) -> Dict[str, int]:
+    """Read the materialized totals"""
+    cursor.execute("SELECT users, threads, posts, categories FROM forum_stats WHERE id = 1")
+    row = cursor.fetchone()
+    if row is None:
+        return {"users": 0, "threads": 0, "posts": 0, "categories": 0}
+    return {"users": row[0], "threads": row[1], "posts": row[2], "categories": row[3]}
+
+
+def reconcile_stats(cursor: sqlite3.Cursor, schemas: Sequence[str] = ("main",)) -> Dict[str, int]:
+    """Recompute the totals from scratch and store them
+
+    Args:
+        cursor: Cursor inside the repair transaction
+        schemas: Schemas holding threads and posts (main, and the archive if attached)
+
+    Returns:
+        The recomputed totals
+    """
+    cursor.execute(f"""
+        INSERT OR REPLACE INTO forum_stats (id, users, threads, posts, categories)
+        SELECT 1,
+               (SELECT COUNT(*) FROM users),
+               (SELECT COUNT(*) FROM {counted_rows("threads", schemas)} WHERE is_deleted = 0),
+               (SELECT COUNT(*) FROM {counted_rows("posts", schemas)} WHERE is_deleted = 0),
+               (SELECT COUNT(*) FROM categories)
+    """)
+    return read_stats(cursor)
@@ -0,0 +1,393 @@
+"""Streaming JSONL export and import
+
+A dump is one JSON object per line: a header, then every user,
+category, thread and post in id order, then a footer with the row count
+of each table. Rows keep their ids, so reply trees and every reference
+between rows survive the round trip unchanged. Derived data (counters,
+reply-tree paths, search entries, forum stats) is not written. Import
+rebuilds it.
+
+Neither direction holds more than one batch in memory. Export reads each
+table through a plain cursor on its own read-only connection, merging in
+archived threads and posts by id when an archive is given. The whole
+export runs in one read transaction, which in WAL mode pins a consistent
+snapshot without blocking writers. Import inserts one transaction per
+batch inside Database.bulk_load(), computing reply-tree paths per batch.
+
+Dumps may be gzip- or zstd-compressed. zstd needs the optional
+zstandard package. On import the compression is detected from the
+file's first bytes.
+"""
+
+import gzip
+import heapq
+import io
+import json
+import os
+import sqlite3
+import sys
+import time
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import islice
+from operator import itemgetter
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .archive import ARCHIVE_SCHEMA, ARCHIVE_TABLES
+from .bulk import post_paths
+from .database import MAX_POST_LENGTH, Database
+from .pool import register_functions
+from .sharding import shard_directory
+
+
+FORMAT = "termforum"
+FORMAT_VERSION = 1
+
+# Rows per read and per insert transaction
+DEFAULT_BATCH_SIZE = 5000
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# Record type and exported columns per table, in load order (rows only
+# reference tables loaded before them). Counters, reply-tree paths and the
+# generated epoch columns are derived and left out.
+TRANSFER_TABLES: List[Tuple[str, str, Tuple[str, ...]]] = [
+    ("users", "user", (
+        "id", "username", "email", "bio", "avatar", "created_at", "updated_at",
+        "reputation", "is_admin", "is_banned", "last_seen",
+        "password_hash", "failed_login_attempts", "account_locked_until",
+    )),
+    ("categories", "category", (
+        "id", "name", "slug", "description", "icon", "color", "position", "created_at",
+    )),
+    ("threads", "thread", (
+        "id", "title", "slug", "category_id", "user_id", "content", "created_at", "updated_at",
+        "view_count", "upvotes", "downvotes", "is_pinned", "is_locked", "is_deleted",
+        "last_post_user_id", "last_post_at",
+    )),
+    ("posts", "post", (
+        "id", "thread_id", "user_id", "parent_post_id", "content", "created_at", "updated_at",
+        "upvotes", "downvotes", "is_deleted", "is_edited", "edit_reason",
+    )),
+]
+
+TABLE_BY_RECORD = {record: (table, columns) for table, record, columns in TRANSFER_TABLES}
+
+# Values for columns missing from dumps written before they were exported
+IMPORT_DEFAULTS: Dict[str, Any] = {"failed_login_attempts": 0}
+
+
+@dataclass
+class TransferResult:
+    """Outcome of one export or import"""
+
+    rows: Dict[str, int] = field(default_factory=dict)
+    bytes: int = 0
+    seconds: float = 0.0
+
+    @property
+    def total(self) -> int:
+        """Rows transferred over all tables"""
+        return sum(self.rows.values())
+
+
+# ════════════════════════════════════════════
+# STREAMS
+# ════════════════════════════════════════════
+
+def guess_compression(path: str) -> Optional[str]:
+    """Compression implied by a dump's file name"""
+    suffix = Path(path).suffix.lower()
+    if suffix in (".gz", ".gzip"):
+        return "gzip"
+    if suffix in (".zst", ".zstd"):
+        return "zstd"
+    return None
+
+
+def sniff_compression(raw: io.BufferedReader) -> Optional[str]:
+    """Compression of a dump, detected from its first bytes without consuming them"""
+    head = raw.peek(4)[:4]
+    if head.startswith(GZIP_MAGIC):
+        return "gzip"
+    if head.startswith(ZSTD_MAGIC):
+        return "zstd"
+    return None
+
+
+def _zstandard() -> Any:
+    """The optional zstandard module"""
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError("zstd compression needs the zstandard package "
+                         "(pip install 'termforum[zstd]')") from None
+    return zstandard
+
+
+@contextmanager
+def open_dump(path: str, writing: bool, compression: Optional[str] = None) -> Iterator[IO[str]]:
+    """Open a dump as text, compressing or decompressing on the fly
+
+    Args:
+        path: Dump file, or "-" for stdout/stdin
+        writing: Open for export rather than import
+        compression: "gzip", "zstd" or None; when None, guessed from the
+            file name on export and detected from the content on import
+    """
+    with ExitStack() as stack:
+        if path == "-":
+            raw = sys.stdout.buffer if writing else sys.stdin.buffer
+        else:
+            raw = stack.enter_context(open(path, "wb" if writing else "rb"))
+        if compression is None:
+            compression = guess_compression(path) if writing else sniff_compression(raw)
+
+        binary = raw
+        if compression == "gzip":
+            binary = stack.enter_context(gzip.GzipFile(fileobj=raw, mode="wb" if writing else "rb"))
+        elif compression == "zstd":
+            zstandard = _zstandard()
+            if writing:
+                binary = zstandard.ZstdCompressor(level=3).stream_writer(raw, closefd=False)
+            else:
+                binary = zstandard.ZstdDecompressor().stream_reader(raw, closefd=False)
+            stack.callback(binary.close)
+        elif compression is not None:
+            raise ValueError(f"Unknown compression: {compression}")
+
+        text = io.TextIOWrapper(binary, encoding="utf-8", newline="\n")
+        try:
+            yield text
+        finally:
+            # Flush without closing: the stack closes the layers below in order
+            text.detach()
+            if writing:
+                raw.flush()
+
+
+# ════════════════════════════════════════════
+# EXPORT
+# ════════════════════════════════════════════
+
+def export_forum(db_path: str, target: str, compression: Optional[str] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE, archive_path: Optional[str] = None,
+                 progress: Optional[Callable[[str, int], None]] = None) -> TransferResult:
+    """Write every user, category, thread and post to a JSONL dump
+
+    Args:
+        db_path: Database to export (may be in use by other processes)
+        target: Dump file to write, or "-" for stdout
+        compression: "gzip", "zstd" or None (guessed from the file name)
+        batch_size: Rows fetched per read
+        archive_path: Archive database whose threads and posts are merged in
+        progress: Called with (table, rows written so far) after each batch
+
+    Returns:
+        Rows written per table, dump size and timing
+    """
+    started = time.perf_counter()
+    report = progress or (lambda table, rows: None)
+    result = TransferResult()
+
+    if shard_directory(db_path).is_dir():
+        raise ValueError("Exporting a sharded database is not supported")
+
+    conn = sqlite3.connect(f"{Path(db_path).resolve().as_uri()}?mode=ro", uri=True)
+    register_functions(conn)
+    try:
+        schemas = ["main"]
+        if archive_path:
+            conn.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}",
+                         (f"{Path(archive_path).resolve().as_uri()}?mode=ro",))
+            schemas.append(ARCHIVE_SCHEMA)
+
+        # One snapshot for the whole dump (see module docstring)
+        conn.execute("BEGIN")
+        schema_version = conn.execute("PRAGMA user_version").fetchone()[0]
+
+        with open_dump(target, writing=True, compression=compression) as out:
+            out.write(_encode({
+                "type": "header", "format": FORMAT, "version": FORMAT_VERSION,
+                "schema_version": schema_version,
+                "exported_at": datetime.now().isoformat(timespec="seconds"),
+            }))
+
+            for table, record, columns in TRANSFER_TABLES:
+                sources = [
+                    _table_rows(conn, schema, table, columns, batch_size)
+                    for schema in schemas if schema == "main" or table in ARCHIVE_TABLES
+                ]
+                merged = _unique_ids(heapq.merge(*sources, key=itemgetter(0)))
+                rows = 0
+                while True:
+                    batch = list(islice(merged, batch_size))
+                    if not batch:
+                        break
+                    out.writelines(
+                        _encode({"type": record, **dict(zip(columns, row))}) for row in batch
+                    )
+                    rows += len(batch)
+                    report(table, rows)
+                result.rows[table] = rows
+
+            out.write(_encode({"type": "end", "rows": result.rows}))
+        conn.rollback()
+    finally:
+        conn.close()
+
+    result.bytes = os.path.getsize(target) if target != "-" else 0
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def _table_rows(conn: sqlite3.Connection, schema: str, table: str, columns: Tuple[str, ...],
+                batch_size: int) -> Iterator[tuple]:
+    """Rows of one table in id order, fetched batch by batch (bodies decompressed)"""
+    select = ", ".join("body(content)" if column == "content" else column for column in columns)
+    cursor = conn.execute(f"SELECT {select} FROM {schema}.{table} ORDER BY id")
+    while True:
+        batch = cursor.fetchmany(batch_size)
+        if not batch:
+            return
+        yield from batch
+
+
+def _unique_ids(rows: Iterator[tuple]) -> Iterator[tuple]:
+    """Drop rows repeating the previous id (an archive copy whose hot row still exists)"""
+    last = None
+    for row in rows:
+        if row[0] != last:
+            yield row
+        last = row[0]
+
+
+def _encode(record: Dict[str, Any]) -> str:
+    """One dump line"""
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+# ════════════════════════════════════════════
+# IMPORT
+# ════════════════════════════════════════════
+
+def _records(lines: IO[str]) -> Iterator[Dict[str, Any]]:
+    """Parse dump lines, naming the line of a bad one"""
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Line {number} is not valid JSON: {e}") from None
+
+
+def _insert(db: Database, table: str, columns: Tuple[str, ...], rows: List[Dict[str, Any]]) -> None:
+    """Insert one batch with its original ids"""
+    # Bodies are stored the way the target database would store new ones
+    limit = MAX_POST_LENGTH if table == "posts" else None
+
+    def value(row: Dict[str, Any], column: str) -> Any:
+        stored = row.get(column, IMPORT_DEFAULTS.get(column))
+        return db._body(stored, limit) if column == "content" and isinstance(stored, str) else stored
+
+    params = [tuple(value(row, column) for column in columns) for row in rows]
+    names = list(columns)
+    if table == "posts":
+        # The tree trigger is suspended during the load
+        names += ["path", "depth"]
+
+    with db._write() as conn:
+        cursor = conn.cursor()
+        if table == "posts":
+            paths = post_paths(cursor, [row["id"] for row in rows],
+                               [row.get("parent_post_id") for row in rows])
+            params = [row + path for row, path in zip(params, paths)]
+        cursor.executemany(
+            f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join('?' for _ in names)})",
+            params,
+        )
+
+
+def import_forum(db: Database, source: str, compression: Optional[str] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 progress: Optional[Callable[[str, int], None]] = None) -> TransferResult:
+    """Load a JSONL dump into an empty database, keeping every id
+
+    The default categories of a fresh database are replaced by the dumped
+    ones. Derived data is rebuilt when the load ends, also when it fails
+    part way, in which case the batches already loaded stay.
+
+    Args:
+        db: Database to load into; must have no users, threads or posts
+        source: Dump file to read, or "-" for stdin
+        compression: "gzip", "zstd" or None (detected from the content)
+        batch_size: Rows per insert transaction
+        progress: Called with (table, rows loaded so far) after each batch
+
+    Returns:
+        Rows loaded per table, dump size and timing
+
+    Raises:
+        ValueError: If the database is not empty, or the dump is not a
+            complete termforum dump
+    """
+    started = time.perf_counter()
+    report = progress or (lambda table, rows: None)
+    result = TransferResult()
+
+    if db.router is not None:
+        raise ValueError("Importing into a sharded database is not supported")
+    with db._read() as conn:
+        for table in ("users", "threads", "posts"):
+            if conn.execute(f"SELECT EXISTS (SELECT 1 FROM {table})").fetchone()[0]:
+                raise ValueError(f"Cannot import into a database that already has {table}")
+
+    with open_dump(source, writing=False, compression=compression) as lines:
+        records = _records(lines)
+        header = next(records, None)
+        if not header or header.get("type") != "header" or header.get("format") != FORMAT:
+            raise ValueError("Not a termforum dump")
+        if header.get("version", 0) > FORMAT_VERSION:
+            raise ValueError(f"Dump format version {header['version']} is newer than this termforum")
+
+        footer = None
+        with db.bulk_load(defer_indexes=True):
+            with db._write() as conn:
+                conn.execute("DELETE FROM categories")
+
+            table, columns, batch = None, (), []
+            for record in records:
+                kind = record.get("type")
+                if kind == "end":
+                    footer = record
+                    break
+                if kind not in TABLE_BY_RECORD:
+                    raise ValueError(f"Unknown record type: {kind!r}")
+
+                if TABLE_BY_RECORD[kind][0] != table or len(batch) >= batch_size:
+                    if batch:
+                        _insert(db, table, columns, batch)
+                        result.rows[table] = result.rows.get(table, 0) + len(batch)
+                        report(table, result.rows[table])
+                    table, columns = TABLE_BY_RECORD[kind]
+                    batch = []
+                batch.append(record)
+
+            if batch:
+                _insert(db, table, columns, batch)
+                result.rows[table] = result.rows.get(table, 0) + len(batch)
+                report(table, result.rows[table])
+
+    if footer is None:
+        raise ValueError("Dump is truncated: no end record")
+    expected = {name: count for name, count in footer.get("rows", {}).items() if count}
+    if expected != result.rows:
+        raise ValueError(f"Dump row counts {expected} do not match the rows loaded {result.rows}")
+
+    result.bytes = os.path.getsize(source) if source != "-" else 0
+    result.seconds = time.perf_counter() - started
+    return result
@@ -0,0 +1,113 @@
+"""Write-behind buffer for thread view counters
+
+Opening a thread should not cost a synchronous disk write. Views are
+accumulated in memory and flushed as one batched UPDATE, either every
+`flush_interval` seconds, after `flush_every` increments, or on close.
+
+With an archive attached, each flush also updates archived threads, so
+views of a thread that was archived (before or after it was viewed)
+still count.
+"""
+
+import sqlite3
+import threading
+from typing import Callable, ContextManager, Dict, Optional, Sequence
+
+
+class ViewCounter:
+    """In-memory accumulator of pending thread view deltas"""
+
+    def __init__(self, write: Callable[[], ContextManager[sqlite3.Connection]],
+                 flush_interval: Optional[float] = 5.0, flush_every: int = 100,
+                 schemas: Sequence[str] = ("main",)):
+        """Initialize the counter
+
+        Args:
+            write: Callable returning the database writer context manager
+            flush_interval: Seconds between background flushes (None disables the timer)
+            flush_every: Flush as soon as this many increments are pending
+            schemas: Schemas whose threads tables receive the deltas (main, and the archive if attached)
+        """
+        self._write = write
+        self.schemas = tuple(schemas)
+        self.flush_interval = flush_interval
+        self.flush_every = max(1, flush_every)
+
+        self._pending: Dict[int, int] = {}
+        self._total = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+        self._stop = threading.Event()
+        self._timer: Optional[threading.Thread] = None
+
+    def increment(self, thread_id: int, count: int = 1) -> None:
+        """Record views of a thread"""
+        with self._lock:
+            self._pending[thread_id] = self._pending.get(thread_id, 0) + count
+            self._total += count
+            should_flush = self._total >= self.flush_every
+
+        if should_flush:
+            self.flush()
+        else:
+            self._ensure_timer()
+
+    def pending(self, thread_id: int) -> int:
+        """Views of a thread not yet written to disk"""
+        return self._pending.get(thread_id, 0)
+
+    def flush(self) -> int:
+        """Write all pending deltas in one transaction
+
+        Returns:
+            Number of threads updated
+        """
+        with self._flush_lock:
+            with self._lock:
+                deltas, self._pending = self._pending, {}
+                self._total = 0
+
+            if not deltas:
+                return 0
+
+            try:
+                params = [(delta, thread_id) for thread_id, delta in deltas.items()]
+                with self._write() as conn:
+                    # A thread id is in one schema only (ids are never reused)
+                    for schema in self.schemas:
+                        conn.executemany(
+                            f"UPDATE {schema}.threads SET view_count = view_count + ? WHERE id = ?", params,
+                        )
+            except sqlite3.Error:
+                # Put the deltas back so the next flush retries them
+                with self._lock:
+                    for thread_id, delta in deltas.items():
+                        self._pending[thread_id] = self._pending.get(thread_id, 0) + delta
+                        self._total += delta
+                raise
+
+            return len(deltas)
+
+    def _ensure_timer(self) -> None:
+        """Start the background flush thread on first use"""
+        if self.flush_interval is None or self._timer is not None or self._stop.is_set():
+            return
+        self._timer = threading.Thread(target=self._run, name="termforum-view-flush", daemon=True)
+        self._timer.start()
+
+    def _run(self) -> None:
+        """Background loop flushing pending views on an interval"""
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except sqlite3.Error:
+                pass  # Retried on the next tick
+
+    def close(self) -> None:
+        """Stop the timer and flush whatever is still pending"""
+        self._stop.set()
+        if self._timer is not None:
+            self._timer.join()
+            self._timer = None
+        self.flush()
@@ -0,0 +1,27 @@
+"""Messages shared between the app and its screens"""
+
+from typing import List
+
+from textual.message import Message
+
+from ..models import Change
+
+
+class ChangesAvailable(Message):
+    """New entries in the change log, posted to the active screen"""
+
+    def __init__(self, changes: List[Change]):
+        super().__init__()
+        self.changes = changes
+
+    @property
+    def reload(self) -> bool:
+        """Whether the screen should drop its state and re-query everything"""
+        return any(change.is_reload for change in self.changes)
+
+    @property
+    def thread_ids(self) -> List[int]:
+        """Threads touched by these changes, most recent first"""
+        ids = dict.fromkeys(change.thread_id for change in reversed(self.changes))
+        ids.pop(None, None)
+        return list(ids)
@@ -1,5 +1,6 @@
 """Categories Screen - Browse forum categories"""
 
+from textual import work
 from textual.app import ComposeResult
 from textual.screen import Screen
 from textual.widgets import Static, ListView, ListItem, Label
@@ -93,8 +94,8 @@ class CategoriesScreen(Screen):
             id="header"
         )
 
-        # Categories list
-        yield self._build_categories_list()
+        # Categories list (filled in by _load_categories)
+        yield ListView(id="categories-list")
 
         # Footer
         footer_text = (
@@ -107,18 +108,23 @@ class CategoriesScreen(Screen):
             id="footer"
         )
 
-    def _build_categories_list(self) -> ListView:
-        """Build categories list"""
-        categories_list = ListView(id="categories-list")
+    def on_mount(self) -> None:
+        """Called after screen is mounted - load categories"""
+        self._load_categories()
+
+    @work(exclusive=True)
+    async def _load_categories(self) -> None:
+        """Load categories off the event loop (cancelled if the screen is popped)"""
+        categories = await self.app.async_database.list_categories()
+        self._build_categories_list(categories)
 
-        # Get all categories
-        categories = self.database.list_categories()
+    def _build_categories_list(self, categories: list) -> None:
+        """Build categories list"""
+        categories_list = self.query_one("#categories-list", ListView)
 
         for category in categories:
             categories_list.append(CategoryItem(category))
 
-        return categories_list
-
     def on_list_view_selected(self, event: ListView.Selected) -> None:
         """Handle category selection"""
         if isinstance(event.item, CategoryItem):
@@ -1,12 +1,19 @@
 """Home screen for TermForum"""
 
+from textual import work
 from textual.app import ComposeResult
 from textual.screen import Screen
 from textual.widgets import Static, ListView, ListItem, Label
 from textual.containers import Container, Vertical, Horizontal
 from ...storage import Database
+from ...storage.sharding import thread_key
 from ...models import User
 from ...i18n import get_translator
+from ..messages import ChangesAvailable
+
+
+# Threads shown on the home screen
+THREAD_LIMIT = 50
 
 
 class ThreadListItem(ListItem):
@@ -82,22 +89,19 @@ class HomeScreen(Screen):
         super().__init__()
         self.database = database
         self.current_user = current_user
+        # Changes not yet applied (see _apply_changes)
+        self._pending_threads: set = set()
+        self._pending_reload = False
+        # Whether threads beyond the loaded ones exist (the list is a window)
+        self._has_more = False
 
     def compose(self) -> ComposeResult:
         """Compose the home screen"""
         t = get_translator().t
 
-        # Stats header
-        stats = self.database.get_forum_stats()
-        stats_text = (
-            f"📊 {t('home.stats.users')}: {stats['users']} • "
-            f"📋 {t('home.stats.threads')}: {stats['threads']} • "
-            f"💬 {t('home.stats.posts')}: {stats['posts']} • "
-            f"📁 {t('home.stats.categories')}: {stats['categories']}"
-        )
-
+        # Stats header (filled in by _load_data)
         yield Container(
-            Static(stats_text, id="stats-text"),
+            Static("📊 …", id="stats-text"),
             id="stats-container"
         )
 
@@ -121,17 +125,36 @@ class HomeScreen(Screen):
         )
 
     def on_mount(self) -> None:
-        """Called after screen is mounted - populate thread list"""
-        self._populate_thread_list()
+        """Called after screen is mounted - load stats and thread list"""
+        self._load_data()
+
+    @work(exclusive=True)
+    async def _load_data(self) -> None:
+        """Load stats and threads off the event loop (cancelled if the screen is popped)"""
+        db = self.app.async_database
+        stats = await db.get_forum_stats()
+        self._populate_stats(stats)
+
+        threads, next_cursor = await db.list_thread_summaries(limit=THREAD_LIMIT)
+        self._has_more = next_cursor is not None
+        self._populate_thread_list(threads)
+
+    def _populate_stats(self, stats: dict) -> None:
+        """Fill in the stats header"""
+        t = get_translator().t
+        stats_text = (
+            f"📊 {t('home.stats.users')}: {stats['users']} • "
+            f"📋 {t('home.stats.threads')}: {stats['threads']} • "
+            f"💬 {t('home.stats.posts')}: {stats['posts']} • "
+            f"📁 {t('home.stats.categories')}: {stats['categories']}"
+        )
+        self.query_one("#stats-text", Static).update(stats_text)
 
-    def _populate_thread_list(self) -> None:
+    def _populate_thread_list(self, threads: list) -> None:
         """Populate the thread list with data"""
         t = get_translator().t
         thread_list = self.query_one("#thread-list", ListView)
 
-        # Get threads from database
-        threads = self.database.list_threads(limit=50)
-
         if not threads:
             # Show empty state
             thread_list.append(ListItem(Label(t('home.no_threads'))))
@@ -139,6 +162,65 @@ class HomeScreen(Screen):
             for thread in threads:
                 thread_list.append(ThreadListItem(thread))
 
+    def on_changes_available(self, message: ChangesAvailable) -> None:
+        """Queue changes from the app's watcher and apply them"""
+        self._pending_reload = self._pending_reload or message.reload
+        self._pending_threads.update(message.thread_ids)
+        self._apply_changes()
+
+    @work(exclusive=True, group="changes")
+    async def _apply_changes(self) -> None:
+        """Re-fetch only the threads that changed and move them into place
+
+        Pending changes are dropped only once applied, so a run cancelled
+        by a newer batch leaves them for its replacement.
+        """
+        db = self.app.async_database
+        if self._pending_reload:
+            self._pending_reload = False
+            self._pending_threads.clear()
+            await self.query_one("#thread-list", ListView).clear()
+            self._load_data()
+            return
+
+        thread_ids = set(self._pending_threads)
+        stats = await db.get_forum_stats()
+        threads = await db.get_thread_summaries(thread_ids)
+
+        self._populate_stats(stats)
+        await self._replace_threads(thread_ids, threads)
+        self._pending_threads -= thread_ids
+
+    async def _replace_threads(self, thread_ids: set, threads: list) -> None:
+        """Drop the listed threads and re-insert their fresh versions where the listing order puts them"""
+        thread_list = self.query_one("#thread-list", ListView)
+        stale = []
+        for index, item in enumerate(thread_list.children):
+            if isinstance(item, ThreadListItem):
+                if item.thread.id in thread_ids:
+                    stale.append(index)
+            elif threads:
+                # Empty-state placeholder
+                stale.append(index)
+        if stale:
+            await thread_list.remove_items(stale)
+
+        # Same (is_pinned, updated_epoch, id) descending order the list was loaded in
+        for thread in threads:
+            key = thread_key(thread)
+            items = list(thread_list.children)
+            index = next((position for position, item in enumerate(items)
+                          if isinstance(item, ThreadListItem) and thread_key(item.thread) < key), len(items))
+            if index == len(items) and self._has_more:
+                # Sorts after the last loaded thread, outside the window
+                continue
+            await thread_list.insert(index, [ThreadListItem(thread)])
+
+        overflow = list(range(THREAD_LIMIT, len(thread_list.children)))
+        if overflow:
+            await thread_list.remove_items(overflow)
+            self._has_more = True
+
     def on_list_view_selected(self, event: ListView.Selected) -> None:
         """Handle thread selection"""
         if isinstance(event.item, ThreadListItem):
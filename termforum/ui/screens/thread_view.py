@@ -1,19 +1,26 @@
 """Thread View Screen - Full thread with nested replies"""
 
+from typing import Union
+from textual import work
 from textual.app import ComposeResult
 from textual.screen import Screen
 from textual.widgets import Static, ListView, ListItem, Label, Button, Markdown
 from textual.containers import Container, Vertical, Horizontal, ScrollableContainer
 from textual.binding import Binding
 from ...storage import Database
-from ...models import User, Thread, Post
+from ...models import User, Thread, ThreadSummary, Post, PostRow
 from ...i18n import get_translator
+from ..messages import ChangesAvailable
+
+
+# Replies fetched per page; the next page loads when the list reaches its end
+POSTS_PAGE_SIZE = 100
 
 
 class PostItem(ListItem):
     """A single post item with nested replies"""
 
-    def __init__(self, post: Post, depth: int = 0):
+    def __init__(self, post: Union[Post, PostRow], depth: int = 0):
         super().__init__()
         self.post = post
         self.depth = depth
@@ -53,6 +60,14 @@ class PostItem(ListItem):
         yield Label(actions, classes="post-actions")
 
 
+class MorePostsItem(ListItem):
+    """Last list entry while the reply tree has more pages"""
+
+    def compose(self) -> ComposeResult:
+        t = get_translator().t
+        yield Label(f"⬇ {t('thread.load_more')}  [M]", classes="post-actions")
+
+
 class ThreadViewScreen(Screen):
     """Screen for viewing a single thread with all posts"""
 
@@ -115,6 +130,7 @@ class ThreadViewScreen(Screen):
     BINDINGS = [
         Binding("j", "scroll_down", "Down", show=False),
         Binding("k", "scroll_up", "Up", show=False),
+        Binding("m", "load_more", "More replies", show=False),
         Binding("r", "reply_thread", "Reply", show=True),
         Binding("u", "upvote", "Upvote", show=True),
         Binding("d", "downvote", "Downvote", show=True),
@@ -122,12 +138,15 @@ class ThreadViewScreen(Screen):
         Binding("q", "go_back", "Back", show=False),
     ]
 
-    def __init__(self, database: Database, current_user: User, thread: Thread):
+    def __init__(self, database: Database, current_user: User, thread: Union[Thread, ThreadSummary]):
         super().__init__()
         self.database = database
         self.current_user = current_user
         self.thread = thread
         self.posts = []
+        # Keyset cursor of the next reply page (None once the tree is fully loaded)
+        self._posts_cursor = None
+        self._loading_posts = False
 
     def compose(self) -> ComposeResult:
         """Compose the thread view"""
@@ -135,20 +154,14 @@ class ThreadViewScreen(Screen):
         # Thread header
         yield Container(
             Label(f"📋 {self.thread.display_title}", classes="thread-title"),
-            Label(
-                f"{self.thread.category_icon} {self.thread.category_name} • "
-                f"{self.thread.user_avatar} {self.thread.user_name} • "
-                f"💬 {self.thread.posts_count} posts • "
-                f"👀 {self.thread.view_count} views • "
-                f"⬆️ {self.thread.score}",
-                classes="thread-meta"
-            ),
+            Label(self._meta_text(), id="thread-meta", classes="thread-meta"),
             id="thread-header"
         )
 
-        # Thread content (first post)
+        # Thread content (first post) - list views only carry a summary, so the body loads lazily
+        content = self.thread.text if isinstance(self.thread, Thread) else ""
         yield Container(
-            Markdown(self.thread.content),
+            Markdown(content, id="thread-body"),
             id="thread-content"
         )
 
@@ -172,39 +185,92 @@ class ThreadViewScreen(Screen):
             id="footer-actions"
         )
 
+    def _meta_text(self) -> str:
+        """Header meta line"""
+        return (
+            f"{self.thread.category_icon} {self.thread.category_name} • "
+            f"{self.thread.user_avatar} {self.thread.user_name} • "
+            f"💬 {self.thread.posts_count} posts • "
+            f"👀 {self.thread.view_count} views • "
+            f"⬆️ {self.thread.score}"
+        )
+
     def on_mount(self) -> None:
-        """Called after screen is mounted - populate posts list"""
-        self._populate_posts_list()
+        """Called after screen is mounted - load thread body and posts list"""
+        self._load_thread()
+        self._load_posts()
+
+    @work(exclusive=True, group="thread")
+    async def _load_thread(self) -> None:
+        """Load the full thread (body and fresh counts) and record the view"""
+        thread = await self.app.async_database.get_thread(self.thread.id)
+        if thread is None:
+            return
+        self.thread = thread
+        self.query_one("#thread-meta", Label).update(self._meta_text())
+        await self.query_one("#thread-body", Markdown).update(thread.text)
+
+    def on_changes_available(self, message: ChangesAvailable) -> None:
+        """Refresh the header counts when this thread changed"""
+        if message.reload or self.thread.id in message.thread_ids:
+            self._refresh_meta()
+
+    @work(exclusive=True, group="meta")
+    async def _refresh_meta(self) -> None:
+        """Reload the thread without counting another view"""
+        thread = await self.app.async_database.get_thread(self.thread.id, increment_views=False)
+        if thread is None:
+            return
+        self.thread = thread
+        self.query_one("#thread-meta", Label).update(self._meta_text())
+
+    @work(exclusive=True, group="posts")
+    async def _load_posts(self) -> None:
+        """Load the next page of the reply tree off the event loop (cancelled if the screen is popped)"""
+        if self._loading_posts:
+            return
+        self._loading_posts = True
+        try:
+            page, cursor = await self.app.async_database.list_post_tree_rows(
+                self.thread.id, cursor=self._posts_cursor, limit=POSTS_PAGE_SIZE,
+            )
+        finally:
+            self._loading_posts = False
 
-    def _populate_posts_list(self) -> None:
-        """Populate the posts list with nested replies"""
-        t = get_translator().t
         posts_list = self.query_one("#posts-list", ListView)
+        for item in posts_list.query(MorePostsItem):
+            await item.remove()
 
-        # Get all posts
-        self.posts = self.database.list_posts(self.thread.id, limit=1000)
+        self._posts_cursor = cursor
+        self.posts.extend(page)
+        self._append_posts(page)
+        if cursor is not None:
+            posts_list.append(MorePostsItem())
 
         if not self.posts:
+            t = get_translator().t
             posts_list.append(ListItem(Label(t('thread.no_replies'))))
-        else:
-            # Build tree structure
-            posts_by_parent = {}
-            for post in self.posts:
-                parent_id = post.parent_post_id
-                if parent_id not in posts_by_parent:
-                    posts_by_parent[parent_id] = []
-                posts_by_parent[parent_id].append(post)
-
-            # Render posts recursively
-            def render_post_tree(parent_id, depth=0):
-                if parent_id in posts_by_parent:
-                    for post in posts_by_parent[parent_id]:
-                        posts_list.append(PostItem(post, depth))
-                        # Render children
-                        render_post_tree(post.id, depth + 1)
-
-            # Start with root posts (parent_post_id is None)
-            render_post_tree(None, 0)
+
+    def _append_posts(self, posts: list) -> None:
+        """Append posts that already arrive in depth-first order"""
+        posts_list = self.query_one("#posts-list", ListView)
+        for post in posts:
+            posts_list.append(PostItem(post, post.depth))
+
+    def on_list_view_highlighted(self, event: ListView.Highlighted) -> None:
+        """Fetch the next page once the cursor reaches the end of the list"""
+        if isinstance(event.item, MorePostsItem):
+            self.action_load_more()
+
+    def on_list_view_selected(self, event: ListView.Selected) -> None:
+        """Fetch the next page when the "more" entry is chosen"""
+        if isinstance(event.item, MorePostsItem):
+            self.action_load_more()
+
+    def action_load_more(self) -> None:
+        """Load the next page of replies, if there is one"""
+        if self._posts_cursor is not None:
+            self._load_posts()
 
     def action_scroll_down(self) -> None:
         """Scroll down"""
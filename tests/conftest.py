@@ -0,0 +1,25 @@
+"""Shared fixtures for the storage tests"""
+
+import pytest
+
+from termforum.storage import Database
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Path of a database file in a fresh temporary directory"""
+    return str(tmp_path / "forum.db")
+
+
+@pytest.fixture
+def db(db_path):
+    """Fresh database with the default categories and no background threads"""
+    database = Database(db_path, view_flush_interval=None)
+    yield database
+    database.close()
+
+
+@pytest.fixture
+def author(db):
+    """A user to write threads and posts as"""
+    return db.create_user("alice_one")
@@ -0,0 +1,103 @@
+"""Reads that fall back to the attached archive, and recreating a forum"""
+
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from termforum.main import cli
+from termforum.storage import Database
+from termforum.storage.archive import archive_path_for
+
+
+def _archived_forum(db_path):
+    """A forum with one archived thread (two replies) and one live thread"""
+    with Database(db_path, view_flush_interval=None, archive_path=archive_path_for(db_path)) as db:
+        author = db.create_user("alice_one")
+        cold = db.create_thread("Cold thread", "Written long ago about turnips", author.id, 1)
+        first = db.create_post(cold.id, author.id, "First archived reply")
+        db.create_post(cold.id, author.id, "Nested archived reply about turnips", parent_post_id=first.id)
+        result = db.archive(datetime.utcnow() + timedelta(days=1))
+        hot = db.create_thread("Hot thread", "Still in the main file", author.id, 1)
+    return result, cold, hot
+
+
+def test_archived_threads_stay_readable(db_path):
+    result, cold, hot = _archived_forum(db_path)
+    assert (result.threads, result.posts) == (1, 2)
+
+    with Database(db_path, view_flush_interval=None, archive_path=archive_path_for(db_path)) as db:
+        assert db.archive_stats() == {"main_threads": 1, "main_posts": 0,
+                                      "archive_threads": 1, "archive_posts": 2}
+        thread = db.get_thread(cold.id, increment_views=False)
+        assert thread.title == "Cold thread"
+        assert [post.content for post in db.list_posts(cold.id)] == [
+            "First archived reply", "Nested archived reply about turnips",
+        ]
+        posts, _ = db.list_post_tree(cold.id)
+        assert [post.depth for post in posts] == [0, 1]
+        assert db.get_thread(hot.id, increment_views=False).title == "Hot thread"
+
+        hits, _ = db.search("turnips")
+        assert sorted((hit.kind, hit.id) for hit in hits) == [("post", 2), ("thread", cold.id)]
+
+
+def test_init_recreate_removes_archive_and_sidecars(db_path):
+    _archived_forum(db_path)
+    for path in (db_path, archive_path_for(db_path)):
+        for suffix in ("-wal", "-shm"):
+            Path(f"{path}{suffix}").write_bytes(b"stale")
+
+    outcome = CliRunner().invoke(cli, ["init", "--db", db_path], input="y\nadmin\n")
+    assert outcome.exit_code == 0, outcome.output
+
+    assert not Path(archive_path_for(db_path)).exists()
+    assert not Path(f"{archive_path_for(db_path)}-wal").exists()
+    with Database(db_path, view_flush_interval=None, archive_path=archive_path_for(db_path)) as db:
+        assert db.get_forum_stats()["threads"] == 0
+        assert db.get_thread(1, increment_views=False) is None
+        assert db.search("turnips")[0] == []
+
+
+def _counts(db):
+    """Forum stats plus every user and category counter"""
+    with db._read() as conn:
+        users = conn.execute("SELECT id, threads_count, posts_count FROM users ORDER BY id").fetchall()
+        categories = conn.execute("SELECT id, threads_count, posts_count FROM categories ORDER BY id").fetchall()
+    return db.get_forum_stats(), [tuple(row) for row in users], [tuple(row) for row in categories]
+
+
+def test_archiving_keeps_stats_and_counters(db_path):
+    with Database(db_path, view_flush_interval=None) as db:
+        alice = db.create_user("alice_one")
+        bob = db.create_user("bob_two")
+        cold = db.create_thread("Cold thread", "Old news", alice.id, 1)
+        db.create_post(cold.id, bob.id, "Old reply")
+        db.create_post(cold.id, alice.id, "Older reply")
+        pinned = db.create_thread("Pinned thread", "Stays hot", bob.id, 2)
+        with db._write() as conn:
+            conn.execute("UPDATE threads SET is_pinned = 1 WHERE id = ?", (pinned.id,))
+        before = _counts(db)
+    assert before[0]["threads"] == 2 and before[0]["posts"] == 2
+
+    with Database(db_path, view_flush_interval=None, archive_path=archive_path_for(db_path)) as db:
+        assert db.archive(datetime.utcnow() + timedelta(days=1)).threads == 1
+        assert _counts(db) == before
+        # Reconciling counts the archived rows too, so there is nothing to repair
+        stats_before, stats_after = db.reconcile_forum_stats()
+        assert stats_after == stats_before
+        assert set(db.reconcile_counters().values()) == {0}
+        assert _counts(db) == before
+
+
+def test_views_of_archived_threads_are_kept(db_path):
+    result, cold, hot = _archived_forum(db_path)
+
+    with Database(db_path, view_flush_interval=None, archive_path=archive_path_for(db_path)) as db:
+        db.get_thread(cold.id)
+        db.get_thread(hot.id)
+        assert db.get_thread(cold.id, increment_views=False).view_count == 1
+
+    with Database(db_path, view_flush_interval=None, archive_path=archive_path_for(db_path)) as db:
+        assert db.get_thread(cold.id, increment_views=False).view_count == 1
+        assert db.get_thread(hot.id, increment_views=False).view_count == 1
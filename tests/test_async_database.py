@@ -0,0 +1,25 @@
+"""AsyncDatabase: one Database shared by the sync and async facades"""
+
+import asyncio
+
+from termforum.storage import AsyncDatabase
+
+
+def test_async_calls_share_the_database_and_view_counter(db, author):
+    thread = db.create_thread("Viewed thread", "Body", author.id, 1)
+
+    async def view() -> int:
+        adb = AsyncDatabase(db)
+        try:
+            loaded = await adb.get_thread(thread.id)
+            assert loaded.id == thread.id
+            # A view recorded through the sync facade shows up through the async one
+            db.get_thread(thread.id)
+            return (await adb.get_thread(thread.id, increment_views=False)).view_count
+        finally:
+            await adb.close()
+
+    assert asyncio.run(view()) == 2
+    assert db.views.pending(thread.id) == 2
+    # Closing the facade leaves the wrapped Database open
+    assert db.get_thread(thread.id, increment_views=False).view_count == 2
@@ -0,0 +1,72 @@
+"""Snapshots of forums that span several files"""
+
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from termforum.storage import Database
+from termforum.storage.archive import archive_path_for
+from termforum.storage.backup import (list_snapshots, read_verify_report, snapshot,
+                                      verify_in_background)
+from termforum.storage.sharding import shard_directory
+
+
+def _verify(path):
+    process = verify_in_background(str(path))
+    process.join()
+    return read_verify_report(str(path))
+
+
+def test_snapshot_includes_the_archive(db_path, tmp_path):
+    archive = archive_path_for(db_path)
+    with Database(db_path, view_flush_interval=None, archive_path=archive) as db:
+        author = db.create_user("alice_one")
+        cold = db.create_thread("Cold thread", "Archived body", author.id, 1)
+        db.create_post(cold.id, author.id, "Archived reply")
+        db.archive(datetime.utcnow() + timedelta(days=1))
+        hot = db.create_thread("Hot thread", "Still here", author.id, 1)
+
+    result = snapshot(db_path, str(tmp_path / "backups"))
+
+    copy_archive = archive_path_for(str(result.path))
+    assert result.companions == [Path(copy_archive)]
+    assert list_snapshots(str(tmp_path / "backups")) == [result.path]
+    with Database(str(result.path), view_flush_interval=None, archive_path=copy_archive) as copy:
+        assert copy.archive_stats() == {"main_threads": 1, "main_posts": 0,
+                                        "archive_threads": 1, "archive_posts": 1}
+        assert copy.get_thread(cold.id, increment_views=False).text == "Archived body"
+        assert copy.get_thread(hot.id, increment_views=False).text == "Still here"
+
+    assert _verify(result.path)["ok"]
+
+
+def test_snapshot_includes_every_shard(db_path, tmp_path):
+    with Database(db_path, view_flush_interval=None, sharding="category") as db:
+        author = db.create_user("alice_one")
+        ids = [db.create_thread(f"Thread in {category}", "Body", author.id, category).id
+               for category in (1, 2, 3)]
+
+    result = snapshot(db_path, str(tmp_path / "backups"))
+
+    shards = shard_directory(str(result.path))
+    assert sorted(path.name for path in shards.iterdir()) == ["shard-0001.db", "shard-0002.db", "shard-0003.db"]
+    assert result.companions == [shards]
+    with Database(str(result.path), view_flush_interval=None) as copy:
+        threads = copy.list_threads()
+        assert sorted(thread.id for thread in threads) == sorted(ids)
+
+    assert _verify(result.path)["ok"]
+
+
+def test_retention_removes_companions(db_path, tmp_path):
+    with Database(db_path, view_flush_interval=None, sharding="hash:2") as db:
+        author = db.create_user("alice_one")
+        db.create_thread("Sharded thread", "Body", author.id, 1)
+
+    directory = tmp_path / "backups"
+    first = snapshot(db_path, str(directory), keep=1)
+    second = snapshot(db_path, str(directory), keep=1)
+
+    assert list_snapshots(str(directory)) == [second.path]
+    assert not first.path.exists()
+    assert not shard_directory(str(first.path)).exists()
+    assert sorted(path.name for path in directory.iterdir()) == [second.path.name, shard_directory(str(second.path)).name]
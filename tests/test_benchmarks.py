@@ -0,0 +1,32 @@
+"""Storage benchmark: runs, cleans up after itself and compares baselines"""
+
+from dataclasses import replace
+
+from termforum.benchmarks.storage import (OPERATIONS, StorageBenchmark, compare, load_baseline,
+                                          save_baseline)
+from termforum.seed import ForumSeeder
+from termforum.storage import Database
+
+
+def test_benchmark_leaves_the_database_as_seeded_and_flags_regressions(tmp_path):
+    with Database(str(tmp_path / "bench.db"), view_flush_interval=None) as db:
+        ForumSeeder(db, seed=1).run(users=20, threads=10, posts=100)
+        before = db.get_forum_stats()
+        results = StorageBenchmark(db, seed=1).run(iterations=5, warmup=1)
+
+        assert list(results) == list(OPERATIONS)
+        assert all(result.iterations == 5 and result.p50_ms <= result.p99_ms for result in results.values())
+        assert db.get_forum_stats() == before
+        assert not any(db.reconcile_counters().values())
+
+    path = tmp_path / "baseline.json"
+    save_baseline(path, {"10k": results})
+    baseline = load_baseline(path)
+    assert compare({"10k": results}, baseline) == []
+
+    slower = dict(results, get_thread=replace(results["get_thread"],
+                                              p95_ms=results["get_thread"].p95_ms * 2 + 1))
+    regressions = compare({"10k": slower}, baseline)
+    assert len(regressions) == 1 and regressions[0].startswith("10k get_thread: p95")
+    # Below the noise floor a large ratio is not a regression
+    assert compare({"10k": slower}, baseline, noise_floor_ms=10_000) == []
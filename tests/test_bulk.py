@@ -0,0 +1,33 @@
+"""Bulk inserts: returned ids and per-batch counters"""
+
+
+def test_bulk_inserts_return_ids_and_count_each_batch(db, author):
+    other = db.create_user("bob_two")
+    thread_ids = db.bulk_create_threads([
+        {"title": f"Bulk thread {n}", "content": "Body", "user_id": author.id, "category_id": 1 + n % 2}
+        for n in range(5)
+    ], batch_size=2)
+    assert [db.get_thread(thread_id, increment_views=False).title for thread_id in thread_ids] == [
+        f"Bulk thread {n}" for n in range(5)
+    ]
+
+    post_ids = db.bulk_create_posts([
+        {"thread_id": thread_ids[0], "user_id": user_id, "content": f"Reply {n}",
+         "created_at": "2030-01-01 00:00:00"}
+        for n, user_id in enumerate([author.id, other.id, other.id])
+    ], batch_size=2)
+    assert [db.get_post(post_id).content for post_id in post_ids] == ["Reply 0", "Reply 1", "Reply 2"]
+
+    thread = db.get_thread(thread_ids[0], increment_views=False)
+    assert thread.posts_count == 4
+    # Ties on created_at go to the later post, as with single inserts
+    assert thread.last_post_user_id == other.id
+    assert db.get_user(author.id).threads_count == 5
+    assert db.get_user(other.id).posts_count == 2
+    assert [c.threads_count for c in db.list_categories()[:2]] == [3, 2]
+    assert not any(db.reconcile_counters().values())
+
+    # The counter triggers are back for ordinary writes
+    db.create_post(thread_ids[1], other.id, "Single reply")
+    assert db.get_thread(thread_ids[1], increment_views=False).posts_count == 2
+    assert not any(db.reconcile_counters().values())
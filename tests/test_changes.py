@@ -0,0 +1,52 @@
+"""Change log and the watchers that follow it"""
+
+from termforum.storage import Database, ForumWatcher
+
+
+def test_log_reports_inserts_updates_and_soft_deletes(db, author):
+    start = db.latest_change_seq()
+    thread = db.create_thread("Logged thread", "Body", author.id, 1)
+    post = db.create_post(thread.id, author.id, "Logged reply")
+    with db._write() as conn:
+        conn.execute("UPDATE posts SET is_deleted = 1 WHERE id = ?", (post.id,))
+        # View counts are not logged
+        conn.execute("UPDATE threads SET view_count = view_count + 5 WHERE id = ?", (thread.id,))
+
+    changes = [(change.entity, change.entity_id, change.op) for change in db.changes_since(start)
+               if change.entity in ("thread", "post")]
+    assert changes == [
+        ("thread", thread.id, "insert"),
+        ("post", post.id, "insert"),
+        ("thread", thread.id, "update"),   # posts_count from the reply
+        ("post", post.id, "delete"),
+        ("thread", thread.id, "update"),   # posts_count from the soft delete
+    ]
+
+
+def test_watcher_sees_commits_from_other_connections(db, db_path, author):
+    watcher = db.watch_changes()
+    try:
+        assert watcher.poll() == []
+        with Database(db_path, view_flush_interval=None) as other:
+            thread = other.create_thread("From elsewhere", "Body", author.id, 1)
+        assert thread.id in {change.thread_id for change in watcher.poll()}
+        assert watcher.poll() == []
+    finally:
+        watcher.close()
+
+
+def test_forum_watcher_follows_new_shards(db_path):
+    with Database(db_path, view_flush_interval=None, sharding="category") as db:
+        author = db.create_user("alice_one")
+        first = db.create_thread("In the first shard", "Body", author.id, 1)
+
+        watcher = ForumWatcher(db_path)
+        try:
+            assert watcher.poll() == []
+            # Category 2 gets its shard file only now
+            second = db.create_thread("In a new shard", "Body", author.id, 2)
+            db.create_post(first.id, author.id, "Reply in the first shard")
+            touched = {change.thread_id for change in watcher.poll()}
+            assert {first.id, second.id} <= touched
+        finally:
+            watcher.close()
@@ -0,0 +1,78 @@
+"""Compressed bodies: storage, search and access from outside the pool"""
+
+import sqlite3
+
+from termforum.storage import Database
+from termforum.storage.backup import read_verify_report, snapshot, verify_in_background
+
+
+LONG_BODY = "Notes on growing turnips in a cold frame. " * 60
+
+
+def _stored(db, table, row_id):
+    with db._read() as conn:
+        return conn.execute(f"SELECT content FROM {table} WHERE id = ?", (row_id,)).fetchone()[0]
+
+
+def test_long_bodies_are_stored_compressed_and_searchable(db, author):
+    thread = db.create_thread("Cold frames", LONG_BODY, author.id, 1)
+    post = db.create_post(thread.id, author.id, "Short reply about parsnips")
+
+    assert isinstance(_stored(db, "threads", thread.id), bytes)
+    assert isinstance(_stored(db, "posts", post.id), str)
+    assert db.get_thread(thread.id, increment_views=False).text == LONG_BODY
+
+    hits, _ = db.search("turnips")
+    assert [(hit.kind, hit.id) for hit in hits] == [("thread", thread.id)]
+    assert "[b]turnips[/b]" in hits[0].snippet
+
+
+def test_compact_keeps_search_in_step(db_path, author):
+    with Database(db_path, view_flush_interval=None, compress_threshold=None) as plain:
+        thread = plain.create_thread("Cold frames", LONG_BODY, author.id, 1)
+        assert isinstance(_stored(plain, "threads", thread.id), str)
+
+        result = plain.compact(threshold=1024)
+        assert result.rows == 1 and result.saved > 0
+        assert isinstance(_stored(plain, "threads", thread.id), bytes)
+        assert [hit.id for hit in plain.search("turnips")[0]] == [thread.id]
+
+        plain.compact()
+        assert _stored(plain, "threads", thread.id) == LONG_BODY
+        assert [hit.id for hit in plain.search("turnips")[0]] == [thread.id]
+
+
+def test_raw_connections_can_write_without_the_body_function(db, db_path, author):
+    thread = db.create_thread("Cold frames", LONG_BODY, author.id, 1)
+    post = db.create_post(thread.id, author.id, "Short reply about parsnips")
+
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            # Edits to a compressed row keep its indexed body
+            conn.execute("UPDATE threads SET title = 'Frames for radishes' WHERE id = ?", (thread.id,))
+            conn.execute("UPDATE posts SET content = 'Reply about beetroot' WHERE id = ?", (post.id,))
+            conn.execute("""
+                INSERT INTO posts (thread_id, user_id, content) VALUES (?, ?, 'Written by hand about kale')
+            """, (thread.id, author.id))
+            conn.execute("UPDATE threads SET is_deleted = 1 WHERE id = ?", (thread.id,))
+    finally:
+        conn.close()
+
+    assert db.search("turnips")[0] == [] and db.search("kale")[0] == []
+    with db._write() as conn:
+        conn.execute("UPDATE threads SET is_deleted = 0 WHERE id = ?", (thread.id,))
+    assert [hit.id for hit in db.search("turnips radishes")[0]] == [thread.id]
+    assert [hit.id for hit in db.search("beetroot")[0]] == [post.id]
+    assert len(db.search("kale")[0]) == 1
+    assert db.search("parsnips")[0] == []
+
+
+def test_snapshot_of_compressed_forum_verifies(db, db_path, author, tmp_path):
+    db.create_thread("Cold frames", LONG_BODY, author.id, 1)
+
+    result = snapshot(db_path, str(tmp_path / "backups"))
+    process = verify_in_background(str(result.path))
+    process.join()
+
+    assert read_verify_report(str(result.path))["ok"]
@@ -0,0 +1,44 @@
+"""Denormalized counters: triggers, bulk loads and reconciliation"""
+
+
+def _raw_write(db, sql, *params):
+    """Write around the Database API (the cached user and category rows are dropped)"""
+    with db._write() as conn:
+        conn.execute(sql, params)
+    db.identity_map.clear()
+
+
+def test_counters_follow_deletes_and_bulk_loads(db, author):
+    thread = db.create_thread("Counted thread", "Body", author.id, 1)
+    post = db.create_post(thread.id, author.id, "Counted reply")
+
+    _raw_write(db, "UPDATE posts SET is_deleted = 1 WHERE id = ?", post.id)
+    assert db.get_thread(thread.id, increment_views=False).posts_count == 1
+    assert db.get_user(author.id).posts_count == 0
+    assert db.get_category(1).posts_count == 0
+
+    with db.bulk_load() as repaired:
+        thread_ids = db.bulk_create_threads([
+            {"title": f"Loaded thread {n}", "content": "Body", "user_id": author.id, "category_id": 2}
+            for n in range(3)
+        ])
+        db.bulk_create_posts([
+            {"thread_id": thread_ids[0], "user_id": author.id, "content": f"Loaded reply {n}"}
+            for n in range(4)
+        ])
+    assert repaired["users.threads_count"] == 1
+
+    assert db.get_user(author.id).threads_count == 4
+    assert db.get_user(author.id).posts_count == 4
+    assert db.get_category(2).threads_count == 3
+    assert db.get_category(2).posts_count == 4
+    assert db.get_thread(thread_ids[0], increment_views=False).posts_count == 5
+
+    _raw_write(db, "DELETE FROM threads WHERE id = ?", thread_ids[0])
+    assert db.get_category(2).threads_count == 2
+    assert db.get_category(2).posts_count == 0
+
+    # Counters that drifted outside the triggers are repaired
+    _raw_write(db, "UPDATE users SET threads_count = 99 WHERE id = ?", author.id)
+    assert db.reconcile_counters()["users.threads_count"] == 1
+    assert db.get_user(author.id).threads_count == 3
@@ -0,0 +1,50 @@
+"""Live updates of the home screen's thread list"""
+
+import asyncio
+
+from termforum.app import TermForumApp
+from termforum.ui.screens.home import HomeScreen, ThreadListItem
+
+
+def _listed(app):
+    return [item.thread.id for item in app.screen.query_one("#thread-list").children
+            if isinstance(item, ThreadListItem)]
+
+
+async def _wait_for(pilot, condition, timeout=5.0):
+    for _ in range(int(timeout / 0.05)):
+        if condition():
+            return
+        await pilot.pause(0.05)
+    raise AssertionError("condition not met in time")
+
+
+def test_changed_threads_keep_their_listing_position(db, author, monkeypatch, tmp_path):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    ids = [db.create_thread(f"Thread number {n}", "Body", author.id, 1).id for n in range(4)]
+    with db._write() as conn:
+        # Distinct activity times, oldest first, so the order does not depend on ids
+        for age, thread_id in enumerate(reversed(ids)):
+            conn.execute("UPDATE threads SET updated_at = datetime('now', ?) WHERE id = ?",
+                         (f"-{age + 1} hours", thread_id))
+
+    async def scenario():
+        app = TermForumApp(db, author)
+        async with app.run_test() as pilot:
+            await _wait_for(pilot, lambda: isinstance(app.screen, HomeScreen) and len(_listed(app)) == 4)
+            assert _listed(app) == list(reversed(ids))
+
+            # A vote is logged as a thread change but does not touch updated_at
+            with db._write() as conn:
+                conn.execute("UPDATE threads SET upvotes = upvotes + 1 WHERE id = ?", (ids[1],))
+            await _wait_for(pilot, lambda: any(
+                item.thread.upvotes for item in app.screen.query_one("#thread-list").children
+                if isinstance(item, ThreadListItem)))
+            assert _listed(app) == list(reversed(ids))
+
+            # A reply moves its thread to the top of the unpinned threads
+            db.create_post(ids[0], author.id, "Fresh reply")
+            await _wait_for(pilot, lambda: _listed(app)[0] == ids[0])
+            assert _listed(app) == [ids[0], ids[3], ids[2], ids[1]]
+
+    asyncio.run(scenario())
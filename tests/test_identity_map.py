@@ -0,0 +1,54 @@
+"""Identity map: targeted invalidation of own writes, full clears on foreign ones"""
+
+from termforum.storage import Database
+
+
+def test_own_writes_invalidate_only_touched_rows(db, author):
+    other = db.create_user("bob_two")
+    db.get_user(author.id)
+    db.get_user(other.id)
+    db.get_category(2)
+
+    thread = db.create_thread("Counted thread", "Body", author.id, 1)
+    hits = db.cache_stats()["hits"]
+    # Neither the other user nor the other category was touched
+    assert db.get_user(other.id).threads_count == 0
+    assert db.get_category(2).threads_count == 0
+    assert db.cache_stats()["hits"] == hits + 2
+    assert db.cache_stats()["invalidations"] == 0
+
+    assert db.get_user(author.id).threads_count == 1
+    assert db.get_category(1).threads_count == 1
+    db.create_post(thread.id, other.id, "Counted reply")
+    assert db.get_user(other.id).posts_count == 1
+    assert db.get_category(1).posts_count == 1
+    assert next(c for c in db.list_categories() if c.id == 1).posts_count == 1
+
+
+def test_commits_from_other_connections_clear_the_map(db, db_path, author):
+    assert db.get_user(author.id).threads_count == 0
+
+    with Database(db_path, view_flush_interval=None) as other:
+        other.create_thread("Written elsewhere", "Body", author.id, 1)
+
+    assert db.get_user(author.id).threads_count == 1
+    assert db.cache_stats()["invalidations"] == 1
+
+
+def test_shard_counters_are_cached_per_shard(db_path):
+    with Database(db_path, view_flush_interval=None, sharding="category") as db:
+        author = db.create_user("alice_one")
+        db.create_thread("First shard", "Body", author.id, 1)
+        db.create_thread("Second shard", "Body", author.id, 2)
+        assert db.get_user(author.id).threads_count == 2
+
+        shards = db.router.shards()
+        misses = [shard.cache_stats()["misses"] for shard in shards]
+        assert db.get_user(author.id).threads_count == 2
+        assert [shard.cache_stats()["misses"] for shard in shards] == misses
+
+        # A write to one shard refreshes only that shard's counters
+        db.create_thread("First shard again", "Body", author.id, 1)
+        assert db.get_user(author.id).threads_count == 3
+        assert [shard.cache_stats()["misses"] for shard in shards] == [misses[0] + 1, misses[1]]
+        assert [category.threads_count for category in db.list_categories()[:2]] == [2, 1]
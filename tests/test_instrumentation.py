@@ -0,0 +1,30 @@
+"""Per-query instrumentation and the slow-query log"""
+
+import json
+
+from termforum.storage import Database, QueryStats
+
+
+def test_queries_are_timed_per_method_and_slow_ones_logged(tmp_path):
+    slow_log = tmp_path / "slow.jsonl"
+    stats = QueryStats(slow_ms=0, slow_log=str(slow_log))
+    with Database(str(tmp_path / "forum.db"), view_flush_interval=None, query_stats=stats) as db:
+        author = db.create_user("alice_one")
+        thread = db.create_thread("Timed thread", "Body", author.id, 1)
+        stats.reset()
+        for _ in range(3):
+            db.get_thread(thread.id, increment_views=False)
+
+    snapshot = stats.snapshot()
+    queries = [query for query in snapshot["queries"] if query["name"].startswith("get_thread")]
+    assert queries and sum(query["calls"] for query in queries) >= 3
+    query = queries[0]
+    assert sum(query["histogram"].values()) == query["calls"]
+    assert query["max_ms"] >= query["mean_ms"] > 0
+    # Every call is over a 0 ms threshold; the plan is captured once, with the call's parameters
+    assert query["slow_calls"] == query["calls"]
+    assert query["plan"] and not query["plan"][0].startswith("(plan unavailable")
+
+    logged = [json.loads(line) for line in slow_log.read_text(encoding="utf-8").splitlines()]
+    assert {"time", "name", "ms", "sql"} <= set(logged[-1])
+    assert any(entry["name"].startswith("get_thread") for entry in logged)
@@ -0,0 +1,72 @@
+"""Purging soft-deleted rows, which only happens once retention is configured"""
+
+from click.testing import CliRunner
+
+from termforum.main import cli
+from termforum.storage import Database
+
+
+def _expired_forum(db_path):
+    """One live thread with a live and a deleted reply, and one deleted thread, all 60 days old"""
+    with Database(db_path, view_flush_interval=None) as db:
+        author = db.create_user("alice_one")
+        kept = db.create_thread("Kept thread", "Body", author.id, 1)
+        db.create_post(kept.id, author.id, "Kept reply")
+        gone = db.create_post(kept.id, author.id, "Deleted reply")
+        dropped = db.create_thread("Deleted thread", "Body", author.id, 1)
+        db.create_post(dropped.id, author.id, "Reply in a deleted thread")
+        with db._write() as conn:
+            conn.execute("UPDATE posts SET is_deleted = 1 WHERE id = ?", (gone.id,))
+            conn.execute("UPDATE threads SET is_deleted = 1 WHERE id = ?", (dropped.id,))
+            for table in ("threads", "posts"):
+                conn.execute(f"UPDATE {table} SET updated_at = datetime(updated_at, '-60 days')")
+    return kept, gone, dropped
+
+
+def _row_counts(db):
+    with db._read() as conn:
+        return tuple(conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in ("threads", "posts"))
+
+
+def _maintain(db):
+    while not db.maintain().idle:
+        pass
+
+
+def test_soft_deleted_rows_are_kept_by_default(db_path):
+    _expired_forum(db_path)
+    with Database(db_path, view_flush_interval=None) as db:
+        _maintain(db)
+        assert _row_counts(db) == (2, 3)
+
+
+def test_purge_removes_only_expired_deleted_rows(db_path):
+    kept, gone, dropped = _expired_forum(db_path)
+    with Database(db_path, view_flush_interval=None, retention_days=90) as db:
+        _maintain(db)
+        assert _row_counts(db) == (2, 3)
+
+    with Database(db_path, view_flush_interval=None, retention_days=30) as db:
+        report = db.maintain()
+        assert (report.purged_threads, report.purged_posts) == (1, 2)
+        assert _row_counts(db) == (1, 1)
+        assert db.get_thread(dropped.id, increment_views=False) is None
+        assert [post.content for post in db.list_posts(kept.id)] == ["Kept reply"]
+        assert db.get_forum_stats()["threads"] == 1
+
+
+def test_maintain_command_purges_only_when_asked(db_path, monkeypatch, tmp_path):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    _expired_forum(db_path)
+
+    outcome = CliRunner().invoke(cli, ["maintain", "--db", db_path])
+    assert outcome.exit_code == 0, outcome.output
+    assert "purging is off" in outcome.output
+    with Database(db_path, view_flush_interval=None) as db:
+        assert _row_counts(db) == (2, 3)
+
+    outcome = CliRunner().invoke(cli, ["maintain", "--db", db_path, "--retention-days", "30"])
+    assert outcome.exit_code == 0, outcome.output
+    assert "purging is off" not in outcome.output
+    with Database(db_path, view_flush_interval=None) as db:
+        assert _row_counts(db) == (1, 1)
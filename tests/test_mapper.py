@@ -0,0 +1,71 @@
+"""Mapping result rows onto the dataclass models"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Optional
+
+import pytest
+
+from termforum.models.timestamp import stored_timestamp
+from termforum.storage.mapper import RowMapper
+
+
+def test_loaded_timestamps_are_decoded_on_first_read(db, author):
+    thread = db.create_thread("Lazy thread", "Body", author.id, 1)
+    with db._read() as conn:
+        created_at, created_epoch = conn.execute(
+            "SELECT created_at, created_epoch FROM threads WHERE id = ?", (thread.id,)
+        ).fetchone()
+
+    loaded = db.get_thread(thread.id, increment_views=False)
+    # Threads get the integer epoch column, users and categories their text
+    assert stored_timestamp(loaded, "created_at") == created_epoch
+    assert loaded.created_at == datetime.fromisoformat(created_at)
+    assert stored_timestamp(loaded, "created_at") == loaded.created_at
+    assert loaded.to_dict()["last_post_at"] == loaded.created_at.isoformat()
+
+    summaries, _ = db.list_thread_summaries()
+    assert isinstance(stored_timestamp(summaries[0], "updated_at"), int)
+    assert summaries[0].updated_at == loaded.updated_at
+
+    user = db.get_user(author.id)
+    assert isinstance(stored_timestamp(user, "created_at"), str)
+    assert isinstance(user.created_at, datetime)
+    assert user.account_locked_until is None
+
+    category = db.list_categories()[0]
+    assert isinstance(stored_timestamp(category, "created_at"), str)
+    assert isinstance(category.created_at, datetime)
+
+
+@dataclass
+class _Note:
+    id: int
+    text: str
+    is_pinned: bool = False
+    created_at: Optional[datetime] = None
+    tags: List[str] = field(default_factory=list)
+
+
+def test_mapper_matches_columns_by_name_and_caches_each_shape():
+    mapper = RowMapper(_Note, timestamps=("created_at",), flags=("is_pinned",),
+                       epochs={"created_at": "created_epoch"})
+    description = [("text",), ("id",), ("is_pinned",), ("created_at",), ("id",)]
+
+    first, second = mapper.map(description, [("One", 1, 1, "2024-05-01 10:00:00", 7),
+                                             ("Two", 2, 0, None, 8)])
+    # The first of two same-named columns wins; unselected fields get their defaults
+    assert (first.id, first.text, first.is_pinned, first.tags) == (1, "One", True, [])
+    assert first.created_at == datetime(2024, 5, 1, 10, 0)
+    assert (second.is_pinned, second.created_at) == (False, None)
+    assert first.tags is not second.tags
+
+    # The epoch column is preferred when the query selects it
+    note = mapper.map_one([("id",), ("text",), ("created_at",), ("created_epoch",)],
+                          (3, "Three", "1999-01-01 00:00:00", 0))
+    assert note.created_at == datetime(1970, 1, 1)
+    assert mapper.map_one(description, None) is None
+    assert len(mapper._plans) == 2
+
+    with pytest.raises(ValueError, match="'text'"):
+        mapper.map([("id",)], [(4,)])
@@ -0,0 +1,186 @@
+"""Upgrading a database created before schema versioning"""
+
+import sqlite3
+
+import pytest
+
+from termforum.storage import SCHEMA_VERSION, Database, migrate, plan_migrations
+from termforum.storage.migrations import Backfill, Migration, add_columns
+
+
+# Schema of the first release, before migrations existed (user_version 0)
+BASELINE_SCHEMA = [
+    """
+    CREATE TABLE users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL CHECK(length(username) >= 3 AND length(username) <= 20),
+        email TEXT UNIQUE,
+        bio TEXT CHECK(length(bio) <= 500),
+        avatar TEXT DEFAULT '👤',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        posts_count INTEGER DEFAULT 0,
+        threads_count INTEGER DEFAULT 0,
+        reputation INTEGER DEFAULT 0,
+        is_admin BOOLEAN DEFAULT 0,
+        is_banned BOOLEAN DEFAULT 0,
+        last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE categories (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT UNIQUE NOT NULL,
+        slug TEXT UNIQUE NOT NULL,
+        description TEXT,
+        icon TEXT DEFAULT '📁',
+        color TEXT DEFAULT '#3B82F6',
+        position INTEGER DEFAULT 0,
+        threads_count INTEGER DEFAULT 0,
+        posts_count INTEGER DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE threads (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL CHECK(length(title) >= 3 AND length(title) <= 200),
+        slug TEXT UNIQUE NOT NULL,
+        category_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        content TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        view_count INTEGER DEFAULT 0,
+        posts_count INTEGER DEFAULT 1,
+        upvotes INTEGER DEFAULT 0,
+        downvotes INTEGER DEFAULT 0,
+        is_pinned BOOLEAN DEFAULT 0,
+        is_locked BOOLEAN DEFAULT 0,
+        is_deleted BOOLEAN DEFAULT 0,
+        last_post_user_id INTEGER,
+        last_post_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (category_id) REFERENCES categories(id) ON DELETE CASCADE,
+        FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+        FOREIGN KEY (last_post_user_id) REFERENCES users(id) ON DELETE SET NULL
+    )
+    """,
+    """
+    CREATE TABLE posts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        thread_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        parent_post_id INTEGER,
+        content TEXT NOT NULL CHECK(length(content) <= 10000),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        upvotes INTEGER DEFAULT 0,
+        downvotes INTEGER DEFAULT 0,
+        is_deleted BOOLEAN DEFAULT 0,
+        is_edited BOOLEAN DEFAULT 0,
+        edit_reason TEXT,
+        FOREIGN KEY (thread_id) REFERENCES threads(id) ON DELETE CASCADE,
+        FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+        FOREIGN KEY (parent_post_id) REFERENCES posts(id) ON DELETE CASCADE
+    )
+    """,
+    "CREATE INDEX idx_users_username ON users(username)",
+    "CREATE INDEX idx_threads_category ON threads(category_id, is_deleted, is_pinned DESC, updated_at DESC)",
+    "CREATE INDEX idx_posts_thread ON posts(thread_id, is_deleted, created_at ASC)",
+]
+
+
+@pytest.fixture
+def baseline_path(db_path):
+    """A first-release database with two users, one thread and a small reply tree"""
+    conn = sqlite3.connect(db_path)
+    for statement in BASELINE_SCHEMA:
+        conn.execute(statement)
+    conn.execute("INSERT INTO categories (name, slug) VALUES ('General', 'general')")
+    conn.executemany("INSERT INTO users (username) VALUES (?)", [("alice_one",), ("bob_two",)])
+    conn.execute("""
+        INSERT INTO threads (title, slug, category_id, user_id, content)
+        VALUES ('Baseline thread', 'baseline-thread', 1, 1, 'Written before migrations existed')
+    """)
+    conn.executemany("INSERT INTO posts (thread_id, user_id, parent_post_id, content) VALUES (?, ?, ?, ?)", [
+        (1, 2, None, "Top-level reply about turnips"),
+        (1, 1, 1, "Nested answer"),
+        (1, 2, None, "Second top-level reply"),
+    ])
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+def test_plan_lists_every_step_for_a_baseline_database(baseline_path):
+    version, plan = plan_migrations(baseline_path)
+
+    assert version == 0
+    assert [migration.version for migration, _ in plan] == list(range(1, SCHEMA_VERSION + 1))
+    # Step 1 backfills every baseline row: 2 users, 1 category, 1 thread, 3 posts
+    assert plan[0][1] == 7
+
+
+def test_baseline_upgrades_to_current_schema(baseline_path):
+    with Database(baseline_path, view_flush_interval=None) as db:
+        assert [result.version for result in db.applied_migrations] == list(range(1, SCHEMA_VERSION + 1))
+        with db._read() as conn:
+            assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+            assert conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+            assert conn.execute("PRAGMA foreign_key_check").fetchall() == []
+
+        # Reply-tree paths were backfilled
+        posts, _ = db.list_post_tree(1)
+        assert [(post.id, post.depth) for post in posts] == [(1, 0), (2, 1), (3, 0)]
+
+        # Counters were backfilled
+        assert db.get_thread(1, increment_views=False).posts_count == 4
+        assert db.get_user(2).posts_count == 2
+        assert db.get_user(1).threads_count == 1
+        assert db.get_category(1).threads_count == 1
+
+        # Existing rows are searchable, and new ones are indexed by the triggers
+        assert [(hit.kind, hit.id) for hit in db.search("turnips")[0]] == [("post", 1)]
+        db.create_post(1, 1, "A fresh reply about parsnips", parent_post_id=3)
+        assert [(hit.kind, hit.id) for hit in db.search("parsnips")[0]] == [("post", 4)]
+
+        # Authentication columns from step 2
+        user = db.create_user("carol_three", password_hash="hashed")
+        assert db.get_user(user.id).password_hash == "hashed"
+
+    with Database(baseline_path, view_flush_interval=None) as db:
+        assert db.applied_migrations == []
+
+
+def test_backfills_commit_per_chunk_and_resume(db, author):
+    for n in range(5):
+        db.create_thread(f"Backfilled thread {n}", "Body", author.id, 1)
+    chunks = []
+
+    def fill(cursor, first_id, last_id):
+        chunks.append((first_id, last_id))
+        if len(chunks) == 2:
+            raise RuntimeError("interrupted")
+        cursor.execute("""
+            UPDATE threads SET title_length = length(title)
+            WHERE id BETWEEN ? AND ? AND title_length IS NULL
+        """, (first_id, last_id))
+
+    step = Migration(
+        SCHEMA_VERSION + 1, "Thread title lengths",
+        apply=lambda cursor: add_columns(cursor, "threads", {"title_length": "INTEGER"}),
+        backfills=(Backfill("threads", fill),),
+    )
+
+    with pytest.raises(RuntimeError):
+        migrate(db.pool, [step], chunk_size=2)
+    with db._read() as conn:
+        # The first chunk stayed committed, the version was not bumped
+        assert conn.execute("SELECT COUNT(title_length) FROM threads").fetchone()[0] == 2
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+
+    assert [result.version for result in migrate(db.pool, [step], chunk_size=2)] == [step.version]
+    assert chunks[2:] == [(1, 2), (3, 4), (5, 5)]
+    with db._read() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM threads WHERE title_length IS NULL").fetchone()[0] == 0
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == step.version
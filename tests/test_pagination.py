@@ -0,0 +1,32 @@
+"""Keyset pagination: pages stay stable while rows are inserted"""
+
+
+def test_thread_pages_have_no_duplicates_or_gaps_under_inserts(db, author):
+    originals = [db.create_thread(f"Paged thread {n}", "Body", author.id, 1).id for n in range(5)]
+
+    seen = []
+    threads, cursor = db.list_threads_page(category_id=1, limit=2)
+    seen.extend(thread.id for thread in threads)
+    while cursor is not None:
+        # A newer thread sorts before the cursor, so it cannot shift the later pages
+        db.create_thread(f"Inserted thread {len(seen)}", "Body", author.id, 1)
+        threads, cursor = db.list_threads_page(category_id=1, limit=2, cursor=cursor)
+        seen.extend(thread.id for thread in threads)
+
+    assert seen == sorted(originals, reverse=True)
+
+
+def test_post_pages_pick_up_posts_added_after_the_cursor(db, author):
+    thread = db.create_thread("Paged posts", "Body", author.id, 1)
+    for n in range(3):
+        db.create_post(thread.id, author.id, f"Reply {n}")
+
+    posts, cursor = db.list_posts_page(thread.id, limit=2)
+    db.create_post(thread.id, author.id, "Reply 3")
+    rest, cursor = db.list_posts_page(thread.id, limit=2, cursor=cursor)
+    assert cursor is not None
+    tail, cursor = db.list_posts_page(thread.id, limit=2, cursor=cursor)
+
+    contents = [post.content for post in posts + rest + tail]
+    assert contents == ["Reply 0", "Reply 1", "Reply 2", "Reply 3"]
+    assert cursor is None
@@ -0,0 +1,36 @@
+"""Connection pool: WAL mode, read-only readers and the single writer"""
+
+import sqlite3
+
+import pytest
+
+from termforum.storage import ConnectionPool
+
+
+def test_readers_run_alongside_an_open_write(db_path):
+    pool = ConnectionPool(db_path, size=2)
+    try:
+        assert pool.journal_mode == "wal"
+        with pool.write() as conn:
+            conn.execute("CREATE TABLE notes (id INTEGER PRIMARY KEY, text TEXT)")
+            conn.execute("INSERT INTO notes (text) VALUES ('committed')")
+
+        with pool.write() as conn:
+            conn.execute("INSERT INTO notes (text) VALUES ('pending')")
+            # Readers neither wait for the writer nor see its uncommitted rows
+            with pool.read() as reader:
+                assert [row[0] for row in reader.execute("SELECT text FROM notes")] == ["committed"]
+                with pytest.raises(sqlite3.OperationalError, match="readonly"):
+                    reader.execute("INSERT INTO notes (text) VALUES ('from a reader')")
+
+        with pytest.raises(RuntimeError):
+            with pool.write() as conn:
+                conn.execute("INSERT INTO notes (text) VALUES ('rolled back')")
+                raise RuntimeError("abort")
+
+        with pool.read() as reader:
+            assert [row[0] for row in reader.execute("SELECT text FROM notes ORDER BY id")] == [
+                "committed", "pending",
+            ]
+    finally:
+        pool.close()
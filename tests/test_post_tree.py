@@ -0,0 +1,26 @@
+"""Materialized-path reply trees"""
+
+
+def test_tree_lists_depth_first_and_pages_subtrees(db, author):
+    thread = db.create_thread("Threaded replies", "Body", author.id, 1)
+    a = db.create_post(thread.id, author.id, "A")
+    b = db.create_post(thread.id, author.id, "B")
+    a1 = db.create_post(thread.id, author.id, "A1", parent_post_id=a.id)
+    db.create_post(thread.id, author.id, "B1", parent_post_id=b.id)
+    db.create_post(thread.id, author.id, "A1a", parent_post_id=a1.id)
+    db.create_post(thread.id, author.id, "A2", parent_post_id=a.id)
+
+    posts, cursor = db.list_post_tree(thread.id)
+    assert [(post.content, post.depth) for post in posts] == [
+        ("A", 0), ("A1", 1), ("A1a", 2), ("A2", 1), ("B", 0), ("B1", 1),
+    ]
+    assert cursor is None
+
+    # A subtree is paged in the same order, depth counted from the thread
+    first, cursor = db.list_post_tree(thread.id, root_post_id=a.id, limit=3)
+    rest, cursor = db.list_post_tree(thread.id, root_post_id=a.id, limit=3, cursor=cursor)
+    assert [post.content for post in first + rest] == ["A", "A1", "A1a", "A2"]
+    assert cursor is None
+
+    shallow, _ = db.list_post_tree(thread.id, root_post_id=a.id, max_depth=1)
+    assert [post.content for post in shallow] == ["A", "A1", "A2"]
@@ -0,0 +1,26 @@
+"""Tuple-backed PostRow loading"""
+
+
+def test_post_tree_rows_with_null_avatar(db):
+    user = db.create_user("no_avatar", avatar=None)
+    thread = db.create_thread("Avatarless thread", "Body", user.id, 1)
+    first = db.create_post(thread.id, user.id, "First reply")
+    db.create_post(thread.id, user.id, "Nested reply", parent_post_id=first.id)
+
+    rows, cursor = db.list_post_tree_rows(thread.id)
+
+    assert cursor is None
+    assert [row.text for row in rows] == ["First reply", "Nested reply"]
+    assert [row.depth for row in rows] == [0, 1]
+    assert all(row.user_avatar is None and row.user_name == "no_avatar" for row in rows)
+
+
+def test_post_tree_rows_share_author_strings(db, author):
+    thread = db.create_thread("Interned authors", "Body", author.id, 1)
+    for number in range(3):
+        db.create_post(thread.id, author.id, f"Reply {number}")
+
+    rows, _ = db.list_post_tree_rows(thread.id)
+
+    assert len({id(row.user_name) for row in rows}) == 1
+    assert len({id(row.user_avatar) for row in rows}) == 1
@@ -0,0 +1,105 @@
+"""Keeping the search index in step with edited rows"""
+
+import sqlite3
+
+import pytest
+
+from termforum.storage import Database
+
+
+def _check_index(db):
+    with db._write() as conn:
+        for table in ("threads_fts", "posts_fts"):
+            conn.execute(f"INSERT INTO {table}({table}, rank) VALUES ('integrity-check', 1)")
+
+
+def _edit(db, thread_id, post_id):
+    with db._write() as conn:
+        conn.execute("UPDATE threads SET title = 'Radish notes', content = ? WHERE id = ?",
+                     ("Radishes sprout within a week " * 60, thread_id))
+        conn.execute("UPDATE posts SET content = 'Beetroot reply' WHERE id = ?", (post_id,))
+
+
+def test_edits_replace_index_entries(db, author):
+    thread = db.create_thread("Turnip notes", "Turnips grow slowly", author.id, 1)
+    post = db.create_post(thread.id, author.id, "Parsnip reply")
+
+    _edit(db, thread.id, post.id)
+
+    _check_index(db)
+    assert db.search("turnip")[0] == [] and db.search("parsnip")[0] == []
+    hits, _ = db.search("radish")
+    assert [(hit.kind, hit.id) for hit in hits] == [("thread", thread.id)]
+    assert "[b]Radishes[/b]" in hits[0].snippet
+    assert [hit.id for hit in db.search("beetroot")[0]] == [post.id]
+
+    # Soft delete and restore
+    with db._write() as conn:
+        conn.execute("UPDATE posts SET is_deleted = 1 WHERE id = ?", (post.id,))
+    assert db.search("beetroot")[0] == []
+    with db._write() as conn:
+        conn.execute("UPDATE posts SET is_deleted = 0 WHERE id = ?", (post.id,))
+    assert [hit.id for hit in db.search("beetroot")[0]] == [post.id]
+    _check_index(db)
+
+
+def _install_version_7_index(conn):
+    """The search layout of schema version 7: decoding views and split update triggers"""
+    for table in ("threads", "posts"):
+        for suffix in ("insert", "update", "delete"):
+            conn.execute(f"DROP TRIGGER {table}_fts_{suffix}")
+        conn.execute(f"DROP TABLE {table}_fts")
+    conn.execute("CREATE VIEW threads_text AS SELECT id, title, body(content) AS content FROM threads")
+    conn.execute("CREATE VIEW posts_text AS SELECT id, body(content) AS content FROM posts")
+    for table, columns, values in (
+        ("threads", "title, content", "{row}.title, body({row}.content)"),
+        ("posts", "content", "body({row}.content)"),
+    ):
+        conn.execute(f"""
+            CREATE VIRTUAL TABLE {table}_fts USING fts5(
+                {columns}, content='{table}_text', content_rowid='id'
+            )
+        """)
+        conn.execute(f"INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')")
+        # Created old-then-new like the original schema, so the insert runs first
+        conn.execute(f"""
+            CREATE TRIGGER {table}_fts_update_old AFTER UPDATE OF {columns}, is_deleted ON {table}
+            WHEN old.is_deleted = 0
+            BEGIN
+                INSERT INTO {table}_fts({table}_fts, rowid, {columns})
+                VALUES ('delete', old.id, {values.format(row="old")});
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER {table}_fts_update_new AFTER UPDATE OF {columns}, is_deleted ON {table}
+            WHEN new.is_deleted = 0
+            BEGIN
+                INSERT INTO {table}_fts(rowid, {columns}) VALUES (new.id, {values.format(row="new")});
+            END
+        """)
+    conn.execute("PRAGMA user_version = 7")
+
+
+def test_upgrade_repairs_index_damaged_by_split_triggers(db_path, db, author):
+    thread = db.create_thread("Turnip notes", "Turnips grow slowly", author.id, 1)
+    post = db.create_post(thread.id, author.id, "Parsnip reply")
+
+    with db._write() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        _install_version_7_index(conn)
+    _edit(db, thread.id, post.id)
+    with pytest.raises(sqlite3.DatabaseError):
+        db.search("radish")
+    db.close()
+
+    with Database(db_path, view_flush_interval=None) as upgraded:
+        assert [result.version for result in upgraded.applied_migrations] == [8, 9]
+        _check_index(upgraded)
+        assert [hit.id for hit in upgraded.search("radish")[0]] == [thread.id]
+        assert [hit.id for hit in upgraded.search("beetroot")[0]] == [post.id]
+        with upgraded._read() as conn:
+            objects = [tuple(row) for row in conn.execute("""
+                SELECT type, name FROM sqlite_master
+                WHERE name LIKE '%fts_update%' OR type = 'view' ORDER BY name
+            """)]
+        assert objects == [("trigger", "posts_fts_update"), ("trigger", "threads_fts_update")]
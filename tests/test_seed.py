@@ -0,0 +1,35 @@
+"""Synthetic forum generator"""
+
+from termforum.seed import ForumSeeder, zipf_counts
+from termforum.storage import Database
+
+
+def _forum(conn):
+    return conn.execute("""
+        SELECT p.id, p.thread_id, p.user_id, p.parent_post_id, p.depth, p.created_at, body(p.content)
+        FROM posts p ORDER BY p.id
+    """).fetchall()
+
+
+def test_seeding_is_reproducible_and_consistent(tmp_path):
+    forums = []
+    for name in ("first.db", "second.db"):
+        with Database(str(tmp_path / name), view_flush_interval=None) as db:
+            result = ForumSeeder(db, seed=7, max_depth=3, batch_size=50).run(
+                users=20, threads=30, posts=200, categories=6,
+            )
+            assert (result.users, result.threads, result.posts) == (20, 30, 200)
+            assert result.categories >= 6 and result.max_depth <= 3
+            assert not any(db.reconcile_counters().values())
+
+            with db._read() as conn:
+                forums.append([tuple(row) for row in _forum(conn)])
+                # Replies answer posts of their own thread, never a later one
+                assert conn.execute("""
+                    SELECT COUNT(*) FROM posts p JOIN posts parent ON parent.id = p.parent_post_id
+                    WHERE parent.thread_id != p.thread_id OR parent.created_at > p.created_at
+                       OR p.depth != parent.depth + 1
+                """).fetchone()[0] == 0
+
+    assert forums[0] == forums[1]
+    assert sum(zipf_counts(200, 30, 0.8)) == 200
@@ -0,0 +1,35 @@
+"""Sharded forums: routing by category, ids naming their shard, merged reads"""
+
+from termforum.storage import Database
+from termforum.storage.sharding import shard_files, shard_of
+
+
+def test_rows_route_to_their_shard_and_reads_merge(db_path):
+    with Database(db_path, view_flush_interval=None, sharding="hash:2") as db:
+        author = db.create_user("alice_one")
+        threads = [db.create_thread(f"Routed thread {n}", "Shared words", author.id, category_id)
+                   for n, category_id in enumerate([1, 2, 3, 4])]
+        post = db.create_post(threads[1].id, author.id, "Routed reply")
+
+        # hash:2 puts category c in bucket 1 + c % 2
+        assert [shard_of(thread.id) for thread in threads] == [2, 1, 2, 1]
+        assert shard_of(post.id) == shard_of(threads[1].id)
+        assert len(shard_files(db_path)) == 2
+        with db._read() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM threads").fetchone()[0] == 0
+
+        listed, cursor = db.list_threads_page(limit=3)
+        rest, _ = db.list_threads_page(limit=3, cursor=cursor)
+        assert [thread.id for thread in listed + rest] == [
+            thread.id for thread in sorted(threads, key=lambda t: (t.updated_at, t.id), reverse=True)
+        ]
+        assert [p.content for p in db.list_posts_page(threads[1].id)[0]] == ["Routed reply"]
+        results, _ = db.search("shared")
+        assert {result.id for result in results} == {thread.id for thread in threads}
+        assert db.get_user(author.id).threads_count == 4
+
+    # The mode and category map are kept in the catalog
+    with Database(db_path, view_flush_interval=None) as reopened:
+        assert reopened.router is not None
+        assert shard_of(reopened.create_thread("After reopening", "Body", author.id, 3).id) == 2
+        assert reopened.get_thread(threads[0].id, increment_views=False).title == "Routed thread 0"
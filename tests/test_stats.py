@@ -0,0 +1,28 @@
+"""Materialized forum statistics kept by triggers"""
+
+
+def test_stats_follow_inserts_soft_deletes_and_deletes(db, author):
+    start = db.get_forum_stats()
+    thread = db.create_thread("Counted thread", "Body", author.id, 1)
+    post = db.create_post(thread.id, author.id, "Counted reply")
+    db.create_user("bob_two")
+
+    stats = db.get_forum_stats()
+    assert (stats["users"], stats["threads"], stats["posts"]) == (
+        start["users"] + 1, start["threads"] + 1, start["posts"] + 1,
+    )
+
+    with db._write() as conn:
+        conn.execute("UPDATE posts SET is_deleted = 1 WHERE id = ?", (post.id,))
+    assert db.get_forum_stats()["posts"] == start["posts"]
+    with db._write() as conn:
+        conn.execute("UPDATE posts SET is_deleted = 0 WHERE id = ?", (post.id,))
+        conn.execute("DELETE FROM posts WHERE id = ?", (post.id,))
+        conn.execute("UPDATE threads SET is_deleted = 1 WHERE id = ?", (thread.id,))
+
+    stats = db.get_forum_stats()
+    assert (stats["threads"], stats["posts"]) == (start["threads"], start["posts"])
+    assert stats["total_content"] == stats["threads"] + stats["posts"]
+    # Nothing drifted from what a full recount finds
+    before, after = db.reconcile_forum_stats()
+    assert before == after
@@ -0,0 +1,29 @@
+"""Thread summaries: list views without thread bodies"""
+
+from dataclasses import fields
+
+from termforum.models import ThreadSummary
+
+
+def test_summaries_match_full_threads_without_the_body(db, author):
+    ids = [db.create_thread(f"Summarized thread {n}", "A long body " * 50, author.id, 1).id
+           for n in range(3)]
+    db.create_post(ids[0], author.id, "Reply")
+    db.get_thread(ids[1])
+
+    summaries, cursor = db.list_thread_summaries(category_id=1)
+    threads, _ = db.list_threads_page(category_id=1)
+    assert cursor is None
+    assert "content" not in {field.name for field in fields(ThreadSummary)}
+    assert [(s.id, s.title, s.posts_count, s.view_count, s.user_name, s.category_name, s.updated_at)
+            for s in summaries] == [
+        (t.id, t.title, t.posts_count, t.view_count, t.user_name, t.category_name, t.updated_at)
+        for t in threads
+    ]
+
+    with db._write() as conn:
+        conn.execute("UPDATE threads SET is_deleted = 1 WHERE id = ?", (ids[2],))
+    # By id: listing order, deleted and unknown ids skipped
+    assert [s.id for s in db.get_thread_summaries([ids[1], ids[2], ids[0], 999])] == [
+        s.id for s in summaries if s.id != ids[2]
+    ]
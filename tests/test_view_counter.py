@@ -0,0 +1,29 @@
+"""Thread views: buffered in memory, written in batches"""
+
+from termforum.storage import Database
+
+
+def _stored_views(db, thread_id):
+    with db._read() as conn:
+        return conn.execute("SELECT view_count FROM threads WHERE id = ?", (thread_id,)).fetchone()[0]
+
+
+def test_views_are_written_in_batches_and_on_close(db_path):
+    db = Database(db_path, view_flush_interval=None, view_flush_every=3)
+    author = db.create_user("alice_one")
+    thread = db.create_thread("Viewed thread", "Body", author.id, 1)
+
+    db.get_thread(thread.id)
+    db.get_thread(thread.id)
+    # Pending views are not on disk yet but are already part of what readers see
+    assert _stored_views(db, thread.id) == 0
+    assert db.get_thread(thread.id, increment_views=False).view_count == 2
+
+    db.get_thread(thread.id)
+    assert _stored_views(db, thread.id) == 3
+    assert db.views.pending(thread.id) == 0
+
+    db.get_thread(thread.id)
+    db.close()
+    with Database(db_path, view_flush_interval=None) as reopened:
+        assert reopened.get_thread(thread.id, increment_views=False).view_count == 4